@@ -0,0 +1,92 @@
+from flask import Blueprint, jsonify, request
+from flasgger import swag_from
+
+from server.logger import logger
+from chat.search import SearchRequestError, search_activities
+
+
+activities_bp = Blueprint('activities', __name__, url_prefix='/activities')
+
+@activities_bp.route('/search', methods=['POST'])
+@swag_from({
+    'summary': '활동 검색 API',
+    'description': '필터·정렬 조건과 선택적인 텍스트 또는 벡터 질의로 활동을 검색하는 API. 챗봇(LLM)을 거치지 않는다.',
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'filter': {
+                        'type': 'object',
+                        'description': '필터 조건. {"and": [...]}, {"or": [...]} 또는 {"field": "activity_type", "op": "eq", "value": "봉사"} 형식'
+                    },
+                    'sort': {
+                        'type': 'array',
+                        'items': {'type': 'object'},
+                        'description': '정렬 조건 목록. 예: [{"field": "end_date", "direction": "asc"}]'
+                    },
+                    'query': {
+                        'type': 'string',
+                        'description': '텍스트 질의 (vector와 함께 사용할 수 없음)'
+                    },
+                    'vector': {
+                        'type': 'array',
+                        'items': {'type': 'number'},
+                        'description': '질의 벡터 (query와 함께 사용할 수 없음)'
+                    },
+                    'properties': {
+                        'type': 'array',
+                        'items': {'type': 'string'},
+                        'description': '반환할 속성 목록'
+                    },
+                    'limit': {
+                        'type': 'integer',
+                        'description': '페이지 크기 (기본 20, 최대 100)'
+                    },
+                    'cursor': {
+                        'type': 'string',
+                        'description': '이전 응답의 next_cursor. 다음 페이지를 가져올 때 나머지 조건과 함께 보낸다.'
+                    }
+                }
+            }
+        }
+    ],
+    'responses': {
+        200: {
+            'description': '검색 결과',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'items': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'uuid': {'type': 'string'},
+                                'properties': {'type': 'object'},
+                                'distance': {'type': 'number'}
+                            }
+                        }
+                    },
+                    'next_cursor': {'type': 'string'}
+                }
+            }
+        },
+        400: {
+            'description': '잘못된 요청'
+        }
+    }
+})
+def search():
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"error": "Please provide JSON request body."}), 400
+
+    try:
+        return jsonify(search_activities(body)), 200
+    except SearchRequestError as e:
+        logger.info(f"잘못된 활동 검색 요청: {e}")
+        return jsonify({"error": str(e)}), 400
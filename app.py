@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 from flasgger import Swagger
 from server.logger import logger
 from crawler.scheduler import start_scheduler, shutdown_scheduler
+from chat.weaviate import weaviate_client_manager
 
 # test
 # 현재 app.py 파일의 디렉토리 경로를 sys.path에 추가
@@ -36,6 +37,9 @@ app.register_blueprint(ocr_bp)
 from crawler import crawler_bp
 app.register_blueprint(crawler_bp)
 
+from activities import activities_bp
+app.register_blueprint(activities_bp)
+
 swagger=Swagger(app)
 
 # logger.debug('DEBUG logging test.')
@@ -52,3 +56,5 @@ if __name__ == "__main__":
     except (KeyboardInterrupt, SystemExit): # 에러 발생시 스케줄러 종료
         shutdown_scheduler() 
         logger.info("Scheduler shut down due to server stop.")
+    finally:
+        weaviate_client_manager.shutdown() # 공유 Weaviate 클라이언트 연결 종료
@@ -1,10 +1,9 @@
 import sqlite3
 import threading
 from os.path import join, dirname, abspath
-from typing import Union, Optional
+from typing import Union
 
 from langchain_openai import OpenAIEmbeddings
-from langchain_weaviate import WeaviateVectorStore
 from langgraph.checkpoint.sqlite import SqliteSaver
 from langgraph.graph.state import CompiledStateGraph
 
@@ -18,7 +17,6 @@ class Bot(LangGraphMethods, VectorStoreMethods, Tools, LangGraphNodes):
     _lock: threading.Lock = threading.Lock()
     SQLITE_CONNECTION_STRING: str = join(dirname(abspath(__file__)),
                                          f"chats.db")  # base.py와 같은 경로에 SQLITE memory file 생성
-    vectorstore:Optional[WeaviateVectorStore] = None
 
     def __new__(cls, user_id: bytes, *args, **kwargs):
         """
@@ -42,7 +40,6 @@ class Bot(LangGraphMethods, VectorStoreMethods, Tools, LangGraphNodes):
 
     def __init__(self, user_id:bytes):
         # 메모리 저장소 생성 (그래프에 사용되기 때문에, 반드시 그래프 생성 이전에 선행되어야 함)
-        # 챗봇이 호출될 때마다 Bot 클래스 속성인 vectorstore를 업데이트
         with Bot._lock:
             if hasattr(self, "_initialized"):
                 return
@@ -51,4 +48,5 @@ class Bot(LangGraphMethods, VectorStoreMethods, Tools, LangGraphNodes):
         self.id: bytes = user_id
         self.graph: CompiledStateGraph = self.build_graph()
 
-Bot.vectorstore = Bot.get_vectorstore()
\ No newline at end of file
+# 검색 도구가 사용하는 Weaviate 스키마를 서버 시작 시 한 번 등록한다. 클라이언트는 공유 클라이언트를 빌려 쓴다.
+Bot.ensure_schema()
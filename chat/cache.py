@@ -0,0 +1,206 @@
+"""TTL 기반 LRU 캐시 유틸리티 모듈.
+
+메모리 LRU 계층과, 선택적으로 SQLite 파일에 저장되는 디스크 계층으로 구성된다.
+프로세스가 재시작되어도 디스크 계층에 남아 있는 항목은 TTL이 지나기 전까지 재사용된다.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from server.logger import logger
+
+
+class TTLCache:
+    """항목별 TTL과 크기 제한을 가진 thread-safe LRU 캐시 클래스입니다.
+
+    Args:
+        name (str): 로그와 통계에 표시될 캐시 이름
+        maxsize (int): 메모리 계층에 유지할 최대 항목 수
+        ttl (float): 기본 항목 유효 시간(초)
+        sqlite_path (Optional[str]): 디스크 계층으로 사용할 SQLite 파일 경로. None이면 메모리 계층만 사용
+        max_disk_entries (int): 디스크 계층에 유지할 최대 항목 수
+    """
+
+    def __init__(self,
+                 name: str,
+                 maxsize: int = 256,
+                 ttl: float = 600.0,
+                 sqlite_path: Optional[str] = None,
+                 max_disk_entries: int = 10000):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: dict[str, int] = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+        self._connection: Optional[sqlite3.Connection] = None
+        if sqlite_path:
+            self._connection = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS `cache_entries` (
+                    `namespace` TEXT NOT NULL,
+                    `key` TEXT NOT NULL,
+                    `value` TEXT NOT NULL,
+                    `expires_at` REAL NOT NULL,
+                    `accessed_at` REAL NOT NULL,
+                    PRIMARY KEY (`namespace`, `key`)
+                )
+            """)
+            self._connection.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """캐시에서 값을 조회합니다. 만료되었거나 없는 경우 None을 반환합니다.
+
+        Args:
+            key (str): 캐시 키
+
+        Returns:
+            Optional[Any]: 캐시된 값
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return value
+                del self._entries[key]
+                self._stats["expirations"] += 1
+
+            if self._connection is not None:
+                row = self._connection.execute(
+                    "SELECT `value`, `expires_at` FROM `cache_entries` WHERE `namespace` = ? AND `key` = ?",
+                    (self.name, key)
+                ).fetchone()
+                if row is not None:
+                    value_json, expires_at = row
+                    if expires_at > now:
+                        value = json.loads(value_json)
+                        self._connection.execute(
+                            "UPDATE `cache_entries` SET `accessed_at` = ? WHERE `namespace` = ? AND `key` = ?",
+                            (now, self.name, key)
+                        )
+                        self._connection.commit()
+                        # 디스크에서 찾은 항목은 메모리 계층으로 다시 올린다.
+                        self._put_memory(key, value, expires_at)
+                        self._stats["disk_hits"] += 1
+                        return value
+                    self._connection.execute(
+                        "DELETE FROM `cache_entries` WHERE `namespace` = ? AND `key` = ?",
+                        (self.name, key)
+                    )
+                    self._connection.commit()
+                    self._stats["expirations"] += 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """캐시에 값을 저장합니다. 디스크 계층이 있으면 JSON으로 직렬화해서 함께 저장합니다.
+
+        Args:
+            key (str): 캐시 키
+            value (Any): 저장할 값. 디스크 계층을 사용할 경우 JSON 직렬화가 가능해야 한다.
+            ttl (Optional[float]): 항목별 유효 시간(초). None이면 기본값 사용
+        """
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._put_memory(key, value, expires_at)
+            self._stats["sets"] += 1
+
+            if self._connection is not None:
+                try:
+                    value_json = json.dumps(value, ensure_ascii=False, default=str)
+                except (TypeError, ValueError) as e:
+                    logger.warning(f"[{self.name}] 캐시 값을 디스크에 저장할 수 없습니다: {e}")
+                    return
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO `cache_entries` VALUES (?, ?, ?, ?, ?)",
+                    (self.name, key, value_json, expires_at, now)
+                )
+                self._prune_disk(now)
+                self._connection.commit()
+
+    def invalidate(self, key: str) -> None:
+        """지정한 키의 항목을 메모리와 디스크 계층에서 모두 삭제합니다."""
+        with self._lock:
+            self._entries.pop(key, None)
+            if self._connection is not None:
+                self._connection.execute(
+                    "DELETE FROM `cache_entries` WHERE `namespace` = ? AND `key` = ?",
+                    (self.name, key)
+                )
+                self._connection.commit()
+
+    def invalidate_prefix(self, prefix: str) -> int:
+        """prefix로 시작하는 키의 항목을 메모리와 디스크 계층에서 모두 삭제하고, 삭제한 메모리 항목 수를 반환합니다."""
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                del self._entries[key]
+            if self._connection is not None:
+                self._connection.execute(
+                    "DELETE FROM `cache_entries` WHERE `namespace` = ? AND substr(`key`, 1, ?) = ?",
+                    (self.name, len(prefix), prefix)
+                )
+                self._connection.commit()
+        return len(keys)
+
+    def clear(self) -> None:
+        """캐시의 모든 항목을 삭제합니다."""
+        with self._lock:
+            self._entries.clear()
+            if self._connection is not None:
+                self._connection.execute("DELETE FROM `cache_entries` WHERE `namespace` = ?", (self.name,))
+                self._connection.commit()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """캐시 통계(적중, 미스, 축출 횟수 등)와 적중률을 반환합니다."""
+        with self._lock:
+            stats: dict[str, Any] = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def _put_memory(self, key: str, value: Any, expires_at: float) -> None:
+        """메모리 계층에 항목을 넣고, 크기 제한을 넘으면 가장 오래 사용되지 않은 항목을 축출합니다.
+        호출하는 쪽에서 self._lock을 잡고 있어야 합니다."""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _prune_disk(self, now: float) -> None:
+        """디스크 계층에서 만료된 항목과 크기 제한을 넘는 오래된 항목을 삭제합니다.
+        호출하는 쪽에서 self._lock을 잡고 있어야 합니다."""
+        self._connection.execute(
+            "DELETE FROM `cache_entries` WHERE `namespace` = ? AND `expires_at` <= ?",
+            (self.name, now)
+        )
+        self._connection.execute("""
+            DELETE FROM `cache_entries`
+            WHERE `namespace` = ? AND `key` NOT IN (
+                SELECT `key` FROM `cache_entries`
+                WHERE `namespace` = ?
+                ORDER BY `accessed_at` DESC
+                LIMIT ?
+            )
+        """, (self.name, self.name, self.max_disk_entries))
@@ -1,4 +1,8 @@
 import os
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
 from langchain_openai import OpenAIEmbeddings
 
 from server.logger import logger
@@ -6,6 +10,7 @@ from server.logger import logger
 openai_dimension_size:int = 1536
 
 weaviate_index_name = "Activities"
+weaviate_archive_index_name = "ActivitiesArchive"  # 종료일이 지난 활동을 보관하는 컬렉션
 
 weaviate_headers={
     "X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY"),
@@ -22,3 +27,18 @@ logger.info("BAAI/bge-m3 모델 생성 완료.")
 def embed(text):
     return model.encode(text, normalize_embeddings=True)
 
+@lru_cache(maxsize=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048")))
+def embed_cached(text: str) -> tuple[float, ...]:
+    """검색 질의용 임베딩. 같은 문자열은 다시 계산하지 않도록 캐시한다."""
+    return tuple(embed(text).tolist())
+
+def embed_keywords(keywords: list[str]) -> Optional[list[float]]:
+    """키워드 리스트를 각각 임베딩한 뒤 평균 내고 다시 정규화한 벡터를 반환한다.
+    Weaviate의 near_text가 여러 concept을 하나의 벡터로 합치는 방식과 같다.
+    모든 키워드가 비어 있으면 None을 반환한다."""
+    vectors = np.array([embed_cached(" ".join(keyword.split())) for keyword in keywords if keyword.strip()])
+    if not len(vectors):
+        return None
+    mean = vectors.mean(axis=0)
+    norm = np.linalg.norm(mean)
+    return (mean / norm if norm else mean).tolist()
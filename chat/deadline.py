@@ -0,0 +1,131 @@
+"""챗봇 요청의 마감 시각(deadline)과 노드별 시간 예산을 관리하는 유틸리티 모듈.
+
+Bot.ask에서 RunnableConfig["configurable"]["deadline"]에 마감 시각을 넣고,
+각 노드와 도구는 이 모듈의 함수로 남은 시간과 자신의 예산을 계산한다.
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from server.logger import logger
+
+# 요청 하나에 허용되는 전체 시간(초)
+REQUEST_TIMEOUT = float(os.getenv("CHAT_REQUEST_TIMEOUT", "30"))
+
+# 노드별 최대 시간 예산(초). 실제 예산은 남은 시간과 비교해 더 작은 값이 된다.
+NODE_BUDGETS: dict[str, float] = {
+    "search_web": 4.0,
+    "tavily": 8.0,
+    "condense": 3.0,
+    "execute_search": 8.0,
+    "generate": 20.0,
+}
+
+# 답변 생성을 위해 항상 남겨 둘 시간(초). 검색 단계는 이 시간을 침범할 수 없다.
+GENERATE_RESERVE = 6.0
+
+# 남은 시간이 이보다 적으면 답변 생성을 시도하지 않고 즉시 대체 메시지를 반환한다.
+GENERATE_MIN_TIME = 1.0
+
+FALLBACK_MESSAGE = "죄송합니다. 응답 시간이 초과되어 답변을 생성하지 못했습니다. 잠시 후 다시 시도해 주세요."
+
+# 시간 제한이 필요한 작업을 실행하는 공용 스레드 풀.
+# 시간이 초과된 작업은 멈출 수 없으므로, 실제 작업 시간은 작업 안의 클라이언트 timeout(LLM, Weaviate 질의)으로 제한한다.
+EXECUTOR_WORKERS = int(os.getenv("CHAT_EXECUTOR_WORKERS", "16"))
+executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS, thread_name_prefix="chat-worker")
+
+# 시간이 초과되었지만 아직 실행 중인 작업. 이 수가 늘어나면 그만큼 풀의 스레드가 묶여 있다는 뜻이다.
+_abandoned: set[Future] = set()
+_abandoned_lock = threading.Lock()
+
+
+class DeadlineExceeded(TimeoutError):
+    """노드 또는 도구의 시간 예산이 초과되었을 때 발생하는 예외입니다."""
+
+
+def new_deadline(timeout: float = REQUEST_TIMEOUT) -> float:
+    """현재 시각으로부터 timeout초 뒤의 마감 시각을 반환합니다."""
+    return time.monotonic() + timeout
+
+
+def remaining_time(config: Optional[RunnableConfig]) -> Optional[float]:
+    """config에 설정된 마감 시각까지 남은 시간(초)을 반환합니다. 마감 시각이 없으면 None을 반환합니다."""
+    deadline = ((config or {}).get("configurable") or {}).get("deadline")
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+def time_until(deadline: Optional[float]) -> Optional[float]:
+    """new_deadline으로 만든 마감 시각까지 남은 시간(초)을 반환합니다. deadline이 None이면 None을 반환합니다."""
+    return None if deadline is None else max(deadline - time.monotonic(), 0.0)
+
+
+def node_budget(config: Optional[RunnableConfig], node_name: str) -> Optional[float]:
+    """노드의 시간 예산(초)을 계산합니다. 답변 생성 이전 노드는 GENERATE_RESERVE만큼을 남겨 둡니다.
+
+    Args:
+        config (Optional[RunnableConfig]): 런타임 설정
+        node_name (str): 노드 이름
+
+    Returns:
+        Optional[float]: 시간 예산. 마감 시각이 없으면 노드 최대 예산을 그대로 반환
+    """
+    budget = NODE_BUDGETS.get(node_name)
+    remaining = remaining_time(config)
+    if remaining is None:
+        return budget
+    if node_name != "generate":
+        remaining = max(remaining - GENERATE_RESERVE, 0.0)
+    return remaining if budget is None else min(budget, remaining)
+
+
+def run_with_deadline(func: Callable[..., Any], timeout: Optional[float], *args, **kwargs) -> Any:
+    """func를 공용 스레드 풀에서 실행하고, timeout초 안에 끝나지 않으면 DeadlineExceeded를 발생시킵니다.
+    시간이 초과된 작업은 백그라운드에서 끝까지 실행되지만, 그 결과는 버려집니다.
+
+    Args:
+        func (Callable[..., Any]): 실행할 함수
+        timeout (Optional[float]): 시간 제한(초). None이면 제한 없이 실행
+
+    Returns:
+        Any: func의 반환값
+    """
+    if timeout is None:
+        return func(*args, **kwargs)
+    if timeout <= 0:
+        raise DeadlineExceeded(f"{getattr(func, '__name__', func)}: no time budget left")
+
+    future = executor.submit(func, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        if not future.cancel():
+            _track_abandoned(future)
+        raise DeadlineExceeded(f"{getattr(func, '__name__', func)}: exceeded {timeout:.2f}s budget")
+
+
+def _track_abandoned(future: Future) -> None:
+    """시간이 초과되었지만 이미 실행 중이라 취소할 수 없는 작업을 끝날 때까지 기록합니다."""
+    def release(done: Future) -> None:
+        with _abandoned_lock:
+            _abandoned.discard(done)
+
+    with _abandoned_lock:
+        _abandoned.add(future)
+        abandoned = len(_abandoned)
+    future.add_done_callback(release)
+    if abandoned >= EXECUTOR_WORKERS // 2:
+        logger.error(f"시간이 초과된 작업 {abandoned}개가 chat-worker 스레드 {EXECUTOR_WORKERS}개 중 일부를 점유하고 있습니다.")
+    else:
+        logger.warning(f"시간이 초과된 작업이 백그라운드에서 계속 실행 중입니다. (현재 {abandoned}개)")
+
+
+def executor_stats() -> dict[str, int]:
+    """공용 스레드 풀의 크기와, 시간이 초과되었지만 아직 실행 중인 작업 수를 반환합니다."""
+    with _abandoned_lock:
+        return {"workers": EXECUTOR_WORKERS, "abandoned": len(_abandoned)}
@@ -0,0 +1,193 @@
+"""추천 검색 엔진 모듈.
+
+retrieve_by_* 도구는 RetrievalEngine 인터페이스로만 벡터 검색을 수행하므로,
+환경변수 RETRIEVAL_ENGINE으로 Weaviate Cloud(weaviate)와 프로세스 내 로컬 인덱스(local) 중 하나를 고를 수 있다.
+"""
+import os
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Callable, Literal, Optional
+
+from weaviate.classes.query import Filter
+
+from server.logger import logger
+from .constants import weaviate_index_name
+from .local_index import LocalVectorIndex
+from .vectorstore import RETRIEVAL_PROPERTIES, is_live_activity
+from .weaviate import WeaviateClientContext
+
+RETRIEVAL_ENGINE: Literal["weaviate", "local"] = os.getenv("RETRIEVAL_ENGINE", "weaviate")
+
+# 이미 리뷰한 활동 제외 방식 설정.
+# 리뷰 수가 EXCLUSION_FILTER_MAX_IDS 이하이면 not_equal 절을 AND로 묶은 필터로 Weaviate에서 제외하고,
+# 그보다 많으면 필터 없이 limit + k개를 더 가져온 뒤 클라이언트에서 집합 연산으로 제외하고,
+# 제외 후 limit개가 남지 않으면 offset으로 다음 페이지를 더 가져온다(fetch_until_filled).
+EXCLUSION_FILTER_MAX_IDS = int(os.getenv("EXCLUSION_FILTER_MAX_IDS", "100"))
+EXCLUSION_OVERFETCH_MAX = int(os.getenv("EXCLUSION_OVERFETCH_MAX", "200"))  # 추가로 가져올 최대 개수(k)
+
+# 종료일이 없는 활동은 end_date 범위 필터에 걸리지 않으므로(null 상태를 색인하지 않음), 종료 여부는 클라이언트에서 거른다.
+# 종료된 활동은 동기화 때마다 아카이브로 옮겨지므로, 다음 동기화 전까지 새로 종료된 활동 수만큼만 여유 있게 가져오면 된다.
+ENDED_OVERFETCH = int(os.getenv("ENDED_OVERFETCH", "10"))
+
+# Weaviate는 offset + limit가 QUERY_MAXIMUM_RESULTS(기본 10000)를 넘는 결과는 반환하지 않는다.
+QUERY_MAXIMUM_RESULTS = int(os.getenv("QUERY_MAXIMUM_RESULTS", "10000"))
+
+
+def plan_exclusion(history_ids: list[bytes], limit: int) -> tuple[Optional[Filter], int, set[str]]:
+    """사용자가 이미 리뷰한 활동을 제외하는 방식을 리뷰 수에 따라 결정합니다.
+
+    Args:
+        history_ids (list[bytes]): 사용자가 리뷰한 activity_id 목록
+        limit (int): 최종적으로 필요한 결과 수
+
+    Returns:
+        tuple[Optional[Filter], int, set[str]]: (Weaviate 필터, 질의에 사용할 limit, 클라이언트에서 제외할 activity_id 집합)
+    """
+    # Weaviate에 저장된 activity_id는 16진수 문자열이므로 hex()로 변환
+    excluded_ids = {activity_id.hex() for activity_id in history_ids if activity_id and isinstance(activity_id, bytes)}
+    if not excluded_ids:
+        return None, limit, set()
+
+    if len(excluded_ids) <= EXCLUSION_FILTER_MAX_IDS:
+        # weaviate-client 4.14에는 contains_none이 없으므로 not_equal 절을 리뷰 수만큼 AND로 묶는다.
+        return Filter.all_of([
+            Filter.by_property("activity_id").not_equal(activity_id) for activity_id in sorted(excluded_ids)
+        ]), limit, set()
+
+    # 리뷰가 매우 많으면 필터 트리가 커져 질의가 느려지므로, 더 많이 가져와서 클라이언트에서 거른다.
+    overfetch = min(len(excluded_ids), EXCLUSION_OVERFETCH_MAX)
+    logger.debug(f"리뷰 {len(excluded_ids)}개: 필터 대신 {limit + overfetch}개를 가져와 클라이언트에서 제외합니다.")
+    return None, limit + overfetch, excluded_ids
+
+
+def fetch_until_filled(query: Callable[[int, int], list], limit: int, page_size: int,
+                       keep: Callable[[Any], bool]) -> list:
+    """query(limit, offset)로 page_size개씩 가져오면서 keep을 통과한 객체가 limit개 모이거나 결과가 끝날 때까지 다음 페이지를 가져옵니다.
+    리뷰한 활동이나 종료된 활동을 클라이언트에서 거르면, 한 페이지만으로는 limit개가 남지 않을 수 있기 때문입니다.
+
+    Args:
+        query (Callable[[int, int], list]): limit과 offset을 받아 유사도 순으로 정렬된 객체 리스트를 반환하는 함수
+        limit (int): 필요한 결과 수
+        page_size (int): 한 번에 가져올 객체 수
+        keep (Callable[[Any], bool]): 결과에 포함할 객체이면 True를 반환하는 함수
+
+    Returns:
+        list: keep을 통과한 객체 최대 limit개, 유사도 순
+    """
+    results, offset, pages = [], 0, 0
+    while len(results) < limit and offset < QUERY_MAXIMUM_RESULTS:
+        page_limit = min(page_size, QUERY_MAXIMUM_RESULTS - offset)
+        page = query(page_limit, offset)
+        pages += 1
+        results.extend(obj for obj in page if keep(obj))
+        if len(page) < page_limit:
+            break
+        offset += page_limit
+    if pages > 1:
+        logger.debug(f"클라이언트 제외 후 {limit}개를 채우기 위해 {pages}페이지를 가져왔습니다.")
+    return results[:limit]
+
+
+class RetrievalEngine(ABC):
+    """벡터 검색 엔진의 공통 인터페이스입니다."""
+    name: str = ""
+
+    @abstractmethod
+    def search(self,
+               vector: list[float],
+               limit: int,
+               history_ids: Optional[list[bytes]] = None,
+               activity_types: Optional[list[str]] = None,
+               ends_after: Optional[datetime] = None,
+               starts_before: Optional[datetime] = None,
+               starts_after: Optional[datetime] = None) -> list:
+        """질의 벡터와 가까운 활동을 최대 limit개 반환합니다. 사용자가 리뷰한 활동은 제외합니다.
+
+        Args:
+            vector (list[float]): 질의 벡터
+            limit (int): 반환할 최대 활동 수
+            history_ids (Optional[list[bytes]]): 제외할(사용자가 리뷰한) activity_id 목록
+            activity_types (Optional[list[str]]): 허용할 activity_type 목록
+            ends_after (Optional[datetime]): 이 시각 이후에 끝나는(또는 종료일이 없는) 활동만 검색
+            starts_before (Optional[datetime]): 이 시각 이전에 시작하는 활동만 검색 (시작일이 없는 활동은 제외)
+            starts_after (Optional[datetime]): 이 시각 이후에 시작하는 활동만 검색 (시작일이 없는 활동은 제외)
+
+        Returns:
+            list: 유사도 순으로 정렬된 Weaviate 객체 또는 속성 dict 리스트
+        """
+
+
+class WeaviateEngine(RetrievalEngine):
+    """Weaviate 컬렉션의 near_vector 질의로 검색하는 엔진입니다."""
+    name = "weaviate"
+
+    def search(self, vector, limit, history_ids=None, activity_types=None, ends_after=None, starts_before=None,
+               starts_after=None):
+        exclusion_filter, query_limit, excluded_ids = plan_exclusion(history_ids or [], limit)
+        if ends_after is not None:
+            query_limit += ENDED_OVERFETCH
+        # 종료일과 달리 유형과 시작일은 Weaviate 필터로 거른다. (시작일이 없는 활동은 범위 필터에 걸리지 않아 제외된다)
+        filters = [exclusion_filter] if exclusion_filter is not None else []
+        if activity_types:
+            filters.append(Filter.by_property("activity_type").contains_any(activity_types))
+        if starts_before is not None:
+            filters.append(Filter.by_property("start_date").less_or_equal(starts_before))
+        if starts_after is not None:
+            filters.append(Filter.by_property("start_date").greater_or_equal(starts_after))
+        query_filter = Filter.all_of(filters) if filters else None
+
+        with WeaviateClientContext() as client:
+            collection = client.collections.get(weaviate_index_name)
+            return fetch_until_filled(
+                lambda page_limit, offset: collection.query.near_vector(
+                    near_vector=vector,
+                    filters=query_filter,
+                    limit=page_limit,
+                    offset=offset,
+                    return_properties=RETRIEVAL_PROPERTIES,
+                    include_vector=False,
+                ).objects,
+                limit, query_limit,
+                keep=lambda obj: obj.properties.get("activity_id") not in excluded_ids
+                and (ends_after is None or is_live_activity(obj.properties, ends_after)),
+            )
+
+
+class LocalEngine(RetrievalEngine):
+    """프로세스 내 로컬 벡터 인덱스(LocalVectorIndex)로 검색하는 엔진입니다. 네트워크를 사용하지 않습니다."""
+    name = "local"
+
+    def __init__(self, index: Optional[LocalVectorIndex] = None):
+        self.index = index or LocalVectorIndex()
+
+    def search(self, vector, limit, history_ids=None, activity_types=None, ends_after=None, starts_before=None,
+               starts_after=None):
+        excluded_ids = {aid.hex() for aid in history_ids or [] if aid and isinstance(aid, bytes)}
+        return self.index.search(vector, limit,
+                                 excluded_ids=excluded_ids,
+                                 activity_types=activity_types,
+                                 ends_after=ends_after,
+                                 starts_before=starts_before,
+                                 starts_after=starts_after)
+
+
+_engine: Optional[RetrievalEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_retrieval_engine() -> RetrievalEngine:
+    """RETRIEVAL_ENGINE 설정에 맞는 검색 엔진을 반환합니다. 엔진은 처음 사용할 때 한 번만 만듭니다."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = LocalEngine() if RETRIEVAL_ENGINE == "local" else WeaviateEngine()
+            logger.info(f"검색 엔진: {_engine.name}")
+        return _engine
+
+
+def update_local_index() -> None:
+    """로컬 검색 엔진을 사용 중이면 MySQL의 변경 사항을 로컬 인덱스에 반영합니다."""
+    engine = get_retrieval_engine()
+    if isinstance(engine, LocalEngine):
+        engine.index.update_from_mysql()
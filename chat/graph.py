@@ -12,6 +12,7 @@ from langgraph.graph.message import add_messages
 from langgraph.graph.state import CompiledStateGraph
 
 from server.logger import logger
+from .deadline import new_deadline
 
 load_dotenv()
 
@@ -37,9 +38,10 @@ class LangGraphMethods:
 
         workflow.add_node("ask_question", self.ask_question)
         workflow.add_node("search_web", self.search_web)
-        workflow.add_node("tavily", self.tavily_search_tool_node)
+        workflow.add_node("tavily", self.tavily)
+        workflow.add_node("condense", self.condense)
         retrieve_by_keyword, retrieve_by_history = self.build_retriever_tool()
-        workflow.add_node("execute_search", lambda state: self.execute_search(state, retrieve_by_keyword, retrieve_by_history))
+        workflow.add_node("execute_search", lambda state, config: self.execute_search(state, config, retrieve_by_keyword, retrieve_by_history))
         workflow.add_node("generate", self.generate)
 
         workflow.set_entry_point("ask_question")
@@ -55,8 +57,17 @@ class LangGraphMethods:
                 "others": "generate",
             }
         )
-        workflow.add_edge("search_web", "tavily")
-        workflow.add_edge("tavily", "generate")
+        # 검색 질의 생성에 실패하면(시간 초과 등) 웹 검색 없이 바로 답변 생성
+        workflow.add_conditional_edges(
+            "search_web",
+            self.route_web_search,
+            {
+                "tavily": "tavily",
+                "generate": "generate",
+            }
+        )
+        workflow.add_edge("tavily", "condense")
+        workflow.add_edge("condense", "generate")
         workflow.add_edge("execute_search", "generate")
         workflow.set_finish_point("generate")
 
@@ -70,9 +81,10 @@ class LangGraphMethods:
                 ("user", question)
             ]
         }
-        # config 설정(재귀 최대 횟수, thread_id)
+        # config 설정(재귀 최대 횟수, thread_id, 요청 마감 시각)
         config = RunnableConfig(recursion_limit=10, configurable={"thread_id": self.id,
-                                                                  "question_type": question_type})
+                                                                  "question_type": question_type,
+                                                                  "deadline": new_deadline()})
 
         # RecursionError에 대비해서 미리 상태 백업
         saved_state = self.graph.get_state(config)
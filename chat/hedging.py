@@ -0,0 +1,157 @@
+"""LLM 호출의 꼬리 지연(tail latency)을 줄이기 위한 hedged request 유틸리티 모듈.
+
+호출이 최근 지연 시간의 특정 백분위수(HEDGE_PERCENTILE)까지 끝나지 않으면 같은 요청을 한 번 더 보내고,
+먼저 성공한 응답을 사용한 뒤 나머지 요청은 취소한다.
+불필요한 중복 호출로 비용이 커지지 않도록, 최근 호출 중 hedge된 비율이 HEDGE_MAX_RATE를 넘지 않게 제한한다.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+import numpy as np
+
+from server.logger import logger
+
+HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))   # hedge를 보낼 지연 시간 백분위수
+HEDGE_MAX_RATE = float(os.getenv("LLM_HEDGE_MAX_RATE", "0.1"))      # 최근 호출 중 hedge 허용 비율
+HEDGE_MIN_SAMPLES = 20      # 백분위수를 신뢰할 수 있는 최소 표본 수. 그 전에는 hedge하지 않는다.
+LATENCY_WINDOW = 200        # 모델별로 유지할 최근 지연 시간 표본 수
+
+
+class LatencyTracker:
+    """모델별 최근 지연 시간을 기록하고 백분위수를 계산하는 thread-safe 클래스입니다."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._samples: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_name: str, latency: float) -> None:
+        """모델의 지연 시간(초)을 기록합니다."""
+        with self._lock:
+            self._samples.setdefault(model_name, deque(maxlen=self.window)).append(latency)
+
+    def percentile(self, model_name: str, q: float) -> Optional[float]:
+        """모델의 최근 지연 시간 q 백분위수를 반환합니다. 표본이 부족하면 None을 반환합니다."""
+        with self._lock:
+            samples = list(self._samples.get(model_name, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return float(np.percentile(samples, q))
+
+
+class HedgeBudget:
+    """최근 호출 중 hedge된 호출의 비율이 max_rate를 넘지 않도록 제한하는 thread-safe 클래스입니다."""
+
+    def __init__(self, max_rate: float = HEDGE_MAX_RATE, window: int = LATENCY_WINDOW):
+        self.max_rate = max_rate
+        # 호출마다 [hedge 여부] 한 칸짜리 리스트를 기록한다. 동시에 진행 중인 호출이 많아도
+        # try_acquire가 자기 호출의 기록만 바꿀 수 있도록 record_call이 이 리스트를 돌려준다.
+        self._calls: deque[list[bool]] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record_call(self) -> list[bool]:
+        """hedge되지 않은 호출 하나를 기록하고, try_acquire에 넘길 호출 기록을 반환합니다."""
+        entry = [False]
+        with self._lock:
+            self._calls.append(entry)
+        return entry
+
+    def try_acquire(self, entry: list[bool]) -> bool:
+        """hedge가 허용되면 entry의 호출을 hedge된 것으로 표시하고 True를 반환합니다.
+
+        Args:
+            entry (list[bool]): record_call이 반환한 호출 기록
+        """
+        with self._lock:
+            if not self._calls or entry[0]:
+                return False
+            hedged = sum(call[0] for call in self._calls)
+            if (hedged + 1) / len(self._calls) > self.max_rate:
+                return False
+            entry[0] = True
+            return True
+
+    @property
+    def hedged_rate(self) -> float:
+        """최근 호출 중 hedge된 호출의 비율을 반환합니다."""
+        with self._lock:
+            return sum(call[0] for call in self._calls) / len(self._calls) if self._calls else 0.0
+
+
+latency_tracker = LatencyTracker()
+hedge_budget = HedgeBudget()
+
+# hedged request를 실행하는 프로세스 공용 이벤트 루프.
+# 호출마다 asyncio.run으로 루프를 새로 만들면 비동기 HTTP 클라이언트의 연결을 재사용할 수 없고,
+# 이미 실행 중인 루프가 있는 스레드에서는 호출할 수도 없으므로, 별도 스레드에서 하나의 루프를 계속 실행한다.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_hedge_loop() -> asyncio.AbstractEventLoop:
+    """hedged request용 백그라운드 이벤트 루프를 반환합니다. 처음 호출할 때 루프 스레드를 시작합니다."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-hedge-loop", daemon=True).start()
+        return _loop
+
+
+async def _hedged_call(call: Callable[[], Awaitable[Any]], model_name: str) -> Any:
+    """call을 실행하고, 지연되면 한 번 더 실행해서 먼저 성공한 결과를 반환합니다."""
+    budget_entry = hedge_budget.record_call()
+    delay = latency_tracker.percentile(model_name, HEDGE_PERCENTILE)
+
+    started: dict[asyncio.Task, float] = {}
+
+    def launch() -> asyncio.Task:
+        task = asyncio.ensure_future(call())
+        started[task] = time.perf_counter()
+        return task
+
+    tasks = {launch()}
+    if delay is not None:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done and hedge_budget.try_acquire(budget_entry):
+            logger.info(f"[hedge] {model_name} 응답이 p{HEDGE_PERCENTILE:g}({delay:.2f}s)를 넘어 중복 요청을 보냅니다.")
+            tasks.add(launch())
+
+    last_error: Optional[BaseException] = None
+    while tasks:
+        done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                # 먼저 성공한 응답을 사용하고 나머지 요청은 취소한다.
+                for pending in tasks:
+                    pending.cancel()
+                latency_tracker.record(model_name, time.perf_counter() - started[task])
+                return task.result()
+            last_error = task.exception()
+    raise last_error
+
+
+def hedged_invoke(runnable, inputs: Any, model_name: str) -> Any:
+    """runnable.ainvoke(inputs)를 hedged request로 실행합니다.
+
+    Args:
+        runnable: ainvoke를 지원하는 LangChain Runnable (체인 또는 모델)
+        inputs (Any): runnable 입력값
+        model_name (str): 지연 시간을 추적할 모델 이름
+
+    Returns:
+        Any: runnable의 응답
+    """
+    if not HEDGE_ENABLED:
+        start = time.perf_counter()
+        response = runnable.invoke(inputs)
+        latency_tracker.record(model_name, time.perf_counter() - start)
+        return response
+    future = asyncio.run_coroutine_threadsafe(_hedged_call(lambda: runnable.ainvoke(inputs), model_name),
+                                              get_hedge_loop())
+    return future.result()
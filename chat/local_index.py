@@ -0,0 +1,329 @@
+"""Weaviate 없이 프로세스 안에서 검색할 수 있는 로컬 벡터 인덱스 모듈.
+
+bge-m3 벡터를 디스크의 float32 파일에 저장하고 memory-map으로 읽는다.
+벡터는 IVF(inverted file) 방식으로 k-means 클러스터에 나눠 담고, 질의 시에는 가까운 클러스터(nprobe개)만 검색한다.
+활동 수가 IVF_MIN_ROWS보다 적으면 전체를 brute-force로 검색한다.
+MySQL의 activities 테이블과 비교해서 새 활동은 추가하고, 내용 해시(CONTENT_HASH_SQL)가 바뀐 활동은 같은 행에 다시 임베딩하며,
+삭제된 활동은 표시만 해서 검색에서 제외한다. 다시 나타난 활동은 삭제 표시를 해제한다.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, date, timezone
+from os.path import join, dirname, abspath
+from typing import Any, Optional
+
+import numpy as np
+
+from server.db import run_query
+from server.logger import logger
+from .constants import model
+from .vectorstore import CONTENT_HASH_SQL, LIVE_ACTIVITY_SQL, RETRIEVAL_PROPERTIES, get_metadata
+
+LOCAL_INDEX_DIR: str = os.getenv("LOCAL_INDEX_DIR", join(dirname(abspath(__file__)), "local_index"))
+IVF_MIN_ROWS = 50000        # 이보다 활동 수가 적으면 클러스터 없이 전체를 검색한다.
+IVF_NPROBE = int(os.getenv("LOCAL_INDEX_NPROBE", "8"))  # 질의 시 검색할 클러스터 수
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_SIZE = 50000  # k-means 학습에 사용할 최대 표본 수
+UPDATE_CHUNK_SIZE = 256     # MySQL에서 한 번에 읽고 임베딩할 활동 수
+ASSIGN_BLOCK_SIZE = 8192    # 클러스터 배정 시 한 번에 처리할 벡터 수
+
+
+def _to_timestamp(value: Any) -> float:
+    """날짜 값을 epoch 초로 변환합니다. 값이 없으면 NaN을 반환합니다."""
+    if value is None or value == "":
+        return float("nan")
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class LocalVectorIndex:
+    """memory-map된 float32 벡터 파일과 SQLite 메타데이터로 구성된 IVF 벡터 인덱스 클래스입니다.
+
+    Args:
+        directory (str): 인덱스 파일을 저장할 디렉토리
+    """
+
+    def __init__(self, directory: str = LOCAL_INDEX_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._vectors_path = join(directory, "vectors.f32")
+        self._centroids_path = join(directory, "centroids.npy")
+        self.dimension: int = model.get_sentence_embedding_dimension()
+        self._lock = threading.Lock()
+
+        self._connection = sqlite3.connect(join(directory, "meta.db"), check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS `rows` (
+                `row` INTEGER PRIMARY KEY,
+                `activity_id` TEXT UNIQUE NOT NULL,
+                `properties` TEXT NOT NULL,
+                `activity_type` TEXT,
+                `start_ts` REAL,
+                `end_ts` REAL,
+                `list_id` INTEGER NOT NULL DEFAULT -1,
+                `deleted` INTEGER NOT NULL DEFAULT 0,
+                `content_hash` TEXT
+            )
+        """)
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(`rows`)")}
+        if "content_hash" not in columns:
+            # content_hash 이전에 만든 인덱스. 해시가 없는 행은 다음 갱신 때 한 번 다시 임베딩된다.
+            self._connection.execute("ALTER TABLE `rows` ADD COLUMN `content_hash` TEXT")
+        self._connection.commit()
+        self._load()
+
+    # ----- 로드 및 저장 -----
+    def _load(self) -> None:
+        """SQLite 메타데이터와 벡터 파일로부터 메모리 상의 배열을 다시 만듭니다."""
+        rows = self._connection.execute(
+            "SELECT `activity_id`, `activity_type`, `start_ts`, `end_ts`, `list_id`, `deleted`, `content_hash` "
+            "FROM `rows` ORDER BY `row`"
+        ).fetchall()
+        self.activity_ids: list[str] = [r[0] for r in rows]
+        self.row_of: dict[str, int] = {aid: i for i, aid in enumerate(self.activity_ids)}
+        self.activity_types = np.array([r[1] or "" for r in rows], dtype=object)
+        self.start_ts = np.array([r[2] if r[2] is not None else np.nan for r in rows], dtype=np.float64)
+        self.end_ts = np.array([r[3] if r[3] is not None else np.nan for r in rows], dtype=np.float64)
+        self.list_ids = np.array([r[4] for r in rows], dtype=np.int32)
+        self.deleted = np.array([bool(r[5]) for r in rows], dtype=bool)
+        self.content_hashes: list[Optional[str]] = [r[6] for r in rows]
+
+        self._next_row = len(rows)
+
+        self.vectors: Optional[np.memmap] = None
+        if rows and os.path.exists(self._vectors_path):
+            expected_size = len(rows) * self.dimension * 4
+            if os.path.getsize(self._vectors_path) > expected_size:
+                # 벡터를 쓴 뒤 메타데이터를 저장하기 전에 중단된 경우, 메타데이터가 없는 꼬리 부분을 잘라낸다.
+                os.truncate(self._vectors_path, expected_size)
+            self.vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(len(rows), self.dimension))
+        self.centroids: Optional[np.ndarray] = np.load(self._centroids_path) if os.path.exists(self._centroids_path) else None
+
+    def __len__(self) -> int:
+        return len(self.activity_ids)
+
+    @staticmethod
+    def _metadata_row(activity_id: str, properties: dict, content_hash: Optional[str], list_id: int) -> tuple:
+        return (activity_id, json.dumps(properties, ensure_ascii=False),
+                properties.get("activity_type"),
+                None if np.isnan(ts := _to_timestamp(properties.get("start_date"))) else ts,
+                None if np.isnan(te := _to_timestamp(properties.get("end_date"))) else te,
+                list_id, content_hash)
+
+    def _append(self, records: list[tuple[str, dict, np.ndarray, Optional[str]]]) -> None:
+        """새 활동의 벡터를 벡터 파일 끝에 붙이고 메타데이터를 저장합니다. self._lock을 잡은 상태에서 호출해야 합니다."""
+        vectors = np.asarray([record[2] for record in records], dtype=np.float32)
+        list_ids = self._assign(vectors) if self.centroids is not None else np.full(len(records), -1, dtype=np.int32)
+        with open(self._vectors_path, "ab") as f:
+            f.write(vectors.tobytes())
+
+        start_row = self._next_row
+        self._connection.executemany(
+            "INSERT INTO `rows` (`row`, `activity_id`, `properties`, `activity_type`, `start_ts`, `end_ts`, `list_id`, "
+            "`content_hash`) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (start_row + i, *self._metadata_row(activity_id, properties, content_hash, int(list_ids[i])))
+                for i, (activity_id, properties, _, content_hash) in enumerate(records)
+            ]
+        )
+        self._connection.commit()
+        self._next_row += len(records)
+
+    def _overwrite(self, records: list[tuple[str, dict, np.ndarray, Optional[str]]]) -> None:
+        """수정된 활동의 벡터와 메타데이터를 기존 행에 덮어쓰고 삭제 표시를 해제합니다.
+        self._lock을 잡은 상태에서 호출해야 합니다."""
+        vectors = np.asarray([record[2] for record in records], dtype=np.float32)
+        list_ids = self._assign(vectors) if self.centroids is not None else np.full(len(records), -1, dtype=np.int32)
+        row_size = self.dimension * 4
+        with open(self._vectors_path, "r+b") as f:
+            for (activity_id, *_), vector in zip(records, vectors):
+                f.seek(self.row_of[activity_id] * row_size)
+                f.write(vector.tobytes())
+
+        self._connection.executemany(
+            "UPDATE `rows` SET `activity_id` = ?, `properties` = ?, `activity_type` = ?, `start_ts` = ?, `end_ts` = ?, "
+            "`list_id` = ?, `content_hash` = ?, `deleted` = 0 WHERE `row` = ?",
+            [
+                (*self._metadata_row(activity_id, properties, content_hash, int(list_ids[i])), self.row_of[activity_id])
+                for i, (activity_id, properties, _, content_hash) in enumerate(records)
+            ]
+        )
+        self._connection.commit()
+
+    # ----- IVF -----
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        """벡터마다 가장 가까운 클러스터 번호를 반환합니다."""
+        result = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), ASSIGN_BLOCK_SIZE):
+            block = np.asarray(vectors[start:start + ASSIGN_BLOCK_SIZE])
+            result[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        return result
+
+    def train(self) -> None:
+        """전체 벡터로 spherical k-means를 학습하고 모든 행의 클러스터를 다시 배정합니다."""
+        with self._lock:
+            n_rows = len(self)
+            if n_rows < IVF_MIN_ROWS or self.vectors is None:
+                return
+            n_lists = int(np.sqrt(n_rows))
+            rng = np.random.default_rng(0)
+            sample = np.asarray(self.vectors[np.sort(rng.choice(n_rows, min(n_rows, KMEANS_SAMPLE_SIZE), replace=False))])
+            centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+            for _ in range(KMEANS_ITERATIONS):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                for c in range(n_lists):
+                    members = sample[labels == c]
+                    if len(members):
+                        centroids[c] = members.mean(axis=0)
+                centroids = _normalize_rows(centroids)
+
+            self.centroids = centroids.astype(np.float32)
+            np.save(self._centroids_path, self.centroids)
+            self.list_ids = self._assign(self.vectors)
+            self._connection.executemany("UPDATE `rows` SET `list_id` = ? WHERE `row` = ?",
+                                         [(int(l), i) for i, l in enumerate(self.list_ids)])
+            self._connection.commit()
+            logger.info(f"로컬 인덱스 IVF 학습 완료: {n_rows}개 벡터, {n_lists}개 클러스터")
+
+    # ----- 갱신 -----
+    def update_from_mysql(self) -> dict[str, int]:
+        """MySQL activities 테이블과 비교해서 로컬 인덱스를 갱신합니다.
+
+        새 활동은 임베딩해서 추가하고, 내용 해시가 바뀐 활동은 같은 행에 다시 임베딩합니다.
+        사라지거나 종료된 활동은 삭제 표시하고, 삭제 표시된 활동이 다시 나타나면 표시를 해제합니다.
+
+        Returns:
+            dict[str, int]: 추가/수정/복원/삭제된 활동 수
+        """
+        start = time.perf_counter()
+        mysql_hashes = {
+            row['activity_id'].hex(): row['content_hash']
+            for row in run_query(f"SELECT activity_id, {CONTENT_HASH_SQL} AS content_hash FROM activities WHERE {LIVE_ACTIVITY_SQL}")
+        }
+        missing = [aid for aid in mysql_hashes if aid not in self.row_of]
+        changed = [aid for aid, content_hash in mysql_hashes.items()
+                   if aid in self.row_of and self.content_hashes[self.row_of[aid]] != content_hash]
+        # 내용은 그대로인데 삭제 표시만 되어 있는 활동(종료일 연장, 일시적인 삭제 후 복원 등)은 다시 임베딩하지 않는다.
+        restored = [aid for aid, content_hash in mysql_hashes.items()
+                    if aid in self.row_of and self.deleted[self.row_of[aid]]
+                    and self.content_hashes[self.row_of[aid]] == content_hash]
+        removed = [aid for aid, row in self.row_of.items() if aid not in mysql_hashes and not self.deleted[row]]
+
+        counts = {"added": 0, "updated": 0}
+        for kind, activity_ids in [("added", missing), ("updated", changed)]:
+            for chunk_start in range(0, len(activity_ids), UPDATE_CHUNK_SIZE):
+                chunk = [bytes.fromhex(aid) for aid in activity_ids[chunk_start:chunk_start + UPDATE_CHUNK_SIZE]]
+                rows = run_query(
+                    f"SELECT *, {CONTENT_HASH_SQL} AS content_hash FROM activities "
+                    f"WHERE activity_id IN ({', '.join(['%s'] * len(chunk))})", tuple(chunk)
+                )
+                rows = [row for row in rows if row.get('activity_content')]
+                if not rows:
+                    continue
+                vectors = model.encode([str(row['activity_content']) for row in rows], normalize_embeddings=True, batch_size=32)
+                records = []
+                for row, vector in zip(rows, vectors):
+                    metadata = get_metadata(row)
+                    properties = {key: metadata.get(key) for key in RETRIEVAL_PROPERTIES}
+                    records.append((metadata["activity_id"], properties, vector, row['content_hash']))
+                with self._lock:
+                    if kind == "added":
+                        self._append(records)
+                    else:
+                        self._overwrite(records)
+                counts[kind] += len(records)
+
+        with self._lock:
+            if removed or restored:
+                self._connection.executemany("UPDATE `rows` SET `deleted` = ? WHERE `activity_id` = ?",
+                                             [(1, aid) for aid in removed] + [(0, aid) for aid in restored])
+                self._connection.commit()
+            # 변경이 끝난 뒤 한 번만 메모리 상의 배열과 memory-map을 다시 만든다.
+            self._load()
+
+        # 클러스터가 없는데 충분히 커졌거나, 마지막 학습 이후 크기가 두 배가 되면 다시 학습한다.
+        n_lists = len(self.centroids) if self.centroids is not None else 0
+        if len(self) >= IVF_MIN_ROWS and (n_lists == 0 or len(self) > 2 * n_lists ** 2):
+            self.train()
+
+        logger.info(f"로컬 인덱스 갱신: {counts['added']}개 추가, {counts['updated']}개 수정, {len(restored)}개 복원, "
+                    f"{len(removed)}개 삭제, 총 {len(self)}개 ({time.perf_counter() - start:.1f}s)")
+        return {**counts, "restored": len(restored), "deleted": len(removed)}
+
+    # ----- 검색 -----
+    def search(self,
+               vector: list[float],
+               limit: int,
+               excluded_ids: Optional[set[str]] = None,
+               activity_types: Optional[list[str]] = None,
+               ends_after: Optional[datetime] = None,
+               starts_before: Optional[datetime] = None,
+               starts_after: Optional[datetime] = None) -> list[dict]:
+        """질의 벡터와 코사인 유사도가 높은 활동을 속성 필터를 적용해서 limit개 반환합니다.
+
+        Args:
+            vector (list[float]): 정규화된 질의 벡터
+            limit (int): 반환할 최대 활동 수
+            excluded_ids (Optional[set[str]]): 제외할 activity_id 집합
+            activity_types (Optional[list[str]]): 허용할 activity_type 목록
+            ends_after (Optional[datetime]): 이 시각 이후에 끝나는(또는 종료일이 없는) 활동만 검색
+            starts_before (Optional[datetime]): 이 시각 이전에 시작하는 활동만 검색 (시작일이 없는 활동은 제외)
+            starts_after (Optional[datetime]): 이 시각 이후에 시작하는 활동만 검색 (시작일이 없는 활동은 제외)
+
+        Returns:
+            list[dict]: 유사도 순으로 정렬된 활동 속성 dict 리스트
+        """
+        with self._lock:
+            vectors, centroids, list_ids = self.vectors, self.centroids, self.list_ids
+            mask = ~self.deleted
+            if activity_types:
+                mask &= np.isin(self.activity_types, activity_types)
+            if ends_after is not None:
+                mask &= ~(self.end_ts < _to_timestamp(ends_after))
+            # NaN과의 비교는 항상 False이므로 시작일이 없는 활동은 Weaviate의 범위 필터와 같이 제외된다.
+            if starts_before is not None:
+                mask &= self.start_ts <= _to_timestamp(starts_before)
+            if starts_after is not None:
+                mask &= self.start_ts >= _to_timestamp(starts_after)
+            if excluded_ids:
+                excluded_rows = [self.row_of[aid] for aid in excluded_ids if aid in self.row_of]
+                mask[excluded_rows] = False
+        if vectors is None or not mask.any():
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        if centroids is not None:
+            probes = np.argsort(-(centroids @ query))[:IVF_NPROBE]
+            mask &= np.isin(list_ids, probes)
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return []
+        scores = np.asarray(vectors[candidates]) @ query
+
+        k = min(limit, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        rows = candidates[top]
+
+        placeholders = ", ".join(["?"] * len(rows))
+        with self._lock:
+            properties = {
+                row: json.loads(props) for row, props in self._connection.execute(
+                    f"SELECT `row`, `properties` FROM `rows` WHERE `row` IN ({placeholders})", [int(r) for r in rows]
+                )
+            }
+        return [properties[int(row)] for row in rows]
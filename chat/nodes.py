@@ -1,22 +1,104 @@
-from typing import Callable, Literal
+import json
+import time
+from typing import Callable, Literal, Optional
 
 from langchain_core.runnables import RunnableConfig
 from langgraph.prebuilt import ToolNode
 from pydantic import BaseModel, Field
 
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.tools import Tool
 from langchain_openai import ChatOpenAI
 from langchain_teddynote.models import get_model_name, LLMs
 
 from .datamodel import GraphState
+from .deadline import (DeadlineExceeded, FALLBACK_MESSAGE, GENERATE_MIN_TIME, new_deadline, node_budget,
+                       remaining_time, run_with_deadline, time_until)
+from .hedging import hedged_invoke
 from .indications import Indications
-from .tools import tavily_search_tool
+from server.logger import logger
+from .tools import tavily_search_tool, condense_web_results, get_token_encoding, DEADLINE_EXCEEDED_MESSAGE
 
 # 최신 모델이름 가져오기
 MODEL_NAME = get_model_name(LLMs.GPT4o)
 
+# 답변 생성에 사용할 모델 등급
+MODEL_TIERS = {
+    "small": get_model_name(LLMs.GPT4o_MINI),
+    "large": MODEL_NAME,
+}
+
+# 질문 종류(route)별 모델 라우팅 테이블.
+# tier: 기본으로 사용할 모델 등급
+# max_context_tokens: 입력 토큰 수가 이 값을 넘으면 큰 모델로 전환
+ROUTING_TABLE: dict[str, dict] = {
+    "web":      {"tier": "small", "max_context_tokens": 3000},
+    "keyword":  {"tier": "small", "max_context_tokens": 4000},
+    "history":  {"tier": "small", "max_context_tokens": 4000},
+    "others":   {"tier": "small", "max_context_tokens": 2000},
+}
+
+def count_tokens(messages) -> int:
+    """메시지 리스트(BaseMessage 또는 (role, content) 튜플)의 대략적인 입력 토큰 수를 계산합니다."""
+    total = 0
+    for message in messages:
+        content = message[1] if isinstance(message, tuple) else message.content
+        total += len(get_token_encoding().encode(content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)))
+    return total
+
+def select_model_tier(route: str, context_tokens: int) -> str:
+    """라우팅 테이블에 따라 route와 입력 크기에 맞는 모델 등급을 반환합니다.
+
+    Args:
+        route (str): 질문 종류 (web / keyword / history / others)
+        context_tokens (int): 입력 토큰 수
+
+    Returns:
+        str: 모델 등급 (MODEL_TIERS의 키)
+    """
+    routing = ROUTING_TABLE.get(route, ROUTING_TABLE["others"])
+    if context_tokens > routing["max_context_tokens"]:
+        return "large"
+    return routing["tier"]
+
+def invoke_with_routing(prompt: ChatPromptTemplate, inputs: dict, route: str, context_tokens: int,
+                        config: Optional[RunnableConfig] = None):
+    """라우팅 테이블로 고른 모델로 체인을 실행하고, 작은 모델이 실패하면 큰 모델로 다시 실행합니다.
+    route별로 선택된 모델과 소요 시간을 로그에 남깁니다.
+
+    Args:
+        prompt (ChatPromptTemplate): 프롬프트
+        inputs (dict): 프롬프트 입력값
+        route (str): 질문 종류
+        context_tokens (int): 입력 토큰 수
+        config (Optional[RunnableConfig]): 마감 시각이 담긴 런타임 설정
+
+    Returns:
+        AIMessage: 모델 응답
+    """
+    tier = select_model_tier(route, context_tokens)
+    tiers = [tier] if tier == "large" else [tier, "large"]
+
+    for i, current_tier in enumerate(tiers):
+        model_name = MODEL_TIERS[current_tier]
+        timeout = node_budget(config, "generate")
+        if timeout is not None and timeout < GENERATE_MIN_TIME:
+            raise DeadlineExceeded(f"[route: {route}] no time left for {model_name}")
+        start = time.perf_counter()
+        try:
+            response = hedged_invoke(prompt | ChatOpenAI(model_name=model_name, temperature=0,
+                                                         timeout=timeout, max_retries=0 if timeout else 2),
+                                     inputs, model_name)
+        except Exception as e:
+            if i == len(tiers) - 1:
+                raise
+            logger.warning(f"[route: {route}] {model_name} 호출 실패, 큰 모델로 재시도합니다: {e}")
+            continue
+        logger.info(f"[route: {route}] model={model_name}, tokens={context_tokens}, "
+                    f"latency={time.perf_counter() - start:.3f}s")
+        return response
+
 def update_state(state: GraphState, node_name: str, **updates) -> GraphState:
     """Graph의 State를 입력받고, 입력받은 State에서 **updates로 받은 딕셔너리를 반영해서 수정된 State를 반환하는 함수.
 
@@ -58,12 +140,16 @@ class LangGraphNodes:
                             )
 
     @staticmethod
-    def classify_question(state: GraphState) -> Literal["web", "recommend", "others"]:
+    def classify_question(state: GraphState, config: RunnableConfig) -> Literal["web", "recommend", "others"]:
         """
             사용자의 초기 질문을 바탕으로 정보 요청 질문인지, 추천 요청 질문인지, 기타 질문인지를 AI가 판단해서
             분류를 수행하는 함수.
             정보 요청일 경우 'information'을, '추천 요청일 경우 'recommendation'을, 기타 질문일 경우 'others'를 반환한다.
+            검색에 쓸 시간 예산이 남아 있지 않으면 검색을 건너뛰고 대화 기록만으로 답변하도록 'others'를 반환한다.
         """
+        if state["type"] in ("web", "keyword", "history") and node_budget(config, "search_web") == 0:
+            logger.warning(f"검색 시간 예산이 없어 '{state['type']}' 검색을 건너뛰고 대화 기록으로 답변합니다.")
+            return "others"
 
         if state["type"] == "web":
             if state.get("debug"):
@@ -86,28 +172,114 @@ class LangGraphNodes:
             return "others"
 
     @staticmethod
-    def search_web(state: GraphState) -> GraphState:
+    def search_web(state: GraphState, config: RunnableConfig) -> GraphState:
         # LLM 초기화
-        llm = ChatOpenAI(model="gpt-4o-mini")
+        timeout = node_budget(config, "search_web")
+        llm = ChatOpenAI(model="gpt-4o-mini", timeout=timeout, max_retries=0 if timeout else 2)
 
         # 도구와 LLM 결합, 툴이 반드시 tavily search tool을 호출하도록 고정
         llm_with_tools = llm.bind_tools([tavily_search_tool], tool_choice=tavily_search_tool.name)
 
-        ai_msg = llm_with_tools.invoke(state["question"])
+        try:
+            ai_msg = hedged_invoke(llm_with_tools, state["question"], "gpt-4o-mini")
+        except Exception as e:
+            # 도구 호출 메시지를 만들지 못하면 웹 검색을 건너뛰고 대화 기록으로 답변한다.
+            logger.warning(f"웹 검색 질의 생성 실패, 검색을 건너뜁니다: {e}")
+            return update_state(state, node_name="search_web", type="web")
 
         return update_state(state,
                             messages=[ai_msg],
                             node_name="search_web",
                             type="web")
 
+    @staticmethod
+    def route_web_search(state: GraphState) -> Literal["tavily", "generate"]:
+        """search_web 노드가 도구 호출 메시지를 만들었으면 'tavily'를, 아니면 'generate'를 반환합니다."""
+        last_message = state["messages"][-1]
+        return "tavily" if isinstance(last_message, AIMessage) and last_message.tool_calls else "generate"
+
     tavily_search_tool_node = ToolNode([tavily_search_tool])
 
     @staticmethod
-    def execute_search(state: GraphState, retrieve_by_keyword: Tool, retrieve_by_history: Tool) -> GraphState:
+    def tavily(state: GraphState, config: RunnableConfig) -> GraphState:
+        """Tavily 도구 노드를 시간 예산 안에서 실행합니다.
+        시간이 초과되면 각 도구 호출에 대해 '결과 없음' ToolMessage를 대신 반환합니다.
+
+        Args:
+            state (GraphState): 현재 상태
+            config (RunnableConfig): 런타임 설정
+
+        Returns:
+            GraphState: 검색 결과가 반영된 상태
+        """
+        try:
+            return run_with_deadline(LangGraphNodes.tavily_search_tool_node.invoke, node_budget(config, "tavily"),
+                                     state, config)
+        except DeadlineExceeded as e:
+            logger.warning(f"Tavily 검색 시간 초과: {e}")
+            return update_state(state,
+                                node_name="tavily",
+                                messages=[ToolMessage(content="검색 시간이 초과되어 검색 결과가 없습니다.",
+                                                      tool_call_id=tool_call["id"],
+                                                      name=tool_call["name"])
+                                          for tool_call in state["messages"][-1].tool_calls])
+
+    @staticmethod
+    def condense(state: GraphState, config: RunnableConfig) -> GraphState:
+        """Tavily 검색 결과에서 질문과 관련된 passage만 남기는 노드입니다.
+        원본 ToolMessage와 같은 id로 교체하기 때문에, 대화 기록에도 압축된 결과만 저장됩니다.
+        시간 예산이 부족하면 임베딩 대신 Tavily가 제공하는 짧은 요약(content)만 남깁니다.
+
+        Args:
+            state (GraphState): 현재 상태
+            config (RunnableConfig): 런타임 설정
+
+        Returns:
+            GraphState: 압축된 검색 결과가 반영된 상태
+        """
+        if state.get("debug"):
+            print("\n=== NODE: condense ===\n")
+
+        tool_msg = state["messages"][-1]
+        if not isinstance(tool_msg, ToolMessage):
+            return update_state(state, node_name="condense")
+
+        # artifact에는 raw_content를 포함한 Tavily 원본 응답이 들어 있다.
+        if isinstance(tool_msg.artifact, dict) and tool_msg.artifact.get("results"):
+            results = tool_msg.artifact["results"]
+        else:
+            try:
+                results = json.loads(tool_msg.content)
+            except (TypeError, ValueError):
+                return update_state(state, node_name="condense")
+            if not isinstance(results, list):
+                return update_state(state, node_name="condense")
+
+        try:
+            content = run_with_deadline(condense_web_results, node_budget(config, "condense"),
+                                        state["question"], results)
+        except DeadlineExceeded as e:
+            logger.warning(f"웹 검색 결과 압축 시간 초과, 요약만 사용합니다: {e}")
+            content = json.dumps([{"url": r.get("url", ""), "title": r.get("title", ""), "passages": [r.get("content", "")]}
+                                  for r in results if isinstance(r, dict)], ensure_ascii=False)
+
+        condensed_msg = ToolMessage(content=content,
+                                    tool_call_id=tool_msg.tool_call_id,
+                                    name=tool_msg.name,
+                                    id=tool_msg.id)
+        return update_state(state,
+                            node_name="condense",
+                            messages=[condensed_msg])
+
+    @staticmethod
+    def execute_search(state: GraphState, config: RunnableConfig,
+                       retrieve_by_keyword: Tool, retrieve_by_history: Tool) -> GraphState:
         """Weaviate에서 키워드 또는 사용자의 활동 기록에 맞는 추천 활동을 검색하고, 결과를 state에 반영합니다.
+        시간 예산이 초과되면 검색 결과 없이 대화 기록만으로 답변하도록 합니다.
 
         Args:
             state (GraphState): 현재 상태
+            config (RunnableConfig): 런타임 설정
             retrieve_by_keyword (Tool): 검색할 user_id가 반영된, 키워드 기반의 검색 retriever tool
             retrieve_by_history (Tool): 검색할 user_id가 반영된, 사용자 활동기록 기반의 검색 retriever tool
 
@@ -122,8 +294,13 @@ class LangGraphNodes:
             indication = "Invoke the tool with an appropriate query. Based on the user’s question, compile a list of the most suitable items for vector search and provide it as the tool’s input."
         else:
             indication = "Call the retriever tool."
+        # 질의 생성(LLM)과 도구 실행이 노드 예산 하나를 나눠 쓰도록, 노드의 마감 시각을 한 번만 계산한다.
+        timeout = node_budget(config, "execute_search")
+        node_deadline = new_deadline(timeout) if timeout is not None else None
         llm_with_tools = ChatOpenAI(temperature=0,
                                     model=MODEL_NAME,
+                                    timeout=timeout,
+                                    max_retries=0 if timeout else 2,
                                     streaming=True).bind_tools([retrieve_by_keyword, retrieve_by_history],
                                                                tool_choice=tool_choice)
 
@@ -134,7 +311,11 @@ class LangGraphNodes:
         chain = prompt | llm_with_tools
 
 
-        ai_msg = chain.invoke({"question": indication})
+        try:
+            ai_msg = hedged_invoke(chain, {"question": indication}, MODEL_NAME)
+        except Exception as e:
+            logger.warning(f"추천 검색 질의 생성 실패, 검색을 건너뜁니다: {e}")
+            return update_state(state, node_name="execute_search")
 
         messages = [ai_msg]
         # 결과를 ToolMessage로 변환
@@ -143,7 +324,13 @@ class LangGraphNodes:
                 "retrieve_by_keyword": retrieve_by_keyword,
                 "retrieve_by_history": retrieve_by_history,
             }[tool_call["name"].lower()]
-            tool_msg = selected_tool.invoke(tool_call)
+            try:
+                tool_msg = run_with_deadline(selected_tool.invoke, time_until(node_deadline), tool_call, config)
+            except DeadlineExceeded as e:
+                logger.warning(f"추천 검색 시간 초과: {e}")
+                tool_msg = ToolMessage(content=DEADLINE_EXCEEDED_MESSAGE,
+                                       tool_call_id=tool_call["id"],
+                                       name=tool_call["name"])
             messages.append(tool_msg)
 
         return update_state(state,
@@ -167,11 +354,13 @@ class LangGraphNodes:
 
     # 모든 것이 검증된 후 context를 기반으로 답변을 생성하는 Graph Branch
     @staticmethod
-    def generate(state: GraphState) -> GraphState:
+    def generate(state: GraphState, config: RunnableConfig) -> GraphState:
         """최종 답변을 생성하는 노드입니다.
+        남은 시간이 없거나 시간 안에 답변을 받지 못하면 대체 메시지를 반환합니다.
 
         Args:
             state (GraphState): 현재 상태
+            config (RunnableConfig): 런타임 설정
 
         Returns:
             GraphState: 답변 메시지가 추가된 상태
@@ -179,6 +368,11 @@ class LangGraphNodes:
         if state.get("debug"):
             print("\n=== NODE: generate ===\n")
 
+        remaining = remaining_time(config)
+        if remaining is not None and remaining < GENERATE_MIN_TIME:
+            logger.warning("답변 생성 시간이 남아 있지 않아 대체 메시지를 반환합니다.")
+            return update_state(state, node_name="generate", messages=[AIMessage(content=FALLBACK_MESSAGE)])
+
         match state["type"]:
             case "web":         indication = Indications.WEB
             case "keyword":     indication = Indications.RECOMMENDATION
@@ -210,15 +404,20 @@ class LangGraphNodes:
             ("system", indication),
             ("human", "{question}"),
         ])
+        question = state.get("question", "")
+        context_tokens = count_tokens([*trimmed_messages, ("system", indication), ("human", question)])
 
-        # RAG 체인 구성.
+        # RAG 체인 구성. 모델은 질문 종류와 입력 크기에 따라 라우팅 테이블에서 고른다.
         # StrOutParser()를 사용하면 결과가 문자열이 되어서 state["messages"]에 추가될 때 자동으로 HumanMessage로 타입이 변환되기 때문에,
         # Memory에 저장 후 AI에게 제공해도 AI가 이를 AI의 응답으로 인식하지 못한다.
         # 따라서 StrOutputParser는 사용하지 말자.
-        rag_chain = prompt | ChatOpenAI(model_name=MODEL_NAME, temperature=0)
-
-        # 답변 생성
-        response = rag_chain.invoke({"question": state.get("question", "")})
+        try:
+            response = invoke_with_routing(prompt, {"question": question}, state["type"], context_tokens, config)
+        except Exception as e:
+            if remaining is None:
+                raise
+            logger.warning(f"제한 시간 안에 답변을 생성하지 못했습니다: {e}")
+            response = AIMessage(content=FALLBACK_MESSAGE)
 
         return update_state(state,
                             node_name="recommend",
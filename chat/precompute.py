@@ -0,0 +1,202 @@
+"""활동 이력 기반 추천을 야간 배치로 미리 계산해 두는 모듈.
+
+크롤링과 벡터스토어 동기화가 끝난 뒤 run_crawlers에서 실행된다.
+모든 활동 벡터(float32 행렬)와 모든 사용자 프로필 벡터를 만들고,
+블록 단위 행렬곱과 top-k 선택으로 사용자별 추천 목록을 한 번에 계산해서 로컬 SQLite에 저장한다.
+retrieve_by_history는 먼저 이 저장소를 조회하고, 결과가 없거나 오래되었을 때만 실시간으로 검색한다.
+"""
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from os.path import join, dirname, abspath
+from typing import Any, Optional
+
+import numpy as np
+
+from server.db import run_query
+from server.logger import logger
+from .constants import model, weaviate_index_name
+from .syncstate import get_state
+from .vectorstore import RETRIEVAL_PROPERTIES, SYNC_GENERATION_KEY, fill_missing_snippets, is_live_activity
+from .weaviate import WeaviateClientContext
+
+RECOMMENDATION_CONNECTION_STRING: str = join(dirname(abspath(__file__)), "recommendations.db")
+PRECOMPUTE_TOP_N = 20        # 사용자별로 저장할 추천 수. 배치 이후 새로 리뷰한 활동을 빼도 충분히 남도록 여유 있게 저장한다.
+PRECOMPUTE_BLOCK_SIZE = 1024     # 한 번의 행렬곱에서 처리할 사용자 수
+SNIPPET_FETCH_CHUNK = 100    # 요약문이 없는 객체의 본문을 한 번에 조회할 개수
+
+_lock = threading.Lock()
+_connection = sqlite3.connect(RECOMMENDATION_CONNECTION_STRING, check_same_thread=False)
+_connection.execute("""
+    CREATE TABLE IF NOT EXISTS `recommendations` (
+        `user_id` BLOB PRIMARY KEY,
+        `documents` TEXT NOT NULL,
+        `generation` INTEGER NOT NULL,
+        `created_at` REAL NOT NULL
+    )
+""")
+_connection.commit()
+
+
+def _serializable(properties: dict[str, Any]) -> dict[str, Any]:
+    return {k: v.isoformat() if isinstance(v, datetime) else v for k, v in properties.items()}
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def load_activity_matrix(collection) -> tuple[list, np.ndarray]:
+    """컬렉션의 모든 객체와, 행마다 정규화된 float32 벡터 행렬을 반환합니다."""
+    objects, vectors = [], []
+    for obj in collection.iterator(include_vector=True, return_properties=RETRIEVAL_PROPERTIES):
+        vector = obj.vector.get("default") if isinstance(obj.vector, dict) else obj.vector
+        if vector:
+            objects.append(obj)
+            vectors.append(vector)
+    matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+    return objects, _normalize_rows(matrix)
+
+
+def load_user_profiles() -> tuple[list[bytes], np.ndarray, list[set[str]]]:
+    """리뷰가 있는 모든 사용자의 프로필 벡터 행렬과 사용자별 리뷰한 activity_id 집합을 반환합니다.
+    프로필 벡터는 실시간 경로(get_user_customized_embedding)와 같이 리뷰한 활동 본문 임베딩의 평균입니다."""
+    rows = run_query("""
+        SELECT r.user_id, r.activity_id, a.activity_content
+        FROM reviews r
+        JOIN activities a ON a.activity_id = r.activity_id;
+    """)
+
+    reviewed: dict[bytes, set[str]] = {}
+    contents: dict[str, str] = {}
+    for row in rows:
+        activity_id = row['activity_id'].hex()
+        reviewed.setdefault(row['user_id'], set()).add(activity_id)
+        if row['activity_content'] and isinstance(row['activity_content'], str):
+            contents[activity_id] = row['activity_content']
+
+    # 여러 사용자가 리뷰한 활동도 한 번만 임베딩한다.
+    activity_ids = list(contents)
+    embeddings = model.encode([contents[aid] for aid in activity_ids], normalize_embeddings=True, batch_size=32) \
+        if activity_ids else np.zeros((0, 0), dtype=np.float32)
+    index = {aid: i for i, aid in enumerate(activity_ids)}
+
+    user_ids, profiles, exclusions = [], [], []
+    for user_id, history in reviewed.items():
+        rows_of_user = [index[aid] for aid in history if aid in index]
+        if not rows_of_user:
+            continue
+        user_ids.append(user_id)
+        profiles.append(np.mean(embeddings[rows_of_user], axis=0))
+        exclusions.append(history)
+
+    matrix = np.asarray(profiles, dtype=np.float32).reshape(len(profiles), -1)
+    return user_ids, _normalize_rows(matrix), exclusions
+
+
+def top_k_scores(user_matrix: np.ndarray, activity_matrix: np.ndarray, exclusions: list[list[int]],
+                 k: int, block_size: int = PRECOMPUTE_BLOCK_SIZE) -> list[np.ndarray]:
+    """사용자 블록마다 코사인 유사도 행렬을 계산하고, 제외할 활동을 뺀 상위 k개 활동의 인덱스를 반환합니다.
+    제외하고 남은 활동이 k개보다 적은 사용자는 남은 활동만 반환합니다.
+
+    Args:
+        user_matrix (np.ndarray): 정규화된 사용자 프로필 행렬 (사용자 수 x 차원)
+        activity_matrix (np.ndarray): 정규화된 활동 벡터 행렬 (활동 수 x 차원)
+        exclusions (list[list[int]]): 사용자별로 제외할 활동 행 인덱스
+        k (int): 사용자별 추천 수
+        block_size (int): 한 번의 행렬곱에서 처리할 사용자 수
+
+    Returns:
+        list[np.ndarray]: 사용자별 상위 최대 k개 활동 인덱스, 유사도 내림차순
+    """
+    k = min(k, activity_matrix.shape[0])
+    result = []
+    for start in range(0, user_matrix.shape[0], block_size):
+        end = min(start + block_size, user_matrix.shape[0])
+        scores = user_matrix[start:end] @ activity_matrix.T
+        for row, excluded in enumerate(exclusions[start:end]):
+            if excluded:
+                scores[row, excluded] = -np.inf
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top, top_scores = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+        # 제외하고 남은 활동이 k개보다 적으면 제외한 활동(-inf)까지 뽑히므로 버린다.
+        result.extend(indices[np.isfinite(row_scores)] for indices, row_scores in zip(top, top_scores))
+    return result
+
+
+def precompute_recommendations(top_n: int = PRECOMPUTE_TOP_N) -> int:
+    """모든 사용자의 활동 이력 기반 추천을 계산해서 저장합니다.
+
+    Args:
+        top_n (int): 사용자별로 저장할 추천 수
+
+    Returns:
+        int: 추천을 저장한 사용자 수
+    """
+    start = time.perf_counter()
+    with WeaviateClientContext() as client:
+        collection = client.collections.get(weaviate_index_name)
+        objects, activity_matrix = load_activity_matrix(collection)
+        user_ids, user_matrix, histories = load_user_profiles()
+        if not objects or not user_ids:
+            logger.info("사전 계산할 추천이 없습니다.")
+            return 0
+
+        row_of = {obj.properties.get("activity_id"): i for i, obj in enumerate(objects)}
+        exclusions = [[row_of[aid] for aid in history if aid in row_of] for history in histories]
+        top_indices = top_k_scores(user_matrix, activity_matrix, exclusions, top_n)
+
+        # 추천에 실제로 선택된 객체 중 요약문이 없는 것만 본문을 조회해서 채운다.
+        selected = [objects[i] for i in np.unique(np.concatenate(top_indices))]
+        for chunk_start in range(0, len(selected), SNIPPET_FETCH_CHUNK):
+            fill_missing_snippets(collection, selected[chunk_start:chunk_start + SNIPPET_FETCH_CHUNK])
+
+    generation = get_state(SYNC_GENERATION_KEY, 0)
+    now = time.time()
+    records = [
+        (user_id,
+         json.dumps([_serializable(objects[i].properties) for i in indices], ensure_ascii=False),
+         generation,
+         now)
+        for user_id, indices in zip(user_ids, top_indices)
+    ]
+    with _lock:
+        _connection.execute("DELETE FROM `recommendations`")
+        _connection.executemany("INSERT INTO `recommendations` VALUES (?, ?, ?, ?)", records)
+        _connection.commit()
+
+    logger.info(f"추천 사전 계산 완료: 사용자 {len(user_ids)}명 x 활동 {len(objects)}개, "
+                f"{time.perf_counter() - start:.1f}s (generation: {generation})")
+    return len(records)
+
+
+def get_precomputed_recommendations(user_id: bytes, history_ids: list[bytes], limit: int) -> Optional[list[dict]]:
+    """사전 계산된 추천 목록을 반환합니다. 배치 이후 새로 리뷰한 활동과 종료된 활동은 제외합니다.
+    저장된 추천이 없거나, 이후에 동기화가 다시 일어났거나, 제외 후 limit개가 남지 않으면 None을 반환합니다.
+
+    Args:
+        user_id (bytes): 사용자 id
+        history_ids (list[bytes]): 사용자가 현재까지 리뷰한 activity_id 목록
+        limit (int): 필요한 추천 수
+
+    Returns:
+        Optional[list[dict]]: 추천 활동의 속성 dict 리스트
+    """
+    with _lock:
+        row = _connection.execute(
+            "SELECT `documents`, `generation` FROM `recommendations` WHERE `user_id` = ?", (user_id,)
+        ).fetchone()
+    if row is None or row[1] != get_state(SYNC_GENERATION_KEY, 0):
+        return None
+
+    excluded = {aid.hex() for aid in history_ids if isinstance(aid, bytes)}
+    now = datetime.now(timezone.utc)
+    documents = [doc for doc in json.loads(row[0])
+                 if doc.get("activity_id") not in excluded and is_live_activity(doc, now)]
+    return documents[:limit] if len(documents) >= limit else None
@@ -0,0 +1,206 @@
+"""LLM을 거치지 않는 구조화된 활동 검색 모듈.
+
+parse_filter_node / parse_sort_list가 해석하는 JSON 필터·정렬 문법과, 선택적인 텍스트 또는 벡터 질의로
+활동 컬렉션을 검색한다. 컴파일한 필터 객체와 첫 페이지 결과는 요청을 정규화한 해시를 키로 캐시한다.
+"""
+import base64
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Optional
+
+from weaviate.classes.query import MetadataQuery
+from weaviate.exceptions import WeaviateQueryError
+
+from .cache import TTLCache
+from .constants import embed_cached, weaviate_index_name
+from .syncstate import get_state
+from .vectorstore import ACTIVITY_PROPERTIES, ADDED_PROPERTIES, RETRIEVAL_PROPERTIES, SYNC_GENERATION_KEY
+from .weaviate import WeaviateClientContext, parse_filter_node, parse_sort_list
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+# 응답에 포함할 수 있는 속성. 벡터는 반환하지 않는다.
+SEARCHABLE_PROPERTIES = {prop.name for prop in [*ACTIVITY_PROPERTIES, *ADDED_PROPERTIES]}
+
+# 컴파일한 Filter/Sort 객체는 직렬화할 수 없으므로 메모리 계층만 사용한다.
+compiled_filter_cache = TTLCache("compiled_filters", maxsize=512, ttl=float(os.getenv("SEARCH_FILTER_CACHE_TTL", "3600")))
+first_page_cache = TTLCache(
+    "activity_search",
+    maxsize=int(os.getenv("SEARCH_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", "300")),
+)
+
+
+class SearchRequestError(ValueError):
+    """검색 요청의 형식이 잘못되었을 때 발생하는 예외입니다."""
+
+
+def canonical_hash(value: Any) -> str:
+    """키 순서와 공백에 관계없이 같은 JSON 값이면 같은 해시를 반환합니다."""
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def compile_filter_and_sort(filter_node: Optional[dict], sort_list: Optional[list[dict]]):
+    """필터·정렬 JSON을 Weaviate Filter/Sort 객체로 변환합니다. 같은 JSON은 캐시된 객체를 재사용합니다."""
+    key = canonical_hash({"filter": filter_node, "sort": sort_list})
+    if (compiled := compiled_filter_cache.get(key)) is not None:
+        return compiled
+    try:
+        compiled = (
+            parse_filter_node(filter_node) if filter_node else None,
+            parse_sort_list(sort_list) if sort_list else None,
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise SearchRequestError(f"필터 또는 정렬 조건이 올바르지 않습니다: {e}") from e
+    compiled_filter_cache.set(key, compiled)
+    return compiled
+
+
+def encode_cursor(request_hash: str, offset: Optional[int] = None, after: Optional[str] = None) -> str:
+    payload = json.dumps({"h": request_hash, "o": offset, "a": after}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, request_hash: str) -> dict[str, Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise SearchRequestError("cursor가 올바르지 않습니다.") from e
+    if not isinstance(payload, dict) or payload.get("h") != request_hash:
+        raise SearchRequestError("cursor가 다른 검색 조건으로 만들어졌습니다.")
+    offset, after = payload.get("o"), payload.get("a")
+    # bool은 int의 하위 클래스이므로 따로 거른다.
+    if offset is not None and (isinstance(offset, bool) or not isinstance(offset, int) or offset < 0):
+        raise SearchRequestError("cursor가 올바르지 않습니다.")
+    if after is not None and not isinstance(after, str):
+        raise SearchRequestError("cursor가 올바르지 않습니다.")
+    return payload
+
+
+def _serializable(properties: dict[str, Any]) -> dict[str, Any]:
+    return {k: v.isoformat() if isinstance(v, datetime) else v for k, v in properties.items()}
+
+
+def search_activities(body: dict[str, Any]) -> dict[str, Any]:
+    """필터·정렬과 선택적인 텍스트/벡터 질의로 활동을 검색합니다.
+
+    텍스트나 벡터 질의가 있으면 유사도 순으로, 없으면 sort 순서로 반환합니다.
+    필터·정렬·질의가 모두 없으면 uuid 커서(after=)로, 그 외에는 offset을 담은 cursor로 다음 페이지를 가져옵니다.
+
+    Args:
+        body (dict[str, Any]): 검색 요청
+            - filter (dict, optional): parse_filter_node 문법의 필터
+            - sort (list[dict], optional): parse_sort_list 문법의 정렬 조건 (질의가 있으면 사용할 수 없음)
+            - query (str, optional): 텍스트 질의. 로컬 bge-m3로 임베딩해서 벡터 검색한다.
+            - vector (list[float], optional): 질의 벡터
+            - properties (list[str], optional): 반환할 속성. 기본값은 RETRIEVAL_PROPERTIES
+            - limit (int, optional): 페이지 크기 (최대 SEARCH_MAX_LIMIT)
+            - cursor (str, optional): 이전 응답의 next_cursor
+
+    Returns:
+        dict[str, Any]: {"items": [{"uuid", "properties", "distance"}], "next_cursor": str or None}
+
+    Raises:
+        SearchRequestError: 요청 형식이 잘못된 경우
+    """
+    filter_node, sort_list = body.get("filter"), body.get("sort")
+    query, vector = body.get("query"), body.get("vector")
+    properties = body.get("properties") or RETRIEVAL_PROPERTIES
+    limit = body.get("limit", SEARCH_DEFAULT_LIMIT)
+    cursor = body.get("cursor")
+
+    if filter_node is not None and not isinstance(filter_node, dict):
+        raise SearchRequestError("filter는 객체여야 합니다.")
+    if sort_list is not None and not isinstance(sort_list, list):
+        raise SearchRequestError("sort는 배열이어야 합니다.")
+    if query is not None and vector is not None:
+        raise SearchRequestError("query와 vector는 함께 사용할 수 없습니다.")
+    if query is not None and (not isinstance(query, str) or not query.strip()):
+        raise SearchRequestError("query는 비어 있지 않은 문자열이어야 합니다.")
+    if vector is not None and (not isinstance(vector, list) or not vector
+                               or not all(isinstance(v, (int, float)) for v in vector)):
+        raise SearchRequestError("vector는 숫자 배열이어야 합니다.")
+    if (query is not None or vector is not None) and sort_list:
+        raise SearchRequestError("질의가 있으면 결과는 유사도 순으로 정렬되므로 sort를 사용할 수 없습니다.")
+    if not isinstance(properties, list) or not set(properties) <= SEARCHABLE_PROPERTIES:
+        raise SearchRequestError(f"properties는 {sorted(SEARCHABLE_PROPERTIES)} 중에서 선택해야 합니다.")
+    if isinstance(limit, bool) or not isinstance(limit, int) or not 1 <= limit <= SEARCH_MAX_LIMIT:
+        raise SearchRequestError(f"limit은 1 이상 {SEARCH_MAX_LIMIT} 이하의 정수여야 합니다.")
+
+    # cursor를 제외한 요청 전체가 같으면 같은 검색이다. 속성 순서는 결과에 영향을 주지 않으므로 정렬한다.
+    request_hash = canonical_hash({
+        "filter": filter_node,
+        "sort": sort_list,
+        "query": " ".join(query.split()) if query else None,
+        "vector": vector,
+        "properties": sorted(properties),
+        "limit": limit,
+    })
+    # 동기화가 끝나면 generation이 바뀌어 이전 결과를 쓰지 않는다.
+    cache_key = f"{get_state(SYNC_GENERATION_KEY, 0)}|{request_hash}"
+    if cursor is None and (cached := first_page_cache.get(cache_key)) is not None:
+        return cached
+
+    position = decode_cursor(cursor, request_hash) if cursor else {"o": 0, "a": None}
+    filters, sort = compile_filter_and_sort(filter_node, sort_list)
+    if query is not None:
+        vector = list(embed_cached(" ".join(query.split())))
+    # 필터·정렬·질의가 없을 때만 Weaviate의 uuid 커서를 사용할 수 있다.
+    use_after = filters is None and sort is None and vector is None
+    offset = position.get("o") or 0
+
+    try:
+        with WeaviateClientContext() as client:
+            collection = client.collections.get(weaviate_index_name)
+            if vector is not None:
+                objects = collection.query.near_vector(
+                    near_vector=vector,
+                    filters=filters,
+                    limit=limit,
+                    offset=offset,
+                    return_properties=properties,
+                    return_metadata=MetadataQuery(distance=True),
+                    include_vector=False,
+                ).objects
+            elif use_after:
+                objects = collection.query.fetch_objects(
+                    after=position.get("a"),
+                    limit=limit,
+                    return_properties=properties,
+                    include_vector=False,
+                ).objects
+            else:
+                objects = collection.query.fetch_objects(
+                    filters=filters,
+                    sort=sort,
+                    limit=limit,
+                    offset=offset,
+                    return_properties=properties,
+                    include_vector=False,
+                ).objects
+    except WeaviateQueryError as e:
+        # 필터 값의 타입이 속성과 맞지 않거나, 정렬할 수 없는 속성으로 정렬한 경우 등 요청 내용 때문에 실패한 질의
+        raise SearchRequestError(f"검색 조건을 처리할 수 없습니다: {e}") from e
+
+    next_cursor = None
+    if len(objects) == limit:
+        next_cursor = encode_cursor(request_hash, after=str(objects[-1].uuid)) if use_after \
+            else encode_cursor(request_hash, offset=offset + limit)
+
+    result = {
+        "items": [
+            {
+                "uuid": str(obj.uuid),
+                "properties": _serializable(obj.properties),
+                "distance": obj.metadata.distance if vector is not None and obj.metadata else None,
+            }
+            for obj in objects
+        ],
+        "next_cursor": next_cursor,
+    }
+    if cursor is None:
+        first_page_cache.set(cache_key, result)
+    return result
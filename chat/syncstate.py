@@ -0,0 +1,277 @@
+"""벡터스토어 동기화 상태를 로컬 SQLite 파일에 저장하는 모듈.
+
+key-value 상태와, 청크 단위로 체크포인트되는 동기화 작업(sync_jobs) 기록을 함께 저장한다.
+크롤러를 별도 프로세스(python -m crawler.main_crawler)로 실행해도 Flask 서버가 같은 상태를 볼 수 있도록,
+메모리가 아닌 파일에 저장한다.
+"""
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from os.path import join, dirname, abspath
+from typing import Any, Iterator, Optional
+
+SYNC_STATE_CONNECTION_STRING: str = join(dirname(abspath(__file__)), "sync_state.db")
+SYNC_LOCK_PATH: str = join(dirname(abspath(__file__)), "sync.lock")
+
+_lock = threading.Lock()
+_connection = sqlite3.connect(SYNC_STATE_CONNECTION_STRING, check_same_thread=False)
+_connection.execute("""
+    CREATE TABLE IF NOT EXISTS `sync_state` (
+        `key` TEXT PRIMARY KEY,
+        `value` TEXT NOT NULL
+    )
+""")
+_connection.execute("""
+    CREATE TABLE IF NOT EXISTS `sync_jobs` (
+        `job_id` INTEGER PRIMARY KEY AUTOINCREMENT,
+        `mode` TEXT NOT NULL,
+        `state` TEXT NOT NULL,          -- running | done | error | interrupted
+        `total` INTEGER NOT NULL,
+        `done` INTEGER NOT NULL DEFAULT 0,
+        `chunk_size` INTEGER NOT NULL,
+        `last_chunk` INTEGER NOT NULL DEFAULT -1,
+        `started_at` REAL NOT NULL,
+        `updated_at` REAL NOT NULL,
+        `error` TEXT
+    )
+""")
+_connection.execute("""
+    CREATE TABLE IF NOT EXISTS `sync_job_items` (
+        `job_id` INTEGER NOT NULL,
+        `position` INTEGER NOT NULL,
+        `activity_id` BLOB NOT NULL,
+        `kind` TEXT NOT NULL,           -- add | update
+        PRIMARY KEY (`job_id`, `position`)
+    )
+""")
+_connection.commit()
+
+SYNC_JOB_COLUMNS = ["job_id", "mode", "state", "total", "done", "chunk_size", "last_chunk", "started_at", "updated_at", "error"]
+
+
+class SyncInProgressError(RuntimeError):
+    """다른 스레드나 프로세스에서 벡터스토어 동기화가 이미 실행 중일 때 발생하는 예외입니다."""
+
+
+def get_state(key: str, default: Any = None) -> Any:
+    """저장된 상태 값을 반환합니다. 없으면 default를 반환합니다."""
+    with _lock:
+        row = _connection.execute("SELECT `value` FROM `sync_state` WHERE `key` = ?", (key,)).fetchone()
+    return json.loads(row[0]) if row else default
+
+
+def set_state(key: str, value: Any) -> None:
+    """상태 값을 JSON으로 직렬화해서 저장합니다."""
+    with _lock:
+        _connection.execute("INSERT OR REPLACE INTO `sync_state` VALUES (?, ?)",
+                            (key, json.dumps(value, ensure_ascii=False, default=str)))
+        _connection.commit()
+
+
+def increment_state(key: str) -> int:
+    """정수 상태 값을 1 증가시키고, 증가된 값을 반환합니다."""
+    with _lock:
+        row = _connection.execute("SELECT `value` FROM `sync_state` WHERE `key` = ?", (key,)).fetchone()
+        value = (json.loads(row[0]) if row else 0) + 1
+        _connection.execute("INSERT OR REPLACE INTO `sync_state` VALUES (?, ?)", (key, json.dumps(value)))
+        _connection.commit()
+    return value
+
+
+_guard_lock = threading.Lock()
+
+
+class SyncGuard:
+    """sync_guard가 잡은 동기화 잠금입니다. with 문을 벗어나거나 release를 호출하면 잠금을 풉니다.
+    잠금을 잡은 스레드가 아닌 다른 스레드에서 풀 수 있으므로, 요청 스레드에서 잡고 백그라운드 스레드에 넘길 수 있습니다."""
+
+    def __init__(self, lock_file):
+        self._lock_file = lock_file
+        self._released = False
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._lock_file.close()  # 파일을 닫으면 잠금도 풀린다.
+        _guard_lock.release()
+
+    def __enter__(self) -> "SyncGuard":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.release()
+
+
+def sync_guard() -> SyncGuard:
+    """벡터스토어 동기화가 동시에 두 번 실행되지 않도록 잠금을 잡습니다. `with sync_guard():` 형태로 사용합니다.
+    같은 프로세스의 스레드는 threading.Lock으로, 다른 프로세스(크롤러 CLI, 스케줄러)는 파일 잠금으로 막습니다.
+
+    Raises:
+        SyncInProgressError: 이미 동기화가 실행 중인 경우
+    """
+    if not _guard_lock.acquire(blocking=False):
+        raise SyncInProgressError("벡터스토어 동기화가 이미 실행 중입니다.")
+    lock_file = None
+    try:
+        # "w"로 열면 잠금을 얻기 전에 실행 중인 프로세스의 pid가 지워지므로, 잠금을 얻은 뒤에 비운다.
+        lock_file = open(SYNC_LOCK_PATH, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise SyncInProgressError("다른 프로세스에서 벡터스토어 동기화가 이미 실행 중입니다.")
+        lock_file.truncate(0)
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+    except BaseException:
+        if lock_file is not None:
+            lock_file.close()
+        _guard_lock.release()
+        raise
+    return SyncGuard(lock_file)
+
+
+def is_sync_running() -> bool:
+    """다른 스레드나 프로세스에서 벡터스토어 동기화가 실행 중인지 확인합니다.
+    sync_guard의 잠금은 잡지 않으며, 잠금 파일도 수정하지 않습니다."""
+    if _guard_lock.locked():
+        return True
+    # 별도의 파일 디스크립터로 공유 잠금을 시도해 보기만 하고 바로 닫는다.
+    with open(SYNC_LOCK_PATH, "a") as probe:
+        try:
+            fcntl.flock(probe, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(probe, fcntl.LOCK_UN)
+    return False
+
+
+def _job_from_row(row) -> Optional[dict[str, Any]]:
+    return dict(zip(SYNC_JOB_COLUMNS, row)) if row else None
+
+
+def create_job(mode: str, chunk_size: int, total: int = 0, items: Optional[list[tuple[bytes, str]]] = None) -> int:
+    """새 동기화 작업을 기록하고 job_id를 반환합니다.
+
+    Args:
+        mode (str): 동기화 방식 (full | incremental)
+        chunk_size (int): 체크포인트 단위가 되는 청크 크기
+        total (int): 처리할 전체 활동 수. items가 있으면 items의 길이를 사용
+        items (Optional[list[tuple[bytes, str]]]): 처리할 (activity_id, 종류) 목록. 재개할 때 이 목록을 그대로 이어서 처리한다.
+
+    Returns:
+        int: job_id
+    """
+    now = time.time()
+    items = items or []
+    with _lock:
+        # 새 작업을 시작하면 이전에 끝나지 않은 작업은 더 이상 재개하지 않는다.
+        _connection.execute("UPDATE `sync_jobs` SET `state` = 'interrupted' WHERE `state` IN ('running', 'error')")
+        _connection.execute("DELETE FROM `sync_job_items` WHERE `job_id` NOT IN "
+                            "(SELECT `job_id` FROM `sync_jobs` WHERE `state` IN ('running', 'error'))")
+        cursor = _connection.execute(
+            "INSERT INTO `sync_jobs` (`mode`, `state`, `total`, `chunk_size`, `started_at`, `updated_at`) "
+            "VALUES (?, 'running', ?, ?, ?, ?)",
+            (mode, len(items) or total, chunk_size, now, now)
+        )
+        job_id = cursor.lastrowid
+        _connection.executemany("INSERT INTO `sync_job_items` VALUES (?, ?, ?, ?)",
+                                [(job_id, i, activity_id, kind) for i, (activity_id, kind) in enumerate(items)])
+        _connection.commit()
+    return job_id
+
+
+def get_job_chunk(job: dict[str, Any], chunk: int) -> list[tuple[bytes, str]]:
+    """작업의 chunk번째 청크에 해당하는 (activity_id, 종류) 목록을 반환합니다."""
+    start = chunk * job["chunk_size"]
+    with _lock:
+        rows = _connection.execute(
+            "SELECT `activity_id`, `kind` FROM `sync_job_items` WHERE `job_id` = ? AND `position` >= ? AND `position` < ? "
+            "ORDER BY `position`",
+            (job["job_id"], start, start + job["chunk_size"])
+        ).fetchall()
+    return [(bytes(activity_id), kind) for activity_id, kind in rows]
+
+
+def commit_chunk(job_id: int, chunk: int, processed: int) -> None:
+    """청크 처리가 끝났음을 기록합니다. 작업을 재개하면 이 청크 다음부터 처리합니다."""
+    with _lock:
+        _connection.execute(
+            "UPDATE `sync_jobs` SET `last_chunk` = ?, `done` = `done` + ?, `updated_at` = ? WHERE `job_id` = ?",
+            (chunk, processed, time.time(), job_id)
+        )
+        _connection.commit()
+
+
+def set_job_state(job_id: int, state: str, error: Optional[str] = None) -> None:
+    """작업 상태(running | done | error | interrupted)를 기록합니다. 완료된 작업의 항목 목록은 삭제합니다."""
+    with _lock:
+        _connection.execute("UPDATE `sync_jobs` SET `state` = ?, `error` = ?, `updated_at` = ? WHERE `job_id` = ?",
+                            (state, error, time.time(), job_id))
+        if state in ("done", "interrupted"):
+            _connection.execute("DELETE FROM `sync_job_items` WHERE `job_id` = ?", (job_id,))
+        _connection.commit()
+
+
+@contextmanager
+def tracking_job(job_id: int) -> Iterator[None]:
+    """블록이 정상적으로 끝나면 작업을 done으로, 예외가 발생하면 error로 기록합니다. error 상태의 작업은 다음 실행에서 재개됩니다."""
+    set_job_state(job_id, "running")
+    try:
+        yield
+    except BaseException as e:
+        set_job_state(job_id, "error", str(e))
+        raise
+    set_job_state(job_id, "done")
+
+
+def get_job(job_id: int) -> Optional[dict[str, Any]]:
+    """작업 기록을 반환합니다."""
+    with _lock:
+        row = _connection.execute(
+            f"SELECT {', '.join(SYNC_JOB_COLUMNS)} FROM `sync_jobs` WHERE `job_id` = ?", (job_id,)
+        ).fetchone()
+    return _job_from_row(row)
+
+
+def get_unfinished_job() -> Optional[dict[str, Any]]:
+    """끝나지 않은(running 또는 error 상태로 남은) 가장 최근 작업을 반환합니다.
+    sync_guard 안에서 호출하면, running 상태의 작업은 프로세스가 중간에 종료되어 남은 것입니다."""
+    with _lock:
+        row = _connection.execute(
+            f"SELECT {', '.join(SYNC_JOB_COLUMNS)} FROM `sync_jobs` WHERE `state` IN ('running', 'error') "
+            f"ORDER BY `job_id` DESC LIMIT 1"
+        ).fetchone()
+    return _job_from_row(row)
+
+
+def get_job_progress() -> Optional[dict[str, Any]]:
+    """가장 최근 작업의 진행 상황(처리 수/전체 수, 처리 속도, 남은 시간 추정)을 반환합니다."""
+    with _lock:
+        row = _connection.execute(
+            f"SELECT {', '.join(SYNC_JOB_COLUMNS)} FROM `sync_jobs` ORDER BY `job_id` DESC LIMIT 1"
+        ).fetchone()
+    job = _job_from_row(row)
+    if job is None:
+        return None
+
+    end = time.time() if job["state"] == "running" else job["updated_at"]
+    elapsed = max(end - job["started_at"], 1e-6)
+    rate = job["done"] / elapsed
+    remaining = max(job["total"] - job["done"], 0)
+    return {
+        "job_id": job["job_id"],
+        "mode": job["mode"],
+        "state": job["state"],
+        "done": job["done"],
+        "total": job["total"],
+        "rate": round(rate, 2),  # 초당 처리한 활동 수
+        "eta_seconds": round(remaining / rate) if job["state"] == "running" and rate > 0 else None,
+        "started_at": job["started_at"],
+        "updated_at": job["updated_at"],
+        "error": job["error"],
+    }
@@ -1,26 +1,86 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+
 import numpy as np
 import typing
-from typing import Callable, Optional, Literal
+from typing import Any, Callable, Optional, Literal
 
+import tiktoken
 from dotenv import load_dotenv
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.documents import Document
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool, Tool
 from langgraph.prebuilt import ToolNode
-from weaviate.collections.classes.filters import Filter
 
 from server.db import run_query
 from server.logger import logger
 from utils import dict_to_xml
+from .cache import TTLCache
+from .deadline import remaining_time
+from .engines import ENDED_OVERFETCH, fetch_until_filled, get_retrieval_engine, plan_exclusion
+from .precompute import get_precomputed_recommendations
+from .syncstate import get_state
+from .vectorstore import (RETRIEVAL_PROPERTIES, SYNC_GENERATION_KEY, build_activity_snippet, fill_missing_snippets,
+                          is_live_activity)
 from .weaviate import WeaviateClientContext
-from .constants import embed, weaviate_index_name
+from .constants import embed, embed_cached, embed_keywords, model, weaviate_index_name
 
 if typing.TYPE_CHECKING:
     from .bot import Bot
 load_dotenv()
 
+# Tavily 검색 결과 캐시. 같은 시사 질문이 짧은 시간 안에 반복되는 경우가 많기 때문에,
+# 정규화된 질문을 키로 검색 결과를 재사용한다.
+tavily_cache = TTLCache(
+    name="tavily",
+    maxsize=int(os.getenv("TAVILY_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("TAVILY_CACHE_TTL", "600")),
+    sqlite_path=os.getenv("TAVILY_CACHE_SQLITE") or None,
+)
+
+def normalize_query(query: str) -> str:
+    """캐시 키로 사용하기 위해 질문 문자열을 정규화합니다. (유니코드 정규화, 소문자화, 공백 정리)"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", query)).strip().lower()
+
+class CachedTavilySearchResults(TavilySearchResults):
+    """검색 결과를 tavily_cache에 저장하고 재사용하는 TavilySearchResults입니다."""
+
+    def _cache_key(self, query: str) -> str:
+        # 검색 옵션이 다르면 결과도 달라지므로 키에 함께 포함한다.
+        return "|".join([
+            normalize_query(query),
+            str(self.max_results),
+            str(self.search_depth),
+            ",".join(sorted(self.include_domains or [])),
+            ",".join(sorted(self.exclude_domains or [])),
+            str(self.include_answer),
+            str(self.include_raw_content),
+        ])
+
+    def _run(self, query: str, run_manager=None):
+        key = self._cache_key(query)
+        if (cached := tavily_cache.get(key)) is not None:
+            logger.debug(f"Tavily 캐시 적중: '{query}' ({tavily_cache.stats})")
+            return tuple(cached)
+
+        content, artifact = super()._run(query, run_manager=run_manager)
+        # 에러가 발생하면 문자열(repr(e))과 빈 artifact가 반환되므로, 정상 결과만 캐시한다.
+        if artifact:
+            tavily_cache.set(key, [content, artifact])
+        logger.debug(f"Tavily 캐시 미스: '{query}' ({tavily_cache.stats})")
+        return content, artifact
+
 # 도구 생성
-tavily_search_tool = TavilySearchResults(
+tavily_search_tool = CachedTavilySearchResults(
     max_results=6,
     include_answer=True,
     include_raw_content=True,
@@ -32,9 +92,145 @@ tavily_search_tool = TavilySearchResults(
 
 tavily_search_tool_node = ToolNode([tavily_search_tool])
 
+# 웹 검색 결과 압축 설정
+PASSAGE_MAX_CHARS = 600         # 하나의 passage가 가질 수 있는 최대 문자 수
+WEB_CONTEXT_TOKEN_BUDGET = int(os.getenv("WEB_CONTEXT_TOKEN_BUDGET", "1500"))  # 생성 단계에 전달할 최대 토큰 수
+
+@lru_cache(maxsize=1)
+def get_token_encoding() -> tiktoken.Encoding:
+    """gpt-4o 계열 토크나이저(o200k_base)를 반환합니다.
+    처음 사용할 때 BPE 파일을 읽어야 하므로(없으면 다운로드), import 시점이 아니라 처음 호출될 때 한 번만 불러옵니다."""
+    return tiktoken.get_encoding("o200k_base")
+
+def split_passages(text: str, max_chars: int = PASSAGE_MAX_CHARS) -> list[str]:
+    """본문을 문단/문장 단위로 나누고, max_chars를 넘지 않도록 이어 붙여 passage 리스트로 반환합니다.
+
+    Args:
+        text (str): 분할할 본문
+        max_chars (int): passage 최대 길이
+
+    Returns:
+        list[str]: passage 리스트
+    """
+    sentences = []
+    for paragraph in re.split(r"\n\s*\n|\r?\n", text or ""):
+        paragraph = re.sub(r"\s+", " ", paragraph).strip()
+        if not paragraph:
+            continue
+        for sentence in re.split(r"(?<=[.!?。])\s+", paragraph):
+            # 문장 하나가 너무 길면 강제로 자른다.
+            sentences.extend(sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars))
+
+    passages = []
+    current = ""
+    for sentence in sentences:
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            passages.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        passages.append(current)
+    return passages
+
+def condense_web_results(question: str, results: list[dict], token_budget: int = WEB_CONTEXT_TOKEN_BUDGET) -> str:
+    """Tavily 검색 결과를 passage 단위로 나누고, 질문과 유사한 passage만 토큰 예산 안에서 골라 반환합니다.
+
+    Args:
+        question (str): 사용자의 질문
+        results (list[dict]): Tavily 검색 결과 리스트 (url, title, content, raw_content)
+        token_budget (int): 반환할 passage들의 최대 토큰 수
+
+    Returns:
+        str: URL별로 묶인 passage 리스트의 JSON 문자열
+    """
+    candidates: list[tuple[dict, str]] = []
+    for result in results:
+        text = result.get("raw_content") or result.get("content") or ""
+        candidates.extend((result, passage) for passage in split_passages(text))
+    if not candidates:
+        return json.dumps([], ensure_ascii=False)
+
+    # bge-m3 임베딩은 정규화되어 있으므로 내적이 곧 코사인 유사도
+    question_vector = model.encode(question, normalize_embeddings=True)
+    passage_vectors = model.encode([passage for _, passage in candidates], normalize_embeddings=True)
+    scores = passage_vectors @ question_vector
+
+    selected: dict[str, dict] = {}
+    used_tokens = 0
+    for index in np.argsort(-scores):
+        result, passage = candidates[index]
+        tokens = len(get_token_encoding().encode(passage))
+        if used_tokens + tokens > token_budget:
+            continue
+        used_tokens += tokens
+        entry = selected.setdefault(result.get("url", ""), {
+            "url": result.get("url", ""),
+            "title": result.get("title", ""),
+            "passages": [],
+        })
+        entry["passages"].append(passage)
+
+    logger.debug(f"웹 검색 결과 압축: passage {len(candidates)}개 중 "
+                 f"{sum(len(e['passages']) for e in selected.values())}개 선택 ({used_tokens} tokens)")
+    return json.dumps(list(selected.values()), ensure_ascii=False)
+
+
+# 키워드 검색 방식.
+# near_vector: 로컬 bge-m3로 키워드들을 하나의 질의 벡터로 임베딩해서 검색
+# near_text: Weaviate의 vectorizer 모듈로 검색
+# fusion: 키워드마다 별도로 벡터 검색을 동시에 실행하고, 결과를 reciprocal rank fusion으로 합침
+KEYWORD_SEARCH_MODE: Literal["near_vector", "near_text", "fusion"] = os.getenv("KEYWORD_SEARCH_MODE", "near_vector")
+RRF_K = 60  # reciprocal rank fusion 상수. 순위가 낮은 결과의 영향력을 완화한다.
+
+# 요청 마감 시각이 지나 검색을 중단했을 때 도구가 반환하는 메시지
+DEADLINE_EXCEEDED_MESSAGE = "검색 시간이 초과되어 추천할 활동을 가져오지 못했습니다."
+# 키워드 검색 도구에 비어 있지 않은 키워드가 하나도 전달되지 않았을 때 반환하는 메시지
+NO_KEYWORDS_MESSAGE = "검색할 키워드가 없어 추천할 활동을 찾지 못했습니다."
+
+# 검색 도구 내부의 독립적인 단계(MySQL 조회, 임베딩 계산 등)를 동시에 실행하기 위한 공용 스레드 풀
+retrieval_executor = ThreadPoolExecutor(max_workers=int(os.getenv("RETRIEVAL_EXECUTOR_WORKERS", "8")),
+                                        thread_name_prefix="retrieval")
+
+def submit_steps(user_id: bytes, **steps: Callable[[], Any]) -> dict[str, Future]:
+    """서로 독립적인 검색 단계들을 retrieval_executor에 제출하고, 단계 이름별 Future를 반환합니다.
+    결과를 기다리기 전에 다른 작업을 하거나, 일부 결과만 먼저 사용해야 할 때 사용합니다.
+    단계별 소요 시간을 로그에 남깁니다.
+
+    Args:
+        user_id (bytes): 로그에 표시할 사용자 id
+        **steps (Callable[[], Any]): 단계 이름과 실행할 함수
+
+    Returns:
+        dict[str, Future]: 단계 이름별 Future
+    """
+    def timed(name: str, func: Callable[[], Any]) -> Any:
+        step_start = time.perf_counter()
+        result = func()
+        logger.debug(f"[retrieval] user={user_id.hex()} step={name} elapsed={time.perf_counter() - step_start:.3f}s")
+        return result
+
+    return {name: retrieval_executor.submit(timed, name, func) for name, func in steps.items()}
+
+def run_concurrently(user_id: bytes, **steps: Callable[[], Any]) -> dict[str, Any]:
+    """서로 독립적인 검색 단계들을 retrieval_executor에서 동시에 실행하고, 단계 이름별 결과를 반환합니다.
+    단계별 소요 시간과 전체 소요 시간을 로그에 남깁니다.
+
+    Args:
+        user_id (bytes): 로그에 표시할 사용자 id
+        **steps (Callable[[], Any]): 단계 이름과 실행할 함수
+
+    Returns:
+        dict[str, Any]: 단계 이름별 결과
+    """
+    start = time.perf_counter()
+    futures = submit_steps(user_id, **steps)
+    results = {name: future.result() for name, future in futures.items()}
+    logger.debug(f"[retrieval] user={user_id.hex()} steps={list(steps)} total={time.perf_counter() - start:.3f}s")
+    return results
 
 def get_user_customized_embedding(user_id: bytes) -> Optional[list[float]]:
-    vectors_of_user_history = [embed(row['activity_content']) for row in run_query("""
+    contents = [row['activity_content'] for row in run_query("""
         SELECT activity_content
         FROM activities
         WHERE activity_id IN (
@@ -44,7 +240,11 @@ def get_user_customized_embedding(user_id: bytes) -> Optional[list[float]]:
         );
     """, (user_id,)) if row['activity_content'] and isinstance(row['activity_content'], str)]
 
-    return np.mean(np.array(vectors_of_user_history), axis=0).tolist() if vectors_of_user_history else None
+    if not contents:
+        return None
+    # 리뷰한 활동들을 한 번의 배치로 임베딩한다.
+    vectors_of_user_history = embed(contents)
+    return np.mean(np.array(vectors_of_user_history), axis=0).tolist()
 
 def get_user_history(user_id: bytes):
     return [row['activity_id'] for row in run_query("""
@@ -53,19 +253,132 @@ def get_user_history(user_id: bytes):
         WHERE user_id = %s;
     """, (user_id,))]
 
-def generate_documents(weaviate_response, limit:int=10) -> list[Document]:
-    documents = []
-    for i, obj in enumerate(weaviate_response.objects):
-        if i >= limit:
+# 검색 결과 캐시. 키는 (사용자, 검색 방식, 정규화된 질의)이다.
+# 벡터스토어 동기화가 끝날 때마다 증가하는 generation이 바뀌었거나, 사용자의 리뷰 이력이 바뀌었으면 캐시를 사용하지 않는다.
+retrieval_cache = TTLCache(
+    name="retrieval",
+    maxsize=int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("RETRIEVAL_CACHE_TTL", "86400")),
+)
+retrieval_cache_metrics: dict[str, float] = {
+    "stale_generation": 0,      # 동기화 generation이 바뀌어 버려진 항목 수
+    "stale_history": 0,         # 리뷰 이력이 바뀌어 버려진 항목 수
+    "hit_age_seconds_total": 0.0,   # 적중한 항목들의 나이(초) 합계
+}
+# 여러 요청 스레드가 동시에 지표를 갱신하므로 잠금 안에서만 읽고 쓴다.
+retrieval_cache_metrics_lock = threading.Lock()
+
+def record_cache_metric(name: str, value: float = 1) -> None:
+    with retrieval_cache_metrics_lock:
+        retrieval_cache_metrics[name] += value
+
+def history_fingerprint(history_ids: list[bytes]) -> str:
+    """리뷰 이력의 변경 여부를 판단하기 위한 지문(정렬된 activity_id의 해시)을 반환합니다."""
+    return hashlib.sha1(b"".join(sorted(aid for aid in history_ids if isinstance(aid, bytes)))).hexdigest()
+
+def normalize_keywords(query: list[str]) -> list[str]:
+    """검색 키워드의 공백을 정리하고, 비어 있거나 문자열이 아닌 항목과 중복을 제거합니다."""
+    return list(dict.fromkeys(" ".join(keyword.split()) for keyword in query
+                              if isinstance(keyword, str) and keyword.strip()))
+
+def retrieval_cache_key(user_id: bytes, mode: str, query: Optional[list[str]] = None) -> str:
+    normalized = "\x1f".join(sorted(normalize_query(q) for q in query or [] if q.strip()))
+    return f"{user_id.hex()}|{mode}|{normalized}"
+
+def get_cached_retrieval(user_id: bytes, key: str, history_ids: list[bytes]) -> Optional[str]:
+    """유효한 캐시 항목이 있으면 검색 결과 문자열을 반환합니다.
+    리뷰 이력이 바뀌었으면 해당 사용자의 모든 캐시 항목을 무효화합니다."""
+    entry = retrieval_cache.get(key)
+    if entry is None:
+        return None
+    if entry["generation"] != get_state(SYNC_GENERATION_KEY, 0):
+        retrieval_cache.invalidate(key)
+        record_cache_metric("stale_generation")
+        return None
+    if entry["history"] != history_fingerprint(history_ids):
+        invalidate_user_retrievals(user_id)
+        record_cache_metric("stale_history")
+        return None
+    record_cache_metric("hit_age_seconds_total", time.time() - entry["created_at"])
+    return entry["message"]
+
+def set_cached_retrieval(key: str, history_ids: list[bytes], message: str) -> None:
+    retrieval_cache.set(key, {
+        "generation": get_state(SYNC_GENERATION_KEY, 0),
+        "history": history_fingerprint(history_ids),
+        "message": message,
+        "created_at": time.time(),
+    })
+
+def invalidate_user_retrievals(user_id: bytes) -> int:
+    """사용자의 리뷰 이력이 바뀌었을 때, 해당 사용자의 검색 결과 캐시를 모두 삭제합니다."""
+    return retrieval_cache.invalidate_prefix(f"{user_id.hex()}|")
+
+def retrieval_cache_stats() -> dict[str, Any]:
+    """검색 결과 캐시의 적중/미스 통계와 staleness 지표를 반환합니다."""
+    with retrieval_cache_metrics_lock:
+        stats = retrieval_cache.stats | retrieval_cache_metrics
+    hits = stats["hits"] + stats["disk_hits"]
+    stats["mean_hit_age_seconds"] = stats["hit_age_seconds_total"] / hits if hits else 0.0
+    stats["generation"] = get_state(SYNC_GENERATION_KEY, 0)
+    return stats
+
+def reciprocal_rank_fusion(result_lists: list[list], k: int = RRF_K) -> list:
+    """여러 검색 결과 리스트를 reciprocal rank fusion으로 합치고, activity_id 기준으로 중복을 제거합니다.
+
+    Args:
+        result_lists (list[list]): 검색별 Weaviate 객체 또는 속성 dict 리스트 (각각 유사도 순으로 정렬됨)
+        k (int): RRF 상수
+
+    Returns:
+        list: 합산 점수 순으로 정렬된 Weaviate 객체 또는 속성 dict 리스트
+    """
+    scores: dict[str, float] = {}
+    objects: dict[str, Any] = {}
+    for results in result_lists:
+        for rank, obj in enumerate(results, start=1):
+            properties = obj if isinstance(obj, dict) else obj.properties
+            key = properties.get("activity_id") or str(obj.uuid)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            objects.setdefault(key, obj)
+    return [objects[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+def select_results(weaviate_objects, limit: int, excluded_ids: Optional[set[str]] = None) -> list:
+    """검색 결과에서 제외할 활동을 빼고 앞에서부터 limit개를 고릅니다."""
+    selected = []
+    for obj in weaviate_objects:
+        if len(selected) >= limit:
             break
-        page_content = obj.properties.get("activity_content") or ""
+        properties = obj if isinstance(obj, dict) else obj.properties
+        if excluded_ids and properties.get("activity_id") in excluded_ids:
+            continue
+        selected.append(obj)
+    return selected
+
+def fill_result_snippets(weaviate_objects) -> None:
+    """최종 결과 중 요약문이 없는 Weaviate 객체만 본문을 조회해서 요약문을 채웁니다.
+    요약문은 동기화 때 채워지므로(backfill), 대부분의 경우 아무 질의도 하지 않습니다."""
+    missing = [obj for obj in weaviate_objects if not isinstance(obj, dict) and not obj.properties.get("activity_snippet")]
+    if not missing:
+        return
+    with WeaviateClientContext() as client:
+        fill_missing_snippets(client.collections.get(weaviate_index_name), missing)
+
+def generate_documents(weaviate_objects, limit:int=10, excluded_ids: Optional[set[str]] = None) -> list[Document]:
+    """Weaviate 객체(또는 사전 계산된 추천의 속성 dict) 리스트로부터 Document 리스트를 만듭니다."""
+    documents = []
+    for obj in select_results(weaviate_objects, limit, excluded_ids):
+        properties = obj if isinstance(obj, dict) else obj.properties
+        # 적재 시점에 만들어 둔 요약문을 사용하고, 요약문이 없는 과거 객체만 본문에서 즉석으로 만든다.
+        page_content = (properties.get("activity_snippet")
+                        or build_activity_snippet(properties.get("activity_content")))
         metadata = {
-            "activity name": obj.properties.get("activity_name"),
-            "activity type": obj.properties.get("activity_type"),
-            "site url": obj.properties.get("url"),
-            "keyword": obj.properties.get("keyword"),
-            "start date": obj.properties.get("start_date"),
-            "end date": obj.properties.get("end_date"),
+            "activity name": properties.get("activity_name"),
+            "activity type": properties.get("activity_type"),
+            "site url": properties.get("url"),
+            "keyword": properties.get("keyword"),
+            "start date": properties.get("start_date"),
+            "end date": properties.get("end_date"),
         }
         documents.append(Document(page_content=page_content, metadata=metadata))
     return documents
@@ -74,21 +387,8 @@ class Tools:
     def build_retriever_tool(self: 'Bot'):
         user_id:bytes = self.id
 
-        def _build_exclusion_filter(history_ids: list[bytes]) -> Optional[Filter]:
-            """
-            사용자가 이미 리뷰한 activity_id를 제외하는 Weaviate 필터를 생성합니다.
-            """
-            filters = []
-            for activity_id in history_ids:
-                if activity_id and isinstance(activity_id, bytes):
-                    # Weaviate에 저장된 activity_id는 16진수 문자열이므로 hex()로 변환
-                    filters.append(
-                        Filter.by_property("activity_id").not_equal(activity_id.hex())
-                    )
-            return Filter.all_of(filters) if filters else None
-
         @tool
-        def retrieve_by_keyword(query: list[str]) -> str:
+        def retrieve_by_keyword(query: list[str], config: RunnableConfig) -> str:
             """
             Retrieves a list of recommended activity documents for a specific user based on a natural language keyword query.
 
@@ -102,32 +402,90 @@ class Tools:
 
             Args:
                 query (list[str]): List of keyword strings for the search.
+                config (RunnableConfig): Runtime config carrying the request deadline (injected automatically).
             Returns:
                 str: A concatenated string of XML-formatted <document> blocks containing context and metadata for each activity.
             """
             limit = 10
-            user_history_ids = get_user_history(user_id)
+            # LLM이 빈 문자열만 넘기는 경우가 있으므로, 어떤 검색도 하기 전에 키워드를 검증한다.
+            keywords = normalize_keywords(query)
+            if not keywords:
+                logger.warning(f"사용자(uuid: {user_id})의 키워드 검색에 유효한 키워드가 없습니다: {query!r}")
+                return NO_KEYWORDS_MESSAGE
+            engine = get_retrieval_engine()
+            # 로컬 엔진에는 vectorizer가 없으므로 near_text 대신 near_vector로 검색한다.
+            mode = "near_vector" if KEYWORD_SEARCH_MODE == "near_text" and engine.name == "local" else KEYWORD_SEARCH_MODE
+            steps = {"history": lambda: get_user_history(user_id)}
+            if mode == "near_vector":
+                # 원격 vectorizer를 거치지 않도록 질의 벡터를 로컬에서 계산한다.
+                steps["query_vector"] = lambda: embed_keywords(keywords)
+            elif mode == "fusion":
+                steps["query_vectors"] = lambda: [list(embed_cached(keyword)) for keyword in keywords]
+            # 캐시 유효성 검사에는 리뷰 이력이 필요하므로, 이력 조회와 질의 임베딩을 함께 시작하고 이력만 먼저 기다린다.
+            # 캐시에 적중하면 임베딩 결과는 쓰지 않지만, 키워드별 임베딩 캐시(embed_cached)에 남아 다음 검색에서 재사용된다.
+            start = time.perf_counter()
+            futures = submit_steps(user_id, **steps)
+            user_history_ids = futures["history"].result()
+            cache_key = retrieval_cache_key(user_id, f"keyword:{KEYWORD_SEARCH_MODE}", keywords)
+            if (cached := get_cached_retrieval(user_id, cache_key, user_history_ids)) is not None:
+                logger.debug(f"검색 결과 캐시 적중: {retrieval_cache_stats()}")
+                return cached
+
+            results = {name: future.result() for name, future in futures.items()}
+            logger.debug(f"[retrieval] user={user_id.hex()} steps={list(steps)} total={time.perf_counter() - start:.3f}s")
+            if mode == "near_vector" and results["query_vector"] is None:
+                # 질의 벡터를 만들지 못하면 Weaviate의 vectorizer(near_text)로 검색하고, 로컬 엔진이면 검색하지 않는다.
+                if engine.name == "local":
+                    return NO_KEYWORDS_MESSAGE
+                mode = "near_text"
+
             logger.info(f"사용자(uuid: {user_id})가 이미 본 {len(user_history_ids)}개의 활동을 제외합니다.")
-            exclusion_filter = _build_exclusion_filter(user_history_ids)
+            if remaining_time(config) == 0:
+                return DEADLINE_EXCEEDED_MESSAGE
 
-            with WeaviateClientContext() as client:
-                collection = client.collections.get(weaviate_index_name)
-                response = collection.query.near_text(
-                    query=query,
-                    filters=exclusion_filter,
-                    limit=limit,
-                )
+            excluded_ids = set()
+            # 다음 동기화에서 아카이브로 옮겨지기 전이라도, 이미 종료된 활동은 추천하지 않는다.
+            now = datetime.now(timezone.utc)
+            if mode == "fusion":
+                # 키워드마다 별도의 벡터 검색을 동시에 실행하고 RRF로 합친다.
+                searches = {
+                    f"search_{i}": (lambda vector=vector: engine.search(vector, limit, user_history_ids, ends_after=now))
+                    for i, vector in enumerate(results["query_vectors"])
+                }
+                weaviate_objects = reciprocal_rank_fusion(list(run_concurrently(user_id, **searches).values()))
+            elif mode == "near_vector":
+                weaviate_objects = engine.search(results["query_vector"], limit, user_history_ids, ends_after=now)
+            else:
+                exclusion_filter, query_limit, excluded_ids = plan_exclusion(user_history_ids, limit)
+                with WeaviateClientContext() as client:
+                    collection = client.collections.get(weaviate_index_name)
+                    weaviate_objects = fetch_until_filled(
+                        lambda page_limit, offset: collection.query.near_text(
+                            query=keywords,
+                            filters=exclusion_filter,
+                            limit=page_limit,
+                            offset=offset,
+                            return_properties=RETRIEVAL_PROPERTIES,
+                            include_vector=False,
+                        ).objects,
+                        limit, query_limit + ENDED_OVERFETCH,
+                        keep=lambda obj: obj.properties.get("activity_id") not in excluded_ids
+                        and is_live_activity(obj.properties, now),
+                    )
 
-            documents = generate_documents(response, limit)
+            weaviate_objects = select_results(weaviate_objects, limit, excluded_ids)
+            fill_result_snippets(weaviate_objects)
+            documents = generate_documents(weaviate_objects, limit)
             message = "\n\n".join(
                 f"<document><context>{doc.page_content}</context>"
                 f"<metadata>{dict_to_xml(doc.metadata)}</metadata></document>"
                 for doc in documents
             )
+            set_cached_retrieval(cache_key, user_history_ids, message)
             return message
 
         @tool
-        def retrieve_by_history() -> str:
+        def retrieve_by_history(config: RunnableConfig) -> str:
             """
             Retrieves a personalized list of recommended activity documents for a specific user based on their vector profile.
 
@@ -140,32 +498,44 @@ class Tools:
 
             Intended for use by agents needing to provide activity suggestions to users based on historical preferences.
 
+            Args:
+                config (RunnableConfig): Runtime config carrying the request deadline (injected automatically).
             Returns:
                 str: A concatenated string of XML-formatted <document> blocks containing context and metadata for each activity.
             """
             limit = 10
+            # 캐시 유효성 검사와 사전 계산된 추천 필터링에 리뷰 이력이 필요하므로 이력을 먼저 조회한다.
             user_history_ids = get_user_history(user_id)
-            logger.info(f"사용자(uuid: {user_id})가 이미 본 {len(user_history_ids)}개의 활동을 제외합니다.")
-            exclusion_filter = _build_exclusion_filter(user_history_ids)
+            cache_key = retrieval_cache_key(user_id, "history")
+            if (cached := get_cached_retrieval(user_id, cache_key, user_history_ids)) is not None:
+                logger.debug(f"검색 결과 캐시 적중: {retrieval_cache_stats()}")
+                return cached
+
+            # 야간 배치로 미리 계산된 추천이 있으면 그대로 사용하고, 없을 때만 사용자 벡터를 계산해서 실시간으로 검색한다.
+            if precomputed := get_precomputed_recommendations(user_id, user_history_ids, limit):
+                logger.debug(f"사용자(uuid: {user_id})의 사전 계산된 추천을 사용합니다.")
+                weaviate_objects, excluded_ids = precomputed, set()
+            else:
+                logger.info(f"사용자(uuid: {user_id})가 이미 본 {len(user_history_ids)}개의 활동을 제외합니다.")
+                excluded_ids = set()
 
-            user_vector = get_user_customized_embedding(user_id)
-            if not user_vector:
-                return "사용자 이력이 없어 추천할 활동이 없습니다."
+                user_vector = get_user_customized_embedding(user_id)
+                if not user_vector:
+                    return "사용자 이력이 없어 추천할 활동이 없습니다."
+                if remaining_time(config) == 0:
+                    return DEADLINE_EXCEEDED_MESSAGE
 
-            with WeaviateClientContext() as client:
-                collection = client.collections.get(weaviate_index_name)
-                response = collection.query.near_vector(
-                    near_vector=user_vector,
-                    filters=exclusion_filter,
-                    limit=limit,
-                )
+                weaviate_objects = get_retrieval_engine().search(user_vector, limit, user_history_ids,
+                                                                 ends_after=datetime.now(timezone.utc))
+                fill_result_snippets(weaviate_objects)
 
-            documents = generate_documents(response, limit)
+            documents = generate_documents(weaviate_objects, limit, excluded_ids)
             message = "\n\n".join(
                 f"<document><metadata>{dict_to_xml(doc.metadata)}</metadata>"
                 f"<context>{doc.page_content}</context></document>"
                 for doc in documents
             )
+            set_cached_retrieval(cache_key, user_history_ids, message)
             return message
 
         return retrieve_by_keyword, retrieve_by_history
\ No newline at end of file
@@ -1,36 +1,119 @@
+import atexit
+import hashlib
+import itertools
+import json
+import math
 import os
+import re
+import sys
+import time
+from functools import lru_cache
+from os.path import join
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timezone
 from uuid import UUID
 import typing
-from contextlib import contextmanager
-from typing import Any
+from typing import Any, Iterator
 
+import numpy as np
 from langchain_community.document_loaders import SQLDatabaseLoader
 from langchain_community.utilities import SQLDatabase
-from sqlalchemy import create_engine, select, MetaData, Table, bindparam
+from langchain_core.documents import Document
+from sqlalchemy import create_engine, select, MetaData, Table, bindparam, literal_column
+from sqlalchemy.engine import Engine
 
 if typing.TYPE_CHECKING:
     from .bot import Bot
 
 from typing import Optional
 
-from langchain_weaviate import WeaviateVectorStore
 from weaviate.classes.config import Configure, Property, DataType
 from weaviate.classes.query import Filter
 from weaviate.client import WeaviateClient
+from weaviate.util import generate_uuid5
 
 from server.logger import logger
-from .constants import weaviate_index_name, model
-from .weaviate import connect_weaviate, WeaviateClientContext
+from .constants import weaviate_index_name, weaviate_archive_index_name, model
+from .weaviate import WeaviateClientContext
 
 from server.db import run_query
+from .syncstate import (
+    commit_chunk, create_job, get_job, get_job_chunk, get_state, get_unfinished_job, increment_state,
+    set_job_state, set_state, SyncGuard, sync_guard, tracking_job,
+)
 
 load_dotenv()
 
+SNIPPET_MAX_CHARS = 400    # 추천 프롬프트에 들어갈 활동 요약문의 최대 길이
+
+@lru_cache(maxsize=1)
+def get_sql_engine() -> Engine:
+    """동기화용 SQLAlchemy 엔진을 반환합니다. 프로세스에서 한 번만 만들고 커넥션 풀을 공유합니다."""
+    host = os.getenv('MYSQL_DB_HOST')
+    username = os.getenv('MYSQL_DB_USER')
+    password = os.getenv('MYSQL_DB_PASSWORD')
+    database = os.getenv('MYSQL_DB_NAME')
+
+    engine = create_engine(
+        f"mysql+pymysql://{username}:{password}@{host}/{database}",
+        pool_size=int(os.getenv("SQL_POOL_SIZE", "5")),
+        pool_pre_ping=True,  # 오래 쉬고 있던 커넥션이 끊겼으면 다시 연결
+        pool_recycle=3600,
+        future=True
+    )
+    atexit.register(engine.dispose)
+    return engine
+
+@lru_cache(maxsize=1)
+def get_sql_database() -> SQLDatabase:
+    """공유 엔진을 사용하는 SQLDatabase를 반환합니다. 생성할 때 모든 테이블을 반영(reflect)하지 않도록 지연 반영을 사용합니다."""
+    return SQLDatabase(get_sql_engine(), include_tables=["activities"], lazy_table_reflection=True)
+
+@lru_cache(maxsize=1)
+def get_activities_table() -> Table:
+    """activities 테이블 메타정보를 반환합니다. 처음 한 번만 DB에서 읽어 옵니다."""
+    return Table("activities", MetaData(), autoload_with=get_sql_engine())
+
 def get_page_content(row) -> str:
     return str(row["activity_content"])
 
+def build_activity_snippet(content: Optional[str], max_chars: int = SNIPPET_MAX_CHARS) -> str:
+    """활동 본문으로부터 추천 프롬프트에 사용할 길이 제한된 요약문(snippet)을 만듭니다.
+
+    UNV 활동처럼 '[섹션명] : 내용' 형식으로 이어 붙여진 본문은 섹션마다 앞부분을 고르게 잘라 담고,
+    그 외의 본문(1365의 <pre> 블록 등)은 문장 경계에서 max_chars 이내로 자릅니다.
+
+    Args:
+        content (Optional[str]): 활동 본문
+        max_chars (int): 요약문 최대 길이
+
+    Returns:
+        str: 요약문
+    """
+    text = re.sub(r"<[^>]+>", " ", content or "")
+    text = re.sub(r"\s+", " ", text).strip()
+    if len(text) <= max_chars:
+        return text
+
+    def truncate(value: str, limit: int) -> str:
+        if len(value) <= limit:
+            return value
+        cut = value[:limit]
+        # 가능하면 마지막 문장 경계에서 자른다.
+        boundary = max(cut.rfind(". "), cut.rfind("다. "), cut.rfind("! "), cut.rfind("? "))
+        if boundary > limit // 2:
+            cut = cut[:boundary + 1]
+        return cut.rstrip() + "…"
+
+    sections = [(label.strip(), body.strip())
+                for label, body in re.findall(r"\[([^\]]+)\]\s*:\s*(.*?)(?=\[[^\]]+\]\s*:|$)", text)
+                if body.strip()]
+    if sections:
+        per_section = max(max_chars // len(sections) - 4, 40)
+        return " / ".join(f"{label}: {truncate(body, per_section)}" for label, body in sections)[:max_chars]
+
+    return truncate(text, max_chars)
+
 metadata_mapping = {
     "activity_id": "activity_id",
     "activity_name": "activity_name",
@@ -39,8 +122,14 @@ metadata_mapping = {
     "keyword": "keyword",
     "start_date": "start_date",
     "end_date": "end_date",
+    "content_hash": "content_hash",
 }
 
+# 활동 내용 해시. MySQL에서 계산해서 Weaviate 속성으로 저장하고, 전체 동기화 때 비교해서 수정된 활동을 찾는다.
+# 적재할 때와 비교할 때 같은 SQL 식을 쓰므로 두 값이 항상 같은 방식으로 계산된다.
+CONTENT_HASH_COLUMNS = ["activity_name", "activity_type", "activity_content", "keyword", "site_url", "start_date", "end_date"]
+CONTENT_HASH_SQL = f"MD5(CONCAT_WS(CHAR(31), {', '.join(f'COALESCE({c}, CHAR(0))' for c in CONTENT_HASH_COLUMNS)}))"
+
 def get_metadata(row) -> dict[str, Any]:
     metadata = {}
 
@@ -55,31 +144,214 @@ def get_metadata(row) -> dict[str, Any]:
             else:
                 metadata[new_key] = v
 
+    # 추천 프롬프트용 요약문은 적재 시점에 한 번만 만들어 함께 저장한다.
+    metadata["activity_snippet"] = build_activity_snippet(row.get("activity_content"))
+
     return metadata
 
+# 최초 스키마의 속성
+ACTIVITY_PROPERTIES = [
+    Property(name="activity_id", data_type=DataType.TEXT),
+    Property(name="activity_name", data_type=DataType.TEXT),
+    Property(name="activity_type", data_type=DataType.TEXT),
+    Property(name="activity_content", data_type=DataType.TEXT),
+    Property(name="keyword", data_type=DataType.TEXT),
+    Property(name="url", data_type=DataType.TEXT),
+    Property(name="start_date", data_type=DataType.DATE),
+    Property(name="end_date", data_type=DataType.DATE),
+]
+
+# 최초 스키마 이후에 추가된 속성. 기존 컬렉션에는 register_schema 호출 시 자동으로 추가된다.
+ADDED_PROPERTIES = [
+    # 추천 프롬프트용 요약문. 검색 벡터에 영향을 주지 않도록 벡터화에서 제외한다.
+    Property(name="activity_snippet", data_type=DataType.TEXT, skip_vectorization=True),
+    # 수정 감지용 활동 내용 해시(CONTENT_HASH_SQL).
+    Property(name="content_hash", data_type=DataType.TEXT, skip_vectorization=True),
+]
+
+# 검색 결과에서 실제로 사용하는 속성. 용량이 큰 activity_content와 벡터는 가져오지 않는다.
+RETRIEVAL_PROPERTIES = [
+    "activity_id",
+    "activity_name",
+    "activity_type",
+    "activity_snippet",
+    "url",
+    "keyword",
+    "start_date",
+    "end_date",
+]
+
+def fill_missing_snippets(collection, weaviate_objects) -> None:
+    """activity_snippet 속성이 생기기 전에 적재된 객체에 한해, 본문을 따로 조회해서 요약문을 채웁니다.
+
+    Args:
+        collection: Weaviate 컬렉션
+        weaviate_objects: 검색 결과 Weaviate 객체 리스트 (properties가 직접 수정됨)
+    """
+    missing = {obj.uuid: obj for obj in weaviate_objects if not obj.properties.get("activity_snippet")}
+    if not missing:
+        return
+    response = collection.query.fetch_objects(
+        filters=Filter.by_id().contains_any(list(missing)),
+        limit=len(missing),
+        return_properties=["activity_content"],
+        include_vector=False,
+    )
+    for obj in response.objects:
+        if obj.uuid in missing:
+            missing[obj.uuid].properties["activity_snippet"] = build_activity_snippet(obj.properties.get("activity_content"))
+
+# 전체 스캔 시 한 번에 가져올 객체 수. fetch_objects의 limit 최대값(QUERY_MAXIMUM_RESULTS, 기본 10000)보다 작아야 한다.
+SCAN_PAGE_SIZE = int(os.getenv("WEAVIATE_SCAN_PAGE_SIZE", "1000"))
+
+def iterate_activity_ids(collection, page_size: int = SCAN_PAGE_SIZE) -> Iterator[tuple[UUID, Optional[str], Optional[str]]]:
+    """컬렉션의 모든 객체를 uuid 커서(after=) 방식으로 페이지 단위로 순회하며 (uuid, activity_id, content_hash)를 반환합니다.
+    한 페이지만 메모리에 올리므로 컬렉션 크기와 무관하게 메모리 사용량이 일정하고, 10000개 제한도 받지 않습니다.
+
+    Args:
+        collection: Weaviate 컬렉션
+        page_size (int): 한 번의 요청으로 가져올 객체 수
+
+    Yields:
+        tuple[UUID, Optional[str], Optional[str]]: 객체의 uuid, activity_id, 내용 해시 (해시가 생기기 전에 적재된 객체는 None)
+    """
+    start = time.perf_counter()
+    cursor, count = None, 0
+    while True:
+        objects = collection.query.fetch_objects(
+            after=cursor,
+            limit=page_size,
+            return_properties=["activity_id", "content_hash"],  # 비교에는 uuid, activity_id, 해시만 필요하다.
+            include_vector=False,
+        ).objects
+        for obj in objects:
+            props = obj.properties or {}
+            yield obj.uuid, props.get("activity_id"), props.get("content_hash")
+        count += len(objects)
+        if len(objects) < page_size:
+            break
+        cursor = objects[-1].uuid
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Weaviate 전체 스캔: {count}개, {elapsed:.1f}s ({count / elapsed if elapsed else 0:.0f} objects/s)")
+
+# 동기화가 끝날 때마다 증가하는 generation 번호의 상태 키. 검색 결과 캐시 무효화에 사용된다.
+SYNC_GENERATION_KEY = "vectorstore_generation"
+
+# 증분 동기화 설정. 워터마크는 마지막으로 동기화한 행의 (created_at, activity_id)이다.
+# 키셋 페이지네이션이 인덱스를 타도록 activities에 (created_at, activity_id) 복합 인덱스가 있어야 한다.
+SYNC_WATERMARK_KEY = "vectorstore_watermark"
+LAST_FULL_SYNC_KEY = "vectorstore_last_full_sync"
+# activity_snippet과 content_hash가 생기기 전에 적재된 객체는 해시가 없으므로 전체 동기화에서 다시 적재되어 요약문이 채워진다.
+# 이 키가 없으면(요약문 backfill을 한 번도 하지 않았으면) 주기와 관계없이 다음 동기화를 전체 동기화로 실행한다.
+SNIPPET_BACKFILL_KEY = "vectorstore_snippet_backfill"
+FULL_SYNC_INTERVAL = float(os.getenv("VECTORSTORE_FULL_SYNC_INTERVAL", str(7 * 24 * 3600)))  # 전체 재조정 주기(초)
+INCREMENTAL_SYNC_CHUNK_SIZE = int(os.getenv("VECTORSTORE_SYNC_CHUNK_SIZE", "500"))
+
+# 보관(retention) 설정. 종료일이 지난 활동은 검색 대상 컬렉션에서 아카이브 컬렉션으로 옮긴다.
+# 종료일이 없는 활동은 계속 진행 중인 것으로 본다. get_metadata가 end_date를 UTC로 저장하므로 UTC 기준으로 비교한다.
+LIVE_ACTIVITY_SQL = "(end_date IS NULL OR end_date >= UTC_TIMESTAMP())"
+RETENTION_PAGE_SIZE = 500
+HOT_INDEX_HISTORY_KEY = "vectorstore_hot_index_size"
+HOT_INDEX_HISTORY_SIZE = 90
+
+
+def is_live_activity(properties: dict[str, Any], now: datetime) -> bool:
+    """LIVE_ACTIVITY_SQL과 같은 조건으로, 종료일이 없거나 now 이후에 끝나는 활동이면 True를 반환합니다.
+    end_date는 Weaviate 객체의 datetime이거나, 사전 계산된 추천에 저장된 ISO 형식 문자열일 수 있습니다."""
+    end_date = properties.get("end_date")
+    if not end_date:
+        return True
+    if isinstance(end_date, str):
+        end_date = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
+    if end_date.tzinfo is None:
+        end_date = end_date.replace(tzinfo=timezone.utc)
+    return end_date >= now
+
+# 배치 적재 설정
+DELETE_CHUNK_SIZE = 500  # delete_many 한 번에 삭제할 id 수
+LOADER_IDS_PER_QUERY = 5000  # MySQL 로더 질의 하나의 IN 절에 담을 최대 id 수
+INGEST_LOAD_CHUNK_SIZE = int(os.getenv("WEAVIATE_INGEST_LOAD_CHUNK_SIZE", "1000"))  # 한 번에 임베딩해서 적재할 활동 수
+INGEST_BATCH_SIZE = int(os.getenv("WEAVIATE_INGEST_BATCH_SIZE", "100"))  # Weaviate 배치 요청 하나에 담을 객체 수
+INGEST_CONCURRENCY = int(os.getenv("WEAVIATE_INGEST_CONCURRENCY", "4"))  # 동시에 보낼 배치 요청 수
+INGEST_MAX_RETRIES = int(os.getenv("WEAVIATE_INGEST_MAX_RETRIES", "3"))  # 실패한 객체를 다시 보낼 최대 횟수
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+
+def activity_uuid(activity_id: str) -> str:
+    """activity_id(16진수 문자열)로부터 항상 같은 Weaviate 객체 uuid를 만듭니다."""
+    return generate_uuid5(activity_id, weaviate_index_name)
+
+def ingest_documents(collection, docs: list[Document]) -> int:
+    """문서 본문을 로컬 bge-m3 모델로 한꺼번에 임베딩하고, 벡터를 직접 지정해서 Weaviate에 배치로 적재합니다.
+    벡터를 함께 보내므로 Weaviate가 객체마다 원격 HuggingFace vectorizer를 호출하지 않습니다.
+    객체 uuid는 activity_id로부터 결정적으로 만들기 때문에 같은 활동을 다시 적재하면 덮어쓰기(upsert)가 되고,
+    실패한 객체를 재시도하거나 동기화가 동시에 실행되어도 중복 객체가 생기지 않습니다.
+    실패한 객체는 INGEST_MAX_RETRIES번까지 다시 보냅니다.
+
+    Args:
+        collection: Weaviate 컬렉션
+        docs (list[Document]): 적재할 문서 리스트 (page_content는 활동 본문, metadata는 get_metadata의 결과)
+
+    Returns:
+        int: 적재에 성공한 문서 수
+    """
+    start = time.perf_counter()
+    vectors = model.encode([doc.page_content for doc in docs], normalize_embeddings=True, batch_size=EMBEDDING_BATCH_SIZE)
+    embedded = time.perf_counter()
+
+    inserted = insert_objects(collection, [
+        ({**doc.metadata, "activity_content": doc.page_content}, vector.tolist(), activity_uuid(doc.metadata["activity_id"]))
+        for doc, vector in zip(docs, vectors)
+    ])
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Weaviate 적재: {inserted}/{len(docs)}개, {elapsed:.1f}s "
+                f"(임베딩 {embedded - start:.1f}s, {inserted / elapsed if elapsed else 0:.1f} docs/s)")
+    return inserted
+
+def insert_objects(collection, pending: list[tuple[dict[str, Any], list[float], str]]) -> int:
+    """(properties, vector, uuid) 목록을 Weaviate에 동시 fixed-size 배치로 적재합니다.
+    실패한 객체는 같은 uuid로 INGEST_MAX_RETRIES번까지 다시 보내고, 그래도 실패한 객체는 로그로 남깁니다.
+
+    Args:
+        collection: Weaviate 컬렉션
+        pending (list[tuple[dict[str, Any], list[float], str]]): 적재할 (속성, 벡터, uuid) 목록
+
+    Returns:
+        int: 적재에 성공한 객체 수
+    """
+    total = len(pending)
+    for attempt in range(INGEST_MAX_RETRIES + 1):
+        if attempt:
+            logger.warning(f"Weaviate 적재 실패 {len(pending)}개 재시도 ({attempt}/{INGEST_MAX_RETRIES})")
+            time.sleep(2 ** attempt)
+        with collection.batch.fixed_size(batch_size=INGEST_BATCH_SIZE, concurrent_requests=INGEST_CONCURRENCY) as batch:
+            for properties, vector, uuid in pending:
+                batch.add_object(properties=properties, vector=vector, uuid=uuid)
+        failed = collection.batch.failed_objects
+        pending = [(f.object_.properties, f.object_.vector, f.object_.uuid) for f in failed]
+        if not pending:
+            break
+
+    for f in failed:
+        logger.error(f"Failed to insert documents into weaviate: {f.message} "
+                     f"(activity_id: {f.object_.properties.get('activity_id')})")
+
+    return total - len(pending)
+
+def save_watermark(created_at: datetime, activity_id: bytes) -> None:
+    """마지막으로 동기화한 행의 (created_at, activity_id)를 워터마크로 저장합니다."""
+    set_state(SYNC_WATERMARK_KEY, {"created_at": created_at.isoformat(), "activity_id": activity_id.hex()})
+
 class VectorStoreMethods:
     """Weaviate 벡터스토어 연동 및 동기화 관련 메서드를 제공하는 클래스입니다."""
 
     @staticmethod
-    def get_vectorstore(weaviate_client: Optional[WeaviateClient] = None) -> WeaviateVectorStore:
-        """Weaviate 벡터스토어 인스턴스를 반환합니다.
-
-        Args:
-            weaviate_client (Optional[WeaviateClient]): 외부에서 전달받은 클라이언트 (없으면 새로 연결)
-
-        Returns:
-            WeaviateVectorStore: 벡터스토어 인스턴스
-        """
-        # 먼저 스키마 등록
+    def ensure_schema() -> None:
+        """공유 Weaviate 클라이언트로 스키마가 등록되어 있는지 확인하고, 없으면 등록합니다."""
         with WeaviateClientContext() as client:
             VectorStoreMethods.register_schema(client)
 
-        return WeaviateVectorStore(
-            client=weaviate_client if weaviate_client else connect_weaviate(),
-            index_name="Activities",
-            text_key="activity_content",
-        )
-
     @staticmethod
     def register_schema(weaviate_client: WeaviateClient) -> None:
         """Weaviate에 스키마를 등록합니다.
@@ -90,6 +362,7 @@ class VectorStoreMethods:
         # 먼저 클래스가 존재하는지 확인
         if weaviate_index_name in weaviate_client.collections.list_all().keys():
             logger.info(f"{weaviate_index_name} already exists in Weaviate.")
+            VectorStoreMethods.add_missing_properties(weaviate_client)
             return
 
         weaviate_client.collections.create(
@@ -100,134 +373,565 @@ class VectorStoreMethods:
                     model="BAAI/bge-m3",  # The model to use, e.g. "nomic-embed-text"
                 ),
             properties=[  # properties configuration is optional
-                Property(name="activity_id", data_type=DataType.TEXT),
-                Property(name="activity_name", data_type=DataType.TEXT),
-                Property(name="activity_type", data_type=DataType.TEXT),
-                Property(name="activity_content", data_type=DataType.TEXT),
-                Property(name="keyword", data_type=DataType.TEXT),
-                Property(name="url", data_type=DataType.TEXT),
-                Property(name="start_date", data_type=DataType.DATE),
-                Property(name="end_date", data_type=DataType.DATE),
+                *ACTIVITY_PROPERTIES,
+                *ADDED_PROPERTIES,
             ]
         )
         logger.info("Activities vectorstore schema is created in Weaviate.")
 
+    @staticmethod
+    def register_archive_schema(weaviate_client: WeaviateClient) -> None:
+        """만료된 활동을 보관할 아카이브 컬렉션이 없으면 만듭니다.
+        벡터는 원래 컬렉션에서 그대로 옮겨 오므로 vectorizer를 사용하지 않습니다.
+
+        Args:
+            weaviate_client (WeaviateClient): Weaviate 클라이언트
+        """
+        if weaviate_archive_index_name in weaviate_client.collections.list_all().keys():
+            return
+
+        weaviate_client.collections.create(
+            weaviate_archive_index_name,
+            description="Expired activity information of Trendist",
+            vectorizer_config=Configure.Vectorizer.none(),
+            properties=[*ACTIVITY_PROPERTIES, *ADDED_PROPERTIES],
+        )
+        logger.info(f"{weaviate_archive_index_name} schema is created in Weaviate.")
+
+    @staticmethod
+    def archive_expired(weaviate_client: WeaviateClient) -> int:
+        """종료일(end_date)이 지난 활동을 검색 대상 컬렉션에서 아카이브 컬렉션으로 옮깁니다.
+        uuid, 속성, 벡터를 그대로 복사한 뒤, 복사에 성공한 객체만 원래 컬렉션에서 삭제합니다.
+
+        Args:
+            weaviate_client (WeaviateClient): Weaviate 클라이언트
+
+        Returns:
+            int: 옮긴 활동 수
+        """
+        VectorStoreMethods.register_archive_schema(weaviate_client)
+        collection = weaviate_client.collections.get(weaviate_index_name)
+        archive = weaviate_client.collections.get(weaviate_archive_index_name)
+        # 종료일이 없는 활동은 이 필터에 걸리지 않으므로 계속 검색 대상으로 남는다.
+        expired_filter = Filter.by_property("end_date").less_than(datetime.now(timezone.utc))
+
+        archived = 0
+        while True:
+            # 옮긴 객체는 삭제되므로 커서 없이 같은 필터로 다시 조회하면 다음 페이지가 나온다.
+            objects = collection.query.fetch_objects(
+                filters=expired_filter,
+                limit=RETENTION_PAGE_SIZE,
+                include_vector=True,
+            ).objects
+            if not objects:
+                break
+
+            with archive.batch.fixed_size(batch_size=INGEST_BATCH_SIZE, concurrent_requests=INGEST_CONCURRENCY) as batch:
+                for obj in objects:
+                    vector = obj.vector.get("default") if isinstance(obj.vector, dict) else obj.vector
+                    batch.add_object(properties=obj.properties, vector=vector, uuid=obj.uuid)
+            failed = {str(f.object_.uuid) for f in archive.batch.failed_objects}
+            for f in archive.batch.failed_objects:
+                logger.error(f"Failed to archive activity: {f.message} (activity_id: {f.object_.properties.get('activity_id')})")
+
+            moved = [obj.uuid for obj in objects if str(obj.uuid) not in failed]
+            if not moved:
+                # 남은 객체가 모두 복사에 실패하면 같은 객체를 계속 다시 조회하게 되므로 중단한다.
+                break
+            collection.data.delete_many(where=Filter.by_id().contains_any(moved))
+            archived += len(moved)
+
+        return archived
+
+    @staticmethod
+    def record_hot_index_size(collection, archived: int) -> int:
+        """검색 대상 컬렉션의 현재 객체 수를 동기화 상태에 기록하고 반환합니다. 최근 HOT_INDEX_HISTORY_SIZE번의 기록을 유지합니다.
+
+        Args:
+            collection: Weaviate 컬렉션
+            archived (int): 이번 실행에서 아카이브로 옮긴 활동 수
+
+        Returns:
+            int: 검색 대상 컬렉션의 객체 수
+        """
+        size = collection.aggregate.over_all(total_count=True).total_count
+        history = get_state(HOT_INDEX_HISTORY_KEY, [])
+        history.append({"at": datetime.now(timezone.utc).isoformat(timespec="seconds"), "size": size, "archived": archived})
+        set_state(HOT_INDEX_HISTORY_KEY, history[-HOT_INDEX_HISTORY_SIZE:])
+        if len(history) > 1:
+            logger.info(f"검색 대상 컬렉션 크기: {size}개 (이전 실행 대비 {size - history[-2]['size']:+d}개)")
+        return size
+
+    @staticmethod
+    def add_missing_properties(weaviate_client: WeaviateClient) -> None:
+        """스키마 생성 이후에 추가된 속성(ADDED_PROPERTIES)이 기존 컬렉션에 없으면 추가합니다.
+
+        Args:
+            weaviate_client (WeaviateClient): Weaviate 클라이언트
+        """
+        collection = weaviate_client.collections.get(weaviate_index_name)
+        existing = {prop.name for prop in collection.config.get().properties}
+        for prop in ADDED_PROPERTIES:
+            if prop.name not in existing:
+                collection.config.add_property(prop)
+                logger.info(f"Added property '{prop.name}' to {weaviate_index_name}.")
+
     @classmethod
-    def update_vectorstore(cls: 'Bot'):
+    def update_vectorstore(cls: 'Bot', full: Optional[bool] = None, repair_duplicates: bool = False,
+                           guard: Optional[SyncGuard] = None) -> dict[str, Any]:
         """MySQL과 Weaviate 벡터스토어를 동기화합니다.
 
+        저장된 워터마크(activities.created_at, activity_id) 이후에 생성된 활동만 읽는 증분 동기화를 기본으로 하고,
+        워터마크가 없거나 마지막 전체 동기화 후 FULL_SYNC_INTERVAL이 지났으면 양쪽의 전체 id를 비교하는 전체 동기화를 합니다.
+        동기화 전에는 종료일이 지난 활동을 아카이브 컬렉션으로 옮겨서, 검색 대상 컬렉션에는 진행 중인 활동만 남깁니다.
+
+        적재는 청크 단위로 체크포인트되는 작업(sync_jobs)으로 기록되어 진행 상황을 조회할 수 있고,
+        이전 전체 동기화가 중간에 중단되었으면 남은 청크부터 먼저 이어서 처리합니다.
+        다른 스레드나 프로세스에서 동기화가 실행 중이면 SyncInProgressError가 발생합니다.
+
+        Args:
+            full (Optional[bool]): True면 전체 동기화, False면 증분 동기화를 강제. None이면 자동으로 선택
+            repair_duplicates (bool): True면 동기화 전에 중복 객체 정리(repair_duplicates)를 실행
+            guard (Optional[SyncGuard]): 호출한 쪽에서 미리 잡아 둔 동기화 잠금. 동기화가 끝나면 풀린다.
+                None이면 여기서 잠금을 잡는다.
+
         Returns:
-            None
+            dict[str, Any]: 동기화 방식(mode), 스캔한 행 수(rows_scanned), 추가/수정/삭제한 활동 수(added, updated, deleted),
+                아카이브로 옮긴 활동 수(archived), 검색 대상 컬렉션 크기(hot_size)
         """
-        with WeaviateClientContext() as weaviate_client:
-            weaviate_client.connect()
-            ##### 1. Weaviate에서 activity_id 필터로 모든 _id 가져오기 #####
-            weaviate_ids: set[str] = set()
-
+        with guard or sync_guard(), WeaviateClientContext() as weaviate_client:
             collection = weaviate_client.collections.get(weaviate_index_name)
-            response = collection.query.fetch_objects(
-                limit=10000,  # 10000이 최대인듯. 100000으로 하면 query maximum result exceeded 오류 발생
-            )
-
-            # 중복 제거용 dict: {(channelId, chatId): [uuid1, uuid2, ...]}
-            duplicates: dict[str, list[str]] = {}
-
-            for o in response.objects:
-                props = o.properties or {}
-                uuid = o.uuid
-                activity_id = props.get("activity_id")
-                weaviate_ids.add(activity_id)
-
-                # activity_id가 중복되는 object의 uuid를 기록
-                duplicates.setdefault(activity_id, []).append(uuid)
-
-            # 중복된 activity id에서 첫 번째를 제외한 나머지를 삭제
-            for activity_id, uuid_list in duplicates.items():
-                if len(uuid_list) > 1:
-                    # 첫 번째는 유지, 나머지 삭제
-                    to_delete = uuid_list[1:]
-                    if to_delete:
-                        logger.warning(
-                            f"Deleting duplicate Weaviate object: "
-                            f"activity_id={activity_id}, "
-                            f"uuid=(survived: {uuid_list[0]}, killed: {to_delete})")
-
-                        collection.data.delete_many(
-                            where=Filter.any_of([
-                                Filter.by_id().equal(uuid) for uuid in uuid_list
-                            ])
-                        )
-
-
-            ##### 2. MySQL에서 전체 id 리스트 확보 #####
-            mysql_ids = {row['activity_id'].hex() for row in run_query("SELECT activity_id FROM activities")}
-            logger.debug(f"MySQL에서 전체 activity id 리스트 확보: {len(mysql_ids)}개")
-
-            ##### 3. 차집합: MySQL에는 있고 Weaviate에는 없는 id #####
-            missing_activity_ids:list[bytes] = [UUID(aid).bytes for aid in (mysql_ids - weaviate_ids)]
-            logger.info(f"MySQL에는 있고 Weaviate에는 업데이트되지 않은 activity id 리스트 확보: {len(missing_activity_ids)}개")
-
-
-            ##### 4. MySQL에서 레코드 로드 후 Weaviate에 추가 #####
-            if missing_activity_ids:
-                with cls.build_loader(missing_activity_ids) as loader:
-                    if docs := loader.load():  # 문서 목록이 비어 있지 않을 때만 추가(비어 있을 경우 add_documents() 에서 오류 발생)
-                        # 단계 4: DB 생성(Create DB) 및 저장
-                        # 벡터스토어를 생성하고, 저장한다.
-                        docs = [doc for doc in docs if doc]
-                        logger.debug(f"Adding documents to the vectorstore.")
-                        for doc in docs:
-                            cls.vectorstore.add_documents([doc])
-
-            if weaviate_client.batch.failed_objects:
-                for failed in weaviate_client.batch.failed_objects:
-                    logger.error(f"Failed to insert documents into weaviate: {failed}")
+
+            if interrupted := get_unfinished_job():
+                if interrupted["mode"] == "full":
+                    logger.info(f"중단된 동기화 작업(job_id: {interrupted['job_id']})을 "
+                                f"{interrupted['last_chunk'] + 1}번째 청크부터 재개합니다.")
+                    with tracking_job(interrupted["job_id"]):
+                        cls.run_job(collection, interrupted)
+                else:
+                    # 증분 동기화는 워터마크가 체크포인트이므로 새 작업이 이어서 처리한다.
+                    set_job_state(interrupted["job_id"], "interrupted")
+
+            watermark = get_state(SYNC_WATERMARK_KEY)
+            if full is None:
+                full = time.time() - get_state(LAST_FULL_SYNC_KEY, 0) >= FULL_SYNC_INTERVAL
+            # 워터마크가 없으면 증분 동기화를 할 수 없으므로 전체 동기화로 시작한다.
+            full = full or watermark is None or get_state(SNIPPET_BACKFILL_KEY) is None
+
+            if repair_duplicates:
+                cls.repair_duplicates(collection)
+            archived = cls.archive_expired(weaviate_client)
+            archive = weaviate_client.collections.get(weaviate_archive_index_name)
+            result = cls.full_sync(collection, archive) if full else cls.incremental_sync(collection, watermark)
+            result["archived"] = archived
+            result["hot_size"] = cls.record_hot_index_size(collection, archived)
+
+        # 동기화가 끝났으므로 검색 결과 캐시가 이전 데이터를 쓰지 않도록 generation을 증가시킨다.
+        generation = increment_state(SYNC_GENERATION_KEY)
+        logger.info(f"벡터스토어 동기화 완료 ({result['mode']}: {result['rows_scanned']}행 스캔, "
+                    f"{result['added']}개 추가, {result['updated']}개 수정, {result['deleted']}개 삭제, "
+                    f"{result['archived']}개 보관, 검색 대상 {result['hot_size']}개, generation: {generation})")
+        return result
+
+    @classmethod
+    def full_sync(cls: 'Bot', collection, archive=None) -> dict[str, Any]:
+        """MySQL과 Weaviate의 전체 activity_id와 내용 해시를 비교해서 빠진 활동은 추가하고,
+        내용이 바뀐 활동은 다시 임베딩하고, MySQL에서 삭제된 활동은 Weaviate에서도 삭제합니다.
+        아카이브 컬렉션이 주어지면 MySQL에서 삭제된 활동을 아카이브에서도 삭제합니다.
+        증분 동기화가 놓친 활동(워터마크보다 늦게 커밋된 행 등)을 복구하는 주기적인 재조정 용도로도 사용됩니다.
+
+        Args:
+            collection: Weaviate 컬렉션
+            archive: 종료된 활동을 보관하는 아카이브 컬렉션
+
+        Returns:
+            dict[str, Any]: 동기화 방식, 스캔한 행 수, 추가/수정/삭제한 활동 수
+        """
+        ##### 1. Weaviate에서 커서 페이지네이션으로 모든 activity_id와 해시 가져오기 #####
+        # {activity_id: [(uuid, content_hash), ...]}
+        weaviate_objects: dict[str, list[tuple[str, Optional[str]]]] = {}
+        scanned = 0
+        for uuid, activity_id, content_hash in iterate_activity_ids(collection):
+            weaviate_objects.setdefault(activity_id, []).append((str(uuid), content_hash))
+            scanned += 1
+
+        ##### 2. MySQL에서 전체 id와 해시 리스트 확보 #####
+        rows = run_query(f"""
+            SELECT activity_id, created_at, {CONTENT_HASH_SQL} AS content_hash, {LIVE_ACTIVITY_SQL} AS live
+            FROM activities
+        """)
+        mysql_hashes = {row['activity_id'].hex(): row['content_hash'] for row in rows}
+        # 종료된 활동은 아카이브에 있으므로 다시 추가하지 않는다.
+        live_ids = {row['activity_id'].hex() for row in rows if row['live']}
+        logger.debug(f"MySQL에서 전체 activity id 리스트 확보: {len(mysql_hashes)}개 (진행 중 {len(live_ids)}개)")
+
+        ##### 3. 차집합: 추가할 id, 내용이 바뀐 id, 삭제할 id #####
+        missing_activity_ids: list[bytes] = [UUID(aid).bytes for aid in live_ids - weaviate_objects.keys()]
+        # 해시가 없는 객체(해시 속성이 생기기 전에 적재됨)도 한 번 다시 임베딩해서 해시와 요약문(activity_snippet)을 채운다.
+        changed_activity_ids: list[str] = [
+            aid for aid, objects in weaviate_objects.items()
+            if aid in mysql_hashes and any(content_hash != mysql_hashes[aid] for _, content_hash in objects)
+        ]
+        orphan_activity_ids: list[str] = [aid for aid in weaviate_objects if aid not in mysql_hashes]
+        logger.info(f"Weaviate 동기화 대상: 추가 {len(missing_activity_ids)}개, "
+                    f"수정 {len(changed_activity_ids)}개, 삭제 {len(orphan_activity_ids)}개")
+
+
+        ##### 4. MySQL에서 레코드 로드 후 Weaviate에 추가 및 덮어쓰기 (청크마다 체크포인트) #####
+        job_id = create_job("full", INGEST_LOAD_CHUNK_SIZE, items=[
+            *[(aid, "add") for aid in missing_activity_ids],
+            *[(UUID(aid).bytes, "update") for aid in changed_activity_ids],
+        ])
+        with tracking_job(job_id):
+            counts = cls.run_job(collection, get_job(job_id))
+        added, updated = counts["add"], counts["update"]
+
+        # 다시 임베딩한 활동은 결정적 uuid의 객체로 덮어썼으므로, 다른 uuid로 남아 있는 이전 객체는 삭제한다.
+        stale_uuids = [uuid for aid in changed_activity_ids for uuid, _ in weaviate_objects[aid] if uuid != activity_uuid(aid)]
+        for chunk_start in range(0, len(stale_uuids), DELETE_CHUNK_SIZE):
+            collection.data.delete_many(where=Filter.by_id().contains_any(stale_uuids[chunk_start:chunk_start + DELETE_CHUNK_SIZE]))
+
+        ##### 5. MySQL에서 삭제된 활동을 Weaviate와 아카이브에서도 삭제 #####
+        deleted = cls.delete_orphans(collection, weaviate_objects, orphan_activity_ids)
+        if archive is not None:
+            archived_objects: dict[str, list[tuple[str, Optional[str]]]] = {}
+            for uuid, activity_id, content_hash in iterate_activity_ids(archive):
+                archived_objects.setdefault(activity_id, []).append((str(uuid), content_hash))
+            archived_orphans = [aid for aid in archived_objects if aid not in mysql_hashes]
+            if archived_orphans:
+                logger.info(f"아카이브에서 MySQL에 없는 활동 {len(archived_orphans)}개를 삭제합니다.")
+            deleted += cls.delete_orphans(archive, archived_objects, archived_orphans)
+
+        ##### 6. 다음 증분 동기화를 위해 가장 최근 행을 워터마크로 저장 #####
+        latest = max(((row['created_at'], row['activity_id']) for row in rows if row['created_at']), default=None)
+        if latest:
+            save_watermark(*latest)
+        set_state(LAST_FULL_SYNC_KEY, time.time())
+        set_state(SNIPPET_BACKFILL_KEY, time.time())
+
+        return {"mode": "full", "rows_scanned": len(rows) + scanned,
+                "added": added, "updated": updated, "deleted": deleted}
+
+    @staticmethod
+    def delete_orphans(collection, objects: dict[str, list[tuple[str, Optional[str]]]], orphan_activity_ids: list[str]) -> int:
+        """MySQL에 없는 활동의 객체를 컬렉션에서 삭제하고, 삭제한 객체 수를 반환합니다.
+
+        Args:
+            collection: Weaviate 컬렉션
+            objects (dict[str, list[tuple[str, Optional[str]]]]): 컬렉션을 스캔한 {activity_id: [(uuid, content_hash), ...]}
+            orphan_activity_ids (list[str]): 삭제할 activity_id 목록
+
+        Returns:
+            int: 삭제한 객체 수
+        """
+        deleted = 0
+        for chunk_start in range(0, len(orphan_activity_ids), DELETE_CHUNK_SIZE):
+            chunk = orphan_activity_ids[chunk_start:chunk_start + DELETE_CHUNK_SIZE]
+            # activity_id가 없는 객체는 id 필터로 삭제한다.
+            uuids = [uuid for aid in chunk if aid is None for uuid, _ in objects[aid]]
+            ids = [aid for aid in chunk if aid is not None]
+            if ids:
+                deleted += collection.data.delete_many(where=Filter.by_property("activity_id").contains_any(ids)).successful
+            if uuids:
+                deleted += collection.data.delete_many(where=Filter.by_id().contains_any(uuids)).successful
+        return deleted
+
+    @classmethod
+    def incremental_sync(cls: 'Bot', collection, watermark: dict[str, str]) -> dict[str, Any]:
+        """워터마크 이후에 생성된 활동만 (created_at, activity_id) 순서로 키셋 페이지네이션하며 읽어서 추가합니다.
+        청크를 추가할 때마다 워터마크를 저장하므로, 중간에 실패해도 다음 실행은 마지막으로 추가한 청크 이후부터 이어갑니다.
+
+        Args:
+            collection: Weaviate 컬렉션
+            watermark (dict[str, str]): 마지막으로 동기화한 행의 created_at(ISO 형식)과 activity_id(16진수)
+
+        Returns:
+            dict[str, Any]: 동기화 방식, 스캔한 행 수, 추가한 활동 수 (수정/삭제는 전체 동기화에서만 반영)
+        """
+        created_at, activity_id = datetime.fromisoformat(watermark["created_at"]), bytes.fromhex(watermark["activity_id"])
+        # created_at이 같은 행은 기본키로 순서를 정해서, 같은 시각에 저장된 활동도 빠뜨리거나 중복해서 읽지 않는다.
+        after_watermark = f"(created_at > %s OR (created_at = %s AND activity_id > %s)) AND {LIVE_ACTIVITY_SQL}"
+        total = run_query(f"SELECT COUNT(*) AS total FROM activities WHERE {after_watermark}",
+                          (created_at, created_at, activity_id))[0]['total']
+        job_id = create_job("incremental", INCREMENTAL_SYNC_CHUNK_SIZE, total=total)
+
+        rows_scanned, added = 0, 0
+        with tracking_job(job_id):
+            for chunk in itertools.count():
+                rows = run_query(f"""
+                    SELECT activity_id, created_at FROM activities
+                    WHERE {after_watermark}
+                    ORDER BY created_at, activity_id
+                    LIMIT %s
+                """, (created_at, created_at, activity_id, INCREMENTAL_SYNC_CHUNK_SIZE))
+                if not rows:
+                    break
+                rows_scanned += len(rows)
+                added += cls.add_activities(collection, [row['activity_id'] for row in rows])
+
+                created_at, activity_id = rows[-1]['created_at'], rows[-1]['activity_id']
+                save_watermark(created_at, activity_id)
+                commit_chunk(job_id, chunk, len(rows))
+                if len(rows) < INCREMENTAL_SYNC_CHUNK_SIZE:
+                    break
+
+        return {"mode": "incremental", "rows_scanned": rows_scanned, "added": added, "updated": 0, "deleted": 0}
+
+    @classmethod
+    def run_job(cls: 'Bot', collection, job: dict[str, Any]) -> dict[str, int]:
+        """동기화 작업의 항목을 마지막으로 완료한 청크 다음부터 청크 단위로 적재하고, 청크마다 체크포인트를 기록합니다.
+
+        Args:
+            collection: Weaviate 컬렉션
+            job (dict[str, Any]): 동기화 작업 기록 (syncstate.get_job)
+
+        Returns:
+            dict[str, int]: 종류(add | update)별 적재한 활동 수
+        """
+        counts = {"add": 0, "update": 0}
+        chunks = math.ceil(job["total"] / job["chunk_size"])
+        for chunk in range(job["last_chunk"] + 1, chunks):
+            items = get_job_chunk(job, chunk)
+            for kind in counts:
+                counts[kind] += cls.add_activities(collection, [activity_id for activity_id, k in items if k == kind])
+            commit_chunk(job["job_id"], chunk, len(items))
+        return counts
+
+    @staticmethod
+    def repair_duplicates(collection) -> int:
+        """같은 activity_id를 가진 중복 객체를 정리하는 복구 도구입니다.
+        객체 uuid는 activity_id로부터 결정적으로 만들어지므로 동기화가 중복을 만들지 않지만,
+        이전 방식(무작위 uuid)으로 적재된 객체가 남아 있을 때 한 번 실행하면 됩니다.
+
+        Args:
+            collection: Weaviate 컬렉션
+
+        Returns:
+            int: 삭제한 객체 수
+        """
+        # 중복 제거용 dict: {activity_id: [uuid1, uuid2, ...]}
+        duplicates: dict[str, list[str]] = {}
+        for uuid, activity_id, _ in iterate_activity_ids(collection):
+            duplicates.setdefault(activity_id, []).append(str(uuid))
+
+        deleted = 0
+        for activity_id, uuid_list in duplicates.items():
+            if len(uuid_list) <= 1:
+                continue
+            # activity_id로 만든 uuid의 객체가 있으면 그것을, 없으면 첫 번째를 유지하고 나머지만 삭제
+            canonical = activity_uuid(activity_id) if activity_id else None
+            survivor = canonical if canonical in uuid_list else uuid_list[0]
+            to_delete = [uuid for uuid in uuid_list if uuid != survivor]
+            logger.warning(
+                f"Deleting duplicate Weaviate object: "
+                f"activity_id={activity_id}, "
+                f"uuid=(survived: {survivor}, killed: {to_delete})")
+
+            collection.data.delete_many(where=Filter.by_id().contains_any(to_delete))
+            deleted += len(to_delete)
+
+        logger.info(f"중복 객체 정리 완료: {deleted}개 삭제")
+        return deleted
+
+    @classmethod
+    def add_activities(cls: 'Bot', collection, activity_ids: list[bytes]) -> int:
+        """MySQL에서 지정한 활동의 레코드를 스트리밍으로 읽어서 INGEST_LOAD_CHUNK_SIZE개씩 Weaviate에 배치로 추가하고,
+        추가한 문서 수를 반환합니다. 한 번에 메모리에 올리는 문서는 청크 하나뿐입니다.
+
+        Args:
+            collection: Weaviate 컬렉션
+            activity_ids (list[bytes]): 추가할 activity_id 목록
+
+        Returns:
+            int: 추가한 문서 수
+        """
+        added, docs = 0, []
+        # IN 절이 너무 길어지지 않도록 질의 하나에 담는 id 수를 제한한다.
+        for id_start in range(0, len(activity_ids), LOADER_IDS_PER_QUERY):
+            loader = cls.build_loader(activity_ids[id_start:id_start + LOADER_IDS_PER_QUERY])
+            for doc in loader.lazy_load():
+                if doc:
+                    docs.append(doc)
+                if len(docs) >= INGEST_LOAD_CHUNK_SIZE:
+                    added += ingest_documents(collection, docs)
+                    docs = []
+        if docs:
+            added += ingest_documents(collection, docs)
+        return added
 
     @staticmethod
-    @contextmanager
     def build_loader(ids: list[bytes]) -> SQLDatabaseLoader:
-        """MySQL에서 지정된 ID의 채팅 데이터를 로드하는 Document 로더를 반환합니다.
+        """MySQL에서 지정된 ID의 활동 데이터를 로드하는 Document 로더를 반환합니다.
+        엔진과 테이블 메타정보는 프로세스 전체에서 공유합니다.
 
         Args:
-            ids (list[str]): 로드할 채팅의 activity_id 목록
+            ids (list[bytes]): 로드할 활동의 activity_id 목록
 
         Returns:
             SQLDatabaseLoader: MySQL Database 로더
         """
-        host = os.getenv('MYSQL_DB_HOST')
-        username = os.getenv('MYSQL_DB_USER')
-        password = os.getenv('MYSQL_DB_PASSWORD')
-        database = os.getenv('MYSQL_DB_NAME')
-
-        # 연결 및 DB 유틸리티 생성
-        engine = create_engine(
-            f"mysql+pymysql://{username}:{password}@{host}/{database}",
-            echo=True,  # SQL 로그 출력 (디버깅용)
-            future=True
-        )
-        db = SQLDatabase(engine)
-
-        # 테이블 메타정보 준비
-        metadata = MetaData()
-        activities = Table("activities", metadata, autoload_with=engine)
+        activities = get_activities_table()
 
         # Select 객체 + 리스트 바인딩. Select 객체가 아닌 문자열만 사용하면 리스트 바인딩은 불가능.
         query = (
-            select(activities)
+            select(activities, literal_column(CONTENT_HASH_SQL).label("content_hash"))
             .where(activities.c.activity_id.in_(bindparam("ids", expanding=True)))
         )
 
         # SQLDatabaseLoader 생성
-        loader = SQLDatabaseLoader(
+        return SQLDatabaseLoader(
             query=query,
-            db=db,
+            db=get_sql_database(),
             parameters={"ids": ids},  # 리스트 바인딩
             page_content_mapper=get_page_content,
             metadata_mapper=get_metadata
         )
 
 
-        try:
-            yield loader
-        finally:
-            engine.dispose()  # 안전하게 연결 종료
\ No newline at end of file
+# 스냅샷 파일 구성. vectors.f32는 (객체 수 x 차원) float32 행렬을 행 순서대로 저장한 raw 파일이고,
+# properties.jsonl의 i번째 줄은 i번째 행 벡터의 uuid와 속성이다. manifest.json에 크기와 체크섬을 기록한다.
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_VECTORS_FILE = "vectors.f32"
+SNAPSHOT_PROPERTIES_FILE = "properties.jsonl"
+SNAPSHOT_MANIFEST_FILE = "manifest.json"
+SNAPSHOT_IMPORT_CHUNK_SIZE = 5000  # 가져오기 시 한 번에 메모리에 올려 적재할 객체 수
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def export_snapshot(directory: str, collection_name: str = weaviate_index_name) -> dict[str, Any]:
+    """컬렉션의 모든 객체(uuid, 속성, 벡터)를 스냅샷 디렉토리로 내보냅니다.
+    벡터는 float32 행렬 파일로, 속성은 행 순서대로 JSON Lines 파일로 저장하고, 체크섬을 manifest.json에 기록합니다.
+
+    Args:
+        directory (str): 스냅샷을 저장할 디렉토리
+        collection_name (str): 내보낼 컬렉션 이름
+
+    Returns:
+        dict[str, Any]: manifest 내용
+    """
+    os.makedirs(directory, exist_ok=True)
+    start = time.perf_counter()
+    vectors_digest, properties_digest = hashlib.sha256(), hashlib.sha256()
+    count, dimension = 0, None
+
+    with WeaviateClientContext() as client, \
+            open(join(directory, SNAPSHOT_VECTORS_FILE), "wb") as vectors_file, \
+            open(join(directory, SNAPSHOT_PROPERTIES_FILE), "wb") as properties_file:
+        collection = client.collections.get(collection_name)
+        for obj in collection.iterator(include_vector=True):
+            vector = obj.vector.get("default") if isinstance(obj.vector, dict) else obj.vector
+            if not vector:
+                logger.warning(f"벡터가 없는 객체는 스냅샷에서 제외합니다: {obj.uuid}")
+                continue
+            vector = np.asarray(vector, dtype=np.float32)
+            if dimension is None:
+                dimension = len(vector)
+            elif len(vector) != dimension:
+                raise ValueError(f"벡터 차원이 일치하지 않습니다: {obj.uuid} ({len(vector)} != {dimension})")
+
+            vector_bytes = vector.tobytes()
+            line = (json.dumps({"uuid": str(obj.uuid), "properties": obj.properties},
+                               ensure_ascii=False, default=lambda v: v.isoformat()) + "\n").encode("utf-8")
+            vectors_file.write(vector_bytes)
+            properties_file.write(line)
+            vectors_digest.update(vector_bytes)
+            properties_digest.update(line)
+            count += 1
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "collection": collection_name,
+        "count": count,
+        "dimension": dimension or 0,
+        "dtype": "float32",
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "checksums": {
+            SNAPSHOT_VECTORS_FILE: vectors_digest.hexdigest(),
+            SNAPSHOT_PROPERTIES_FILE: properties_digest.hexdigest(),
+        },
+    }
+    with open(join(directory, SNAPSHOT_MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    logger.info(f"스냅샷 내보내기 완료: {collection_name} {count}개 x {dimension}차원 -> {directory} "
+                f"({time.perf_counter() - start:.1f}s)")
+    return manifest
+
+def import_snapshot(directory: str, collection_name: str = weaviate_index_name) -> int:
+    """스냅샷을 검증한 뒤 비어 있는 컬렉션에 벡터를 포함해 배치로 적재합니다. 벡터를 다시 계산하지 않습니다.
+
+    Args:
+        directory (str): 스냅샷 디렉토리
+        collection_name (str): 적재할 컬렉션 이름. 없으면 스키마를 만든다.
+
+    Returns:
+        int: 적재한 객체 수
+
+    Raises:
+        ValueError: 스냅샷 형식이나 체크섬, 속성/매니페스트/벡터의 객체 수가 맞지 않거나, 대상 컬렉션이 비어 있지 않은 경우
+    """
+    start = time.perf_counter()
+    with open(join(directory, SNAPSHOT_MANIFEST_FILE), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION or manifest.get("dtype") != "float32":
+        raise ValueError(f"지원하지 않는 스냅샷 형식입니다: {manifest.get('format_version')}, {manifest.get('dtype')}")
+    for name, checksum in manifest["checksums"].items():
+        if _file_sha256(join(directory, name)) != checksum:
+            raise ValueError(f"스냅샷 파일의 체크섬이 일치하지 않습니다: {name}")
+
+    count, dimension = manifest["count"], manifest["dimension"]
+    # 체크섬은 매니페스트와 함께 만들어지므로, 잘리거나 차원이 다른 파일도 통과할 수 있다. 적재 전에 개수를 맞춰 본다.
+    with open(join(directory, SNAPSHOT_PROPERTIES_FILE), encoding="utf-8") as properties_file:
+        property_rows = sum(1 for _ in properties_file)
+    vector_bytes = os.path.getsize(join(directory, SNAPSHOT_VECTORS_FILE))
+    row_bytes = dimension * np.dtype(np.float32).itemsize
+    if not row_bytes or vector_bytes % row_bytes:
+        raise ValueError(f"벡터 파일 크기({vector_bytes} bytes)가 {dimension}차원 float32 행의 배수가 아닙니다.")
+    vector_rows = vector_bytes // row_bytes
+    if not property_rows == count == vector_rows:
+        raise ValueError(f"스냅샷의 객체 수가 일치하지 않습니다: 속성 {property_rows}줄, 매니페스트 {count}개, "
+                         f"벡터 {vector_rows}행")
+    vectors = np.memmap(join(directory, SNAPSHOT_VECTORS_FILE), dtype=np.float32, mode="r", shape=(count, dimension)) \
+        if count else np.zeros((0, dimension), dtype=np.float32)
+
+    inserted = 0
+    with WeaviateClientContext() as client, open(join(directory, SNAPSHOT_PROPERTIES_FILE), encoding="utf-8") as properties_file:
+        if collection_name == weaviate_archive_index_name:
+            VectorStoreMethods.register_archive_schema(client)
+        else:
+            VectorStoreMethods.register_schema(client)
+        collection = client.collections.get(collection_name)
+        if collection.aggregate.over_all(total_count=True).total_count:
+            raise ValueError(f"{collection_name} 컬렉션이 비어 있지 않습니다. 빈 컬렉션에만 스냅샷을 적재할 수 있습니다.")
+
+        pending = []
+        for row, line in enumerate(properties_file):
+            record = json.loads(line)
+            pending.append((record["properties"], vectors[row].tolist(), record["uuid"]))
+            if len(pending) >= SNAPSHOT_IMPORT_CHUNK_SIZE:
+                inserted += insert_objects(collection, pending)
+                pending = []
+        if pending:
+            inserted += insert_objects(collection, pending)
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"스냅샷 가져오기 완료: {inserted}/{count}개 -> {collection_name}, {elapsed:.1f}s "
+                f"({inserted / elapsed if elapsed else 0:.0f} objects/s)")
+    return inserted
+
+
+if __name__ == "__main__":
+    # 사용법: python -m chat.vectorstore export|import <디렉토리> [컬렉션 이름]
+    command, snapshot_directory, *rest = sys.argv[1:]
+    target = rest[0] if rest else weaviate_index_name
+    if command == "export":
+        export_snapshot(snapshot_directory, target)
+    elif command == "import":
+        import_snapshot(snapshot_directory, target)
+    else:
+        raise SystemExit(f"알 수 없는 명령입니다: {command} (export | import)")
@@ -1,7 +1,14 @@
 """Weaviate 벡터스토어 연결 및 컨텍스트 관리 유틸리티 모듈."""
+import atexit
+import threading
+from typing import Optional
+
+import grpc
 import weaviate
 from weaviate import WeaviateClient
-from weaviate.classes.init import Auth
+from weaviate.exceptions import (WeaviateClosedClientError, WeaviateConnectionError, WeaviateGRPCUnavailableError,
+                                 WeaviateTimeoutError)
+from weaviate.classes.init import AdditionalConfig, Auth, Timeout
 from dotenv import load_dotenv
 import os
 
@@ -14,6 +21,13 @@ load_dotenv()
 
 weaviate_url = os.getenv("WEAVIATE_URL")
 weaviate_api_key = os.getenv("WEAVIATE_API_KEY")
+# 요청 시간 예산을 넘긴 검색도 백그라운드에서 계속 실행되므로, 질의 하나가 스레드를 붙잡는 시간을 클라이언트에서 제한한다.
+WEAVIATE_QUERY_TIMEOUT = int(os.getenv("WEAVIATE_QUERY_TIMEOUT", "10"))
+WEAVIATE_INSERT_TIMEOUT = int(os.getenv("WEAVIATE_INSERT_TIMEOUT", "90"))
+
+# 클라이언트 상태 확인이 필요한 오류. 요청 내용 때문에 실패한 질의(WeaviateQueryError 등)는 포함하지 않는다.
+CONNECTION_ERRORS = (WeaviateConnectionError, WeaviateClosedClientError, WeaviateGRPCUnavailableError,
+                     WeaviateTimeoutError)
 
 
 def connect_weaviate() -> WeaviateClient:
@@ -27,6 +41,9 @@ def connect_weaviate() -> WeaviateClient:
         cluster_url=weaviate_url,
         auth_credentials=Auth.api_key(weaviate_api_key),
         headers=weaviate_headers,
+        additional_config=AdditionalConfig(
+            timeout=Timeout(init=5, query=WEAVIATE_QUERY_TIMEOUT, insert=WEAVIATE_INSERT_TIMEOUT),
+        ),
     )
 
     if client.is_ready():
@@ -37,17 +54,164 @@ def connect_weaviate() -> WeaviateClient:
     return client
 
 
+class WeaviateClientManager:
+    """프로세스 전체에서 하나의 Weaviate 클라이언트를 공유하도록 관리하는 thread-safe 클래스입니다.
+
+    처음 사용할 때 연결하고(lazy connect), 백그라운드 스레드가 health_check_interval초마다 상태를 확인해서
+    연결이 끊어졌으면 새로 연결합니다. 클라이언트를 빌려 간 쪽이 연결 오류를 보고하면 상태 확인 스레드를 바로 깨웁니다.
+    상태 확인과 재연결은 잠금 밖에서 하고, 잠금은 클라이언트를 교체할 때만 잡으므로 요청 스레드는 네트워크 호출을 기다리지 않습니다.
+    재연결할 때는 새 클라이언트로 교체만 하고, 이전 클라이언트는 빌려 간 쪽이 모두 반납한 뒤에 닫습니다.
+    """
+    def __init__(self, health_check_interval: float = float(os.getenv("WEAVIATE_HEALTH_CHECK_INTERVAL", "30"))):
+        self.health_check_interval = health_check_interval
+        self._client: Optional[WeaviateClient] = None
+        # 클라이언트별 대여 수. 교체된 클라이언트는 대여 수가 0이 되면 닫는다.
+        self._borrowers: dict[int, int] = {}
+        self._retired: dict[int, WeaviateClient] = {}
+        self._lock = threading.Lock()
+        # 최초 연결이 동시에 여러 번 일어나지 않도록 막는 잠금. 연결하는 동안 self._lock은 잡지 않는다.
+        self._connect_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+
+    def acquire(self) -> WeaviateClient:
+        """공유 클라이언트를 빌려줍니다. 사용이 끝나면 반드시 release로 반납해야 합니다."""
+        with self._lock:
+            if self._client is not None:
+                return self._borrow(self._client)
+
+        with self._connect_lock:
+            with self._lock:
+                if self._client is not None:
+                    return self._borrow(self._client)
+            client = connect_weaviate()
+            with self._lock:
+                self._client = client
+                self._start_health_check()
+                return self._borrow(client)
+
+    def release(self, client: WeaviateClient) -> None:
+        """빌려 간 클라이언트를 반납합니다. 교체된 클라이언트의 마지막 대여였으면 연결을 닫습니다."""
+        retired = None
+        with self._lock:
+            key = id(client)
+            self._borrowers[key] = self._borrowers.get(key, 1) - 1
+            if self._borrowers[key] <= 0:
+                del self._borrowers[key]
+                retired = self._retired.pop(key, None)
+        if retired is not None:
+            self._close(retired)
+
+    def mark_unhealthy(self) -> None:
+        """상태 확인 스레드가 주기를 기다리지 않고 바로 상태를 확인하도록 깨웁니다."""
+        self._wake.set()
+
+    def shutdown(self) -> None:
+        """상태 확인 스레드를 멈추고, 공유 클라이언트와 아직 닫지 않은 이전 클라이언트를 모두 닫습니다."""
+        self._stop.set()
+        self._wake.set()
+        with self._lock:
+            clients = [*self._retired.values(), *([self._client] if self._client is not None else [])]
+            self._retired.clear()
+            self._client = None
+        for client in clients:
+            self._close(client)
+        if clients:
+            logger.info("Weaviate Client is closed.")
+
+    def _borrow(self, client: WeaviateClient) -> WeaviateClient:
+        """대여 수를 늘리고 client를 반환합니다. self._lock을 잡은 상태에서 호출해야 합니다."""
+        self._borrowers[id(client)] = self._borrowers.get(id(client), 0) + 1
+        return client
+
+    def _start_health_check(self) -> None:
+        """주기적인 상태 확인 스레드를 시작합니다. self._lock을 잡은 상태에서 호출해야 합니다."""
+        if self._health_thread is not None or self.health_check_interval <= 0:
+            return
+        self._health_thread = threading.Thread(target=self._health_check_loop, name="weaviate-health", daemon=True)
+        self._health_thread.start()
+
+    def _health_check_loop(self) -> None:
+        while True:
+            self._wake.wait(self.health_check_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            self._check_and_swap()
+
+    def _check_and_swap(self) -> None:
+        """클라이언트 상태를 확인하고, 연결이 끊어졌으면 새 클라이언트로 교체합니다.
+        상태 확인 스레드에서만 호출되며, 네트워크 호출은 잠금 밖에서 합니다."""
+        with self._lock:
+            client = self._client
+        if client is None or self._is_healthy(client):
+            return
+        logger.warning("Weaviate Client 상태 확인 실패, 재연결합니다.")
+        try:
+            new_client = connect_weaviate()
+        except Exception as e:
+            # 연결에 실패하면 기존 클라이언트를 유지하고 다음 확인 때 다시 시도한다.
+            logger.error(f"Weaviate 재연결 실패: {e}")
+            return
+
+        to_close = None
+        with self._lock:
+            if self._client is not client:
+                # 그 사이에 종료되었으면 새 클라이언트는 쓰지 않는다.
+                to_close = new_client
+            else:
+                self._client = new_client
+                if self._borrowers.get(id(client)):
+                    # 아직 사용 중인 쪽이 있으면 반납될 때 닫는다.
+                    self._retired[id(client)] = client
+                else:
+                    to_close = client
+        if to_close is not None:
+            self._close(to_close)
+
+    @staticmethod
+    def _is_healthy(client: WeaviateClient) -> bool:
+        try:
+            return client.is_connected() and client.is_live()
+        except Exception as e:
+            logger.warning(f"Weaviate 상태 확인 중 오류: {e}")
+            return False
+
+    @staticmethod
+    def _close(client: WeaviateClient) -> None:
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning(f"Weaviate Client 종료 중 오류: {e}")
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """연결이나 전송 계층의 오류이면 True를 반환합니다. 잘못된 필터 등 요청 자체의 오류는 False입니다."""
+    if isinstance(error, CONNECTION_ERRORS):
+        return True
+    # gRPC 질의 실패는 WeaviateQueryError로 감싸지므로, 원인이 UNAVAILABLE인지 확인한다.
+    cause = error.__cause__
+    return isinstance(cause, grpc.RpcError) and cause.code() == grpc.StatusCode.UNAVAILABLE
+
+
+weaviate_client_manager = WeaviateClientManager()
+atexit.register(weaviate_client_manager.shutdown)
+
+
 class WeaviateClientContext:
-    """with 문에서 Weaviate 클라이언트 연결을 관리하는 컨텍스트 매니저 클래스입니다."""
+    """with 문에서 Weaviate 클라이언트를 사용하기 위한 컨텍스트 매니저 클래스입니다.
+    매번 새로 연결하지 않고 weaviate_client_manager의 공유 클라이언트를 빌려 쓰고, 끝나면 반납합니다."""
     def __enter__(self):
-        """컨텍스트 진입 시 Weaviate 클라이언트 연결을 반환합니다."""
-        self.client = connect_weaviate()
+        """컨텍스트 진입 시 공유 Weaviate 클라이언트를 빌려서 반환합니다."""
+        self.client = weaviate_client_manager.acquire()
         return self.client
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """컨텍스트 종료 시 클라이언트 연결을 닫습니다."""
-        if hasattr(self.client, "close"):
-            self.client.close()
+        """공유 클라이언트를 반납합니다. 연결 오류가 발생했다면 바로 연결 상태를 확인하도록 합니다."""
+        weaviate_client_manager.release(self.client)
+        if exc_val is not None and is_connection_error(exc_val):
+            weaviate_client_manager.mark_unhealthy()
 
 
 def parse_filter_node(node: dict):
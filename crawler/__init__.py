@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
-from crawler.main_crawler import run_crawlers
+from crawler.main_crawler import run_crawlers, sync_vectorstore
+from chat.syncstate import SyncInProgressError, get_job_progress, is_sync_running, sync_guard
 from server.logger import logger
 
 import threading
@@ -86,4 +87,80 @@ def get_crawler_status():
             "state": status["state"],
             "error": status["error"],
             "targets": status["targets"]
-        }), 200
\ No newline at end of file
+        }), 200
+
+
+def background_sync(full, guard=None):
+    # 크롤러 실행 후와 같이, 동기화가 끝나면 로컬 인덱스와 사전 계산된 추천도 새 동기화 세대에 맞게 갱신한다.
+    try:
+        sync_vectorstore(full=full, guard=guard)
+    except Exception as e:
+        logger.error(f"벡터스토어 동기화 중 오류: {e}")
+
+@crawler_bp.route('/sync/run', methods=['GET'])
+def start_sync():
+    """크롤링 없이 벡터스토어 동기화만 백그라운드에서 시작하는 API 엔드포인트
+
+    Query Parameters:
+        full (str, optional): "true"면 전체 동기화, "false"면 증분 동기화. 미지정시 자동 선택
+
+    Returns:
+        JSON:
+            - 성공시 (202):
+                {
+                    "message": "벡터스토어 동기화 시작됨"
+                }
+            - 실행 중일 때 (429):
+                {
+                    "message": "이미 벡터스토어 동기화가 실행 중입니다."
+                }
+    """
+    full_param = request.args.get('full')
+    full = None if full_param is None else full_param.lower() == "true"
+
+    # 실행 여부를 확인한 뒤 스레드에서 잠금을 잡으면 그 사이에 다른 요청이 끼어들 수 있으므로,
+    # 요청 스레드에서 바로 잠금을 잡고 백그라운드 스레드에 넘긴다.
+    try:
+        guard = sync_guard()
+    except SyncInProgressError:
+        return jsonify({"message": "이미 벡터스토어 동기화가 실행 중입니다."}), 429
+
+    try:
+        thread = threading.Thread(target=background_sync, args=(full, guard), daemon=True)
+        thread.start()
+    except Exception:
+        guard.release()
+        raise
+
+    return jsonify({"message": "벡터스토어 동기화 시작됨"}), 202
+
+
+@crawler_bp.route('/sync/status', methods=['GET'])
+def get_sync_status():
+    """가장 최근 벡터스토어 동기화 작업의 진행 상황을 조회하는 API 엔드포인트
+
+    Returns:
+        JSON (200):
+            {
+                "running": true | false,
+                "job": {
+                    "job_id": 1,
+                    "mode": "full" | "incremental",
+                    "state": "running" | "done" | "error" | "interrupted",
+                    "done": 처리한 활동 수,
+                    "total": 전체 활동 수,
+                    "rate": 초당 처리한 활동 수,
+                    "eta_seconds": 남은 시간 추정(초) or null,
+                    "started_at": 시작 시각(epoch),
+                    "updated_at": 마지막 체크포인트 시각(epoch),
+                    "error": "오류 메시지" or null
+                } or null
+            }
+    """
+    running = is_sync_running()
+    job = get_job_progress()
+    if job and job["state"] == "running" and not running:
+        # 실행 중인 동기화가 없는데 running으로 남아 있으면 프로세스가 중간에 종료된 작업이다.
+        job["state"] = "interrupted"
+        job["eta_seconds"] = None
+    return jsonify({"running": running, "job": job}), 200
@@ -4,6 +4,10 @@ from crawler.idealist_crawler import crawl as idealist_crawler
 from crawler.unv_crawler import crawl as unv_crawler
 from crawler.v1365_crawler import crawl as v1365_crawler
 from chat.bot import Bot
+from chat.engines import update_local_index
+from chat.precompute import precompute_recommendations
+from chat.syncstate import SyncInProgressError
+from server.logger import logger
 import sys
 
 CRAWLER_MAP = {
@@ -37,11 +41,34 @@ def run_crawlers(targets=None):
 
     print("===== 크롤링 종료 =====")
 
+    sync_vectorstore()
+
+def sync_vectorstore(full=None, guard=None) -> bool:
+    """
+    MySQL의 활동을 Weaviate 벡터스토어로 동기화하고, 이어서 로컬 인덱스 갱신과 추천 사전 계산을 실행.
+    동기화가 끝나면 동기화 세대(generation)가 바뀌어 이전에 계산한 추천은 더 이상 사용되지 않으므로, 동기화할 때마다 다시 계산한다.
+    full, guard는 Bot.update_vectorstore에 그대로 전달된다.
+    다른 동기화가 실행 중이어서 건너뛰었으면 False를 반환
+    """
     print("===== 벡터DB 변환 시작 =====")
     # MYSQL에 저장된 데이터를 Weaviate DB로 전송
-    Bot.update_vectorstore()
+    try:
+        Bot.update_vectorstore(full=full, guard=guard)
+    except SyncInProgressError as e:
+        # 다른 동기화가 실행 중이면 그 동기화가 같은 데이터를 반영하므로 이번 동기화는 건너뛴다.
+        # 로컬 인덱스 갱신과 추천 사전 계산도 실행 중인 동기화가 끝난 뒤의 데이터로 해야 하므로 함께 건너뛴다.
+        logger.warning(f"벡터DB 변환을 건너뜁니다: {e}")
+        return False
+    # 로컬 검색 엔진을 사용 중이면 로컬 인덱스도 함께 갱신
+    update_local_index()
     print("===== 벡터DB 변환 종료 =====")
 
+    print("===== 추천 사전 계산 시작 =====")
+    # 갱신된 활동 목록과 리뷰 이력으로 사용자별 활동 이력 기반 추천을 미리 계산
+    precompute_recommendations()
+    print("===== 추천 사전 계산 종료 =====")
+    return True
+
 if __name__ == '__main__':
     selected = sys.argv[1:]  # 인자 없으면 전체 실행
     run_crawlers(selected if selected else None)
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""테스트 공통 설정.
+
+저장소 루트를 import 경로에 추가하고, 실제 Weaviate 인스턴스가 필요한 벤치마크용 fixture를 제공한다.
+Weaviate 벤치마크는 WEAVIATE_URL이 설정되어 있고 의존성이 모두 설치된 환경에서만 실행된다.
+"""
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def load_module(relative_path: str):
+    """패키지 __init__을 거치지 않고 모듈 파일 하나만 불러옵니다. 의존성이 없으면 테스트를 건너뜁니다.
+    chat 패키지는 import 시점에 Bot과 LangGraph를 초기화하므로, 상대 import가 없는 유틸리티 모듈은 이 방법으로 테스트한다."""
+    path = os.path.join(ROOT, relative_path)
+    name = "standalone_" + relative_path.replace(os.sep, "_").removesuffix(".py")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except ModuleNotFoundError as e:
+        pytest.skip(f"{relative_path}의 의존성({e.name})이 설치되지 않았습니다.")
+    return module
+
+
+@pytest.fixture(scope="session")
+def weaviate_collection():
+    """벤치마크에 사용할 활동 컬렉션을 반환합니다. Weaviate에 연결할 수 없으면 테스트를 건너뜁니다."""
+    if not os.getenv("WEAVIATE_URL"):
+        pytest.skip("WEAVIATE_URL이 설정되지 않아 Weaviate 벤치마크를 건너뜁니다.")
+    pytest.importorskip("weaviate")
+    constants = pytest.importorskip("chat.constants")
+    weaviate_module = pytest.importorskip("chat.weaviate")
+    with weaviate_module.WeaviateClientContext() as client:
+        collection = client.collections.get(constants.weaviate_index_name)
+        if collection.aggregate.over_all(total_count=True).total_count == 0:
+            pytest.skip("활동 컬렉션이 비어 있습니다.")
+        yield collection
+
+
+@pytest.fixture(scope="session")
+def sample_vectors(weaviate_collection):
+    """컬렉션에 저장된 활동 벡터 몇 개를 질의 벡터로 사용합니다."""
+    objects = weaviate_collection.query.fetch_objects(limit=20, include_vector=True).objects
+    return [obj.vector["default"] if isinstance(obj.vector, dict) else obj.vector for obj in objects]
+
+
+def median_ms(timings: list[float]) -> float:
+    """초 단위 측정값들의 중앙값을 밀리초로 반환합니다."""
+    ordered = sorted(timings)
+    return ordered[len(ordered) // 2] * 1000
@@ -0,0 +1,147 @@
+"""chat/cache.py의 TTLCache와 chat/tools.py의 Tavily 검색 결과 캐시(CachedTavilySearchResults) 테스트."""
+import time
+
+import pytest
+
+from conftest import load_module
+
+
+@pytest.fixture(scope="module")
+def cache_module():
+    return load_module("chat/cache.py")
+
+
+def test_hit_and_miss(cache_module):
+    cache = cache_module.TTLCache("test", maxsize=4, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", {"value": 1})
+    assert cache.get("a") == {"value": 1}
+
+    stats = cache.stats
+    assert (stats["hits"], stats["misses"], stats["sets"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_entries_expire_after_ttl(cache_module):
+    cache = cache_module.TTLCache("test", maxsize=4, ttl=0.05)
+    cache.set("default", 1)
+    cache.set("longer", 2, ttl=60)
+    time.sleep(0.1)
+    assert cache.get("default") is None
+    assert cache.get("longer") == 2
+    assert cache.stats["expirations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(cache_module):
+    cache = cache_module.TTLCache("test", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats["evictions"] == 1
+
+
+def test_disk_tier_survives_restart(cache_module, tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache_module.TTLCache("test", ttl=60, sqlite_path=path).set("a", ["x", 1])
+
+    restarted = cache_module.TTLCache("test", ttl=60, sqlite_path=path)
+    assert restarted.get("a") == ["x", 1]
+    assert restarted.stats["disk_hits"] == 1
+    # 이름(namespace)이 다른 캐시는 같은 파일을 써도 항목을 공유하지 않는다.
+    assert cache_module.TTLCache("other", ttl=60, sqlite_path=path).get("a") is None
+
+
+def test_expired_disk_entry_is_not_returned(cache_module, tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache_module.TTLCache("test", ttl=0.05, sqlite_path=path).set("a", 1)
+    time.sleep(0.1)
+    assert cache_module.TTLCache("test", ttl=0.05, sqlite_path=path).get("a") is None
+
+
+def test_invalidate_prefix(cache_module, tmp_path):
+    cache = cache_module.TTLCache("test", ttl=60, sqlite_path=str(tmp_path / "cache.db"))
+    cache.set("user1|keyword", 1)
+    cache.set("user1|history", 2)
+    cache.set("user2|history", 3)
+    assert cache.invalidate_prefix("user1|") == 2
+    assert cache.get("user1|keyword") is None and cache.get("user1|history") is None
+    assert cache.get("user2|history") == 3
+
+
+class FakeTavily:
+    """TavilySearchAPIWrapper 대신 사용하는 가짜 검색 API. 호출 횟수를 세고, fail이 True이면 예외를 던진다."""
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def raw_results(self, query, *args, **kwargs):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("Tavily API 오류")
+        return {"query": query, "answer": "답", "results": [{"url": "https://example.com", "content": query}]}
+
+    @staticmethod
+    def clean_results(results, *args, **kwargs):
+        return [{"url": result["url"], "content": result["content"]} for result in results]
+
+
+@pytest.fixture
+def tavily(monkeypatch):
+    """가짜 API를 사용하는 CachedTavilySearchResults와 가짜 API, 비어 있는 캐시를 반환합니다."""
+    tools = pytest.importorskip("chat.tools")
+    # 기본 api_wrapper를 만들 때 API 키를 검사하므로 임의의 키를 넣어 둔다. (실제 API는 호출하지 않는다)
+    monkeypatch.setenv("TAVILY_API_KEY", "test")
+    fake = FakeTavily()
+    tool = tools.CachedTavilySearchResults(max_results=3, include_answer=True)
+    # api_wrapper는 pydantic 필드라 검증을 거치지 않도록 직접 바꾼다.
+    object.__setattr__(tool, "api_wrapper", fake)
+    cache = tools.TTLCache("tavily-test", maxsize=8, ttl=60)
+    monkeypatch.setattr(tools, "tavily_cache", cache)
+    return tool, fake, cache
+
+
+def test_tavily_cache_key_normalizes_query(tavily):
+    tool, _, _ = tavily
+    assert tool._cache_key("  서울   날씨\n") == tool._cache_key("서울 날씨")
+    assert tool._cache_key("Seoul WEATHER") == tool._cache_key("seoul weather")
+    # 전각 문자는 NFKC로 정규화된다.
+    assert tool._cache_key("ＡＢＣ") == tool._cache_key("abc")
+    # 검색 옵션이 다르면 키도 다르다.
+    other = type(tool)(max_results=5, include_answer=True)
+    assert tool._cache_key("서울 날씨") != other._cache_key("서울 날씨")
+
+
+def test_tavily_cache_hit_skips_api(tavily):
+    tool, fake, cache = tavily
+    content, artifact = tool._run("서울 날씨")
+    assert fake.calls == 1
+    assert content == [{"url": "https://example.com", "content": "서울 날씨"}]
+    assert artifact["answer"] == "답"
+    # 캐시에는 [content, artifact] 형태로 저장된다.
+    assert cache.get(tool._cache_key("서울 날씨")) == [content, artifact]
+
+    # 정규화된 질문이 같으면 API를 다시 호출하지 않고 같은 결과를 반환한다.
+    assert tool._run("  서울  날씨 ") == (content, artifact)
+    assert fake.calls == 1
+    # 다른 질문은 API를 호출한다.
+    tool._run("부산 날씨")
+    assert fake.calls == 2
+
+
+def test_tavily_errors_are_not_cached(tavily):
+    tool, fake, cache = tavily
+    fake.fail = True
+    content, artifact = tool._run("서울 날씨")
+    assert "Tavily API 오류" in content and not artifact
+    assert cache.get(tool._cache_key("서울 날씨")) is None
+
+    # 오류가 캐시되지 않았으므로 다음 호출은 API를 다시 호출하고, 정상 결과는 캐시된다.
+    fake.fail = False
+    content, artifact = tool._run("서울 날씨")
+    assert fake.calls == 2 and artifact
+    tool._run("서울 날씨")
+    assert fake.calls == 2
@@ -0,0 +1,70 @@
+"""리뷰한 활동 제외 방식(not_equal 필터 / over-fetch 후 클라이언트 제외) 벤치마크.
+
+리뷰 수 10, 100, 1000개에 대해 두 방식의 near_vector 지연 시간을 비교하고,
+어느 방식이든 리뷰한 활동이 결과에 포함되지 않고 결과가 limit개로 채워지는지 확인한다.
+"""
+import time
+
+import pytest
+
+from conftest import median_ms
+
+LIMIT = 10
+REPEAT = 5
+
+
+def _history_ids(collection, size: int) -> list[bytes]:
+    """컬렉션에 실제로 있는 activity_id로 리뷰 기록을 만듭니다. 부족하면 임의의 id로 채웁니다."""
+    objects = collection.query.fetch_objects(limit=size, return_properties=["activity_id"]).objects
+    ids = [bytes.fromhex(obj.properties["activity_id"]) for obj in objects]
+    ids += [i.to_bytes(16, "big") for i in range(size - len(ids))]
+    return ids
+
+
+@pytest.mark.parametrize("history_size", [10, 100, 1000])
+def test_exclusion_latency(weaviate_collection, sample_vectors, history_size):
+    engines = pytest.importorskip("chat.engines")
+    history_ids = _history_ids(weaviate_collection, history_size)
+    history_hex = {activity_id.hex() for activity_id in history_ids}
+    total = weaviate_collection.aggregate.over_all(total_count=True).total_count
+    # _history_ids는 컬렉션의 앞쪽 객체로 리뷰 기록을 만들므로, 리뷰하지 않은 활동은 total - min(total, 리뷰 수)개다.
+    expected = min(LIMIT, total - min(total, history_size))
+
+    def run(filter_max_ids: int) -> float:
+        original = engines.EXCLUSION_FILTER_MAX_IDS
+        engines.EXCLUSION_FILTER_MAX_IDS = filter_max_ids
+        try:
+            timings = []
+            for vector in sample_vectors[:REPEAT]:
+                started = time.perf_counter()
+                objects = engines.WeaviateEngine().search(vector, LIMIT, history_ids)
+                timings.append(time.perf_counter() - started)
+                assert not {obj.properties["activity_id"] for obj in objects} & history_hex
+                # over-fetch한 페이지가 리뷰한 활동으로 가득 차도 다음 페이지를 가져와 limit개를 채운다.
+                assert len(objects) == expected
+            return median_ms(timings)
+        finally:
+            engines.EXCLUSION_FILTER_MAX_IDS = original
+
+    filter_ms = run(filter_max_ids=history_size)
+    overfetch_ms = run(filter_max_ids=0)
+    print(f"\n리뷰 {history_size}개: not_equal 필터 {filter_ms:.1f}ms, over-fetch {overfetch_ms:.1f}ms")
+
+
+def test_overfetch_refills_past_reviewed_pages():
+    """리뷰한 활동이 over-fetch 페이지보다 많이 앞쪽에 몰려 있어도 limit개를 채우는지 확인한다."""
+    engines = pytest.importorskip("chat.engines")
+    ranked = [f"{i:032x}" for i in range(1000)]
+    reviewed = set(ranked[:700:2]) | set(ranked[:300])
+    calls = []
+
+    def query(limit, offset):
+        calls.append((limit, offset))
+        return ranked[offset:offset + limit]
+
+    results = engines.fetch_until_filled(query, LIMIT, page_size=LIMIT + 200, keep=lambda aid: aid not in reviewed)
+    assert results == [aid for aid in ranked if aid not in reviewed][:LIMIT]
+    assert calls == [(210, 0), (210, 210)]
+
+    # 결과가 끝나면 limit개보다 적어도 멈춘다.
+    assert engines.fetch_until_filled(query, LIMIT, page_size=300, keep=lambda aid: aid >= ranked[995]) == ranked[995:]
@@ -0,0 +1,124 @@
+"""chat/hedging.py 테스트.
+
+가짜 runnable과, OpenAI chat completions API를 흉내 내는 로컬 HTTP 서버로
+지연된 호출에 중복 요청이 나가고 먼저 끝난 응답이 사용되는지 확인한다.
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import load_module
+
+SLOW_SECONDS = 1.5
+FAST_SECONDS = 0.02
+
+
+@pytest.fixture()
+def hedging():
+    module = load_module("chat/hedging.py")
+    module.HEDGE_ENABLED = True
+    module.hedge_budget = module.HedgeBudget(max_rate=1.0)
+    return module
+
+
+def prime_latency(module, model_name: str, latency: float = FAST_SECONDS) -> None:
+    for _ in range(module.HEDGE_MIN_SAMPLES):
+        module.latency_tracker.record(model_name, latency)
+
+
+class SlowFirstRunnable:
+    """첫 호출만 느리게 응답하는 가짜 runnable."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        await asyncio.sleep(SLOW_SECONDS if self.calls == 1 else FAST_SECONDS)
+        return f"{inputs}-{self.calls}"
+
+
+def test_try_acquire_marks_its_own_call(hedging):
+    budget = hedging.HedgeBudget(max_rate=0.5)
+    first, second = budget.record_call(), budget.record_call()
+    assert budget.try_acquire(first)
+    assert first == [True] and second == [False]
+    # 같은 호출은 두 번 hedge하지 않고, 비율 제한을 넘는 hedge도 허용하지 않는다.
+    assert not budget.try_acquire(first)
+    assert not budget.try_acquire(second)
+    assert budget.hedged_rate == 0.5
+
+
+def test_hedged_invoke_uses_first_response(hedging):
+    prime_latency(hedging, "fake")
+    runnable = SlowFirstRunnable()
+    started = time.perf_counter()
+    assert hedging.hedged_invoke(runnable, "q", "fake") == "q-2"
+    assert time.perf_counter() - started < SLOW_SECONDS
+    assert runnable.calls == 2
+
+
+def test_hedged_invoke_without_samples_does_not_hedge(hedging):
+    runnable = SlowFirstRunnable()
+    assert hedging.hedged_invoke(runnable, "q", "unsampled") == "q-1"
+    assert runnable.calls == 1
+
+
+class FakeChatCompletionsHandler(BaseHTTPRequestHandler):
+    """/v1/chat/completions 요청에 고정된 응답을 보내는 핸들러. 첫 요청만 느리게 응답한다."""
+    requests = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.lock:
+            type(self).requests += 1
+            number = type(self).requests
+        time.sleep(SLOW_SECONDS if number == 1 else FAST_SECONDS)
+        body = json.dumps({
+            "id": f"chatcmpl-{number}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "fake-model",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": f"answer-{number}"},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode("utf-8")
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 취소된 hedge 요청은 클라이언트가 먼저 연결을 끊는다.
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def fake_openai_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeChatCompletionsHandler)
+    FakeChatCompletionsHandler.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+def test_hedged_invoke_against_fake_chat_completions_server(hedging, fake_openai_server):
+    langchain_openai = pytest.importorskip("langchain_openai")
+    model = langchain_openai.ChatOpenAI(model="fake-model", base_url=fake_openai_server, api_key="test", max_retries=0)
+    prime_latency(hedging, "fake-model")
+
+    started = time.perf_counter()
+    assert hedging.hedged_invoke(model, "question", "fake-model").content == "answer-2"
+    assert time.perf_counter() - started < SLOW_SECONDS
+    # 같은 모델 객체로 다시 호출해도 공용 이벤트 루프에서 비동기 클라이언트를 재사용할 수 있어야 한다.
+    assert hedging.hedged_invoke(model, "question", "fake-model").content == "answer-3"
+    assert FakeChatCompletionsHandler.requests == 3
@@ -0,0 +1,132 @@
+"""키워드 검색 방식(near_vector / near_text / fusion)의 recall과 지연 시간 비교.
+
+컬렉션에서 표본 활동을 골라 활동 이름과 키워드를 질의로 사용하고,
+표본 활동 자신이 상위 LIMIT개 안에 들어오는 비율(recall@LIMIT)과 질의 지연 시간의 중앙값을 비교한다.
+Weaviate Cloud 없이도 비교할 수 있도록, 로컬 bge-m3로 임베딩한 가짜 컬렉션에
+원격 vectorizer의 왕복 지연(VECTORIZER_LATENCY)을 주입한 near_text로도 같은 비교를 실행한다.
+"""
+import itertools
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from conftest import median_ms
+
+LIMIT = 10
+SAMPLE_SIZE = 30
+VECTORIZER_LATENCY = 0.05  # 가짜 컬렉션의 near_text가 원격 vectorizer 호출 대신 기다리는 시간(초)
+
+ACTIVITY_TYPES = ["봉사활동", "공모전", "대외활동", "교육", "인턴십"]
+TOPICS = ["환경 보호", "어린이 학습 멘토링", "시각 디자인", "브랜드 마케팅", "웹 프로그래밍",
+          "어르신 돌봄", "유기 동물 보호", "해외 교류", "영상 제작", "청년 창업"]
+
+
+class FakeVectorQuery:
+    """메모리에 올린 정규화 벡터로 near_vector/near_text를 흉내 내는 질의 객체.
+    near_text는 Weaviate vectorizer처럼 concept마다 임베딩해서 평균 내며, 그 전에 원격 호출 지연을 기다린다."""
+
+    def __init__(self, objects, vectors: np.ndarray, vectorize):
+        self.objects = objects
+        self.vectors = vectors
+        self.vectorize = vectorize
+
+    def near_vector(self, near_vector, limit, return_properties, include_vector=False):
+        scores = self.vectors @ np.asarray(near_vector, dtype=np.float32)
+        return SimpleNamespace(objects=[
+            SimpleNamespace(properties={k: self.objects[i][k] for k in return_properties})
+            for i in np.argsort(-scores)[:limit]
+        ])
+
+    def near_text(self, query, limit, return_properties, include_vector=False):
+        time.sleep(VECTORIZER_LATENCY)
+        vectors = np.array([self.vectorize(concept) for concept in query if concept.strip()])
+        mean = vectors.mean(axis=0)
+        return self.near_vector(mean / np.linalg.norm(mean), limit, return_properties)
+
+
+def compare_modes(collection, samples, tools, constants) -> dict[str, tuple[float, float]]:
+    """검색 방식별 (recall@LIMIT, 지연 시간 중앙값(ms))을 반환합니다. near_text를 사용할 수 없으면 건너뜁니다."""
+    options = {"limit": LIMIT, "return_properties": ["activity_id"], "include_vector": False}
+
+    def near_vector(keywords):
+        vector = constants.embed_keywords(keywords)
+        return collection.query.near_vector(near_vector=vector, **options).objects
+
+    def near_text(keywords):
+        return collection.query.near_text(query=keywords, **options).objects
+
+    def fusion(keywords):
+        return tools.reciprocal_rank_fusion([
+            collection.query.near_vector(near_vector=list(constants.embed_cached(keyword)), **options).objects
+            for keyword in tools.normalize_keywords(keywords)
+        ])[:LIMIT]
+
+    report = {}
+    for name, search in [("near_vector", near_vector), ("near_text", near_text), ("fusion", fusion)]:
+        hits, timings = 0, []
+        for activity_id, keywords in samples:
+            started = time.perf_counter()
+            try:
+                objects = search(keywords)
+            except Exception as e:
+                if name == "near_text":
+                    pytest.skip(f"near_text를 사용할 수 없습니다(vectorizer 설정 확인): {e}")
+                raise
+            timings.append(time.perf_counter() - started)
+            hits += activity_id in {obj.properties.get("activity_id") for obj in objects}
+        report[name] = (hits / len(samples), median_ms(timings))
+
+    print("\n" + "\n".join(f"{name}: recall@{LIMIT}={recall:.2f}, p50={latency:.1f}ms"
+                            for name, (recall, latency) in report.items()))
+    return report
+
+
+@pytest.fixture(scope="module")
+def samples(weaviate_collection):
+    objects = weaviate_collection.query.fetch_objects(
+        limit=SAMPLE_SIZE, return_properties=["activity_id", "activity_name", "keyword"]
+    ).objects
+    samples = [
+        (obj.properties["activity_id"], [obj.properties["activity_name"], obj.properties.get("keyword") or ""])
+        for obj in objects if obj.properties.get("activity_name")
+    ]
+    if not samples:
+        pytest.skip("활동 이름이 있는 표본이 없습니다.")
+    return samples
+
+
+def test_keyword_search_modes(weaviate_collection, samples):
+    constants = pytest.importorskip("chat.constants")
+    tools = pytest.importorskip("chat.tools")
+    report = compare_modes(weaviate_collection, samples, tools, constants)
+    # 로컬 임베딩(near_vector)이 원격 vectorizer(near_text)와 같은 모델이므로 recall이 크게 떨어지지 않아야 한다.
+    assert report["near_vector"][0] >= report["near_text"][0] - 0.1
+
+
+def test_keyword_search_modes_local():
+    """Weaviate Cloud 없이, 가짜 컬렉션에서 near_vector와 지연을 주입한 near_text를 비교한다."""
+    constants = pytest.importorskip("chat.constants")
+    tools = pytest.importorskip("chat.tools")
+    objects = [
+        {"activity_id": f"{i:032x}", "activity_name": f"{topic} {activity_type}", "keyword": topic}
+        for i, (topic, activity_type) in enumerate(itertools.product(TOPICS, ACTIVITY_TYPES))
+    ]
+    vectors = np.asarray(constants.embed([f"{obj['activity_name']} {obj['keyword']}" for obj in objects]),
+                         dtype=np.float32)
+    collection = SimpleNamespace(query=FakeVectorQuery(objects, vectors, vectorize=constants.embed))
+    samples = [(obj["activity_id"], [obj["activity_name"], obj["keyword"]]) for obj in objects[:SAMPLE_SIZE]]
+
+    report = compare_modes(collection, samples, tools, constants)
+    assert report["near_vector"][0] >= report["near_text"][0] - 0.1
+    # 같은 모델이므로 recall은 비슷하고, near_vector는 원격 vectorizer 왕복이 없으므로 더 빠르다.
+    assert report["near_vector"][1] < report["near_text"][1]
+
+
+def test_blank_keywords_have_no_query_vector():
+    constants = pytest.importorskip("chat.constants")
+    tools = pytest.importorskip("chat.tools")
+    assert tools.normalize_keywords(["", "  ", "\t"]) == []
+    assert tools.normalize_keywords(["  봉사  활동 ", "봉사 활동", "환경"]) == ["봉사 활동", "환경"]
+    assert constants.embed_keywords(["", " "]) is None
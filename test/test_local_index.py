@@ -0,0 +1,189 @@
+"""로컬 벡터 인덱스(LocalVectorIndex) 테스트.
+
+임시 디렉토리에 작은 인덱스를 만들고, MySQL 조회(run_query)와 임베딩 모델은 가짜로 바꿔서
+brute-force/IVF 검색 순서, 제외/유형/날짜 필터, update_from_mysql의 추가/수정/삭제/복원을 확인한다.
+"""
+import hashlib
+import zlib
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+DIMENSION = 16
+
+
+class FakeModel:
+    """텍스트마다 고정된 정규화 벡터를 돌려주는 임베딩 모델."""
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return DIMENSION
+
+    @staticmethod
+    def vector(text: str) -> np.ndarray:
+        vector = np.random.default_rng(zlib.crc32(text.encode())).standard_normal(DIMENSION).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def encode(self, texts, normalize_embeddings=True, batch_size=32):
+        return np.array([self.vector(text) for text in texts])
+
+
+class FakeActivities:
+    """activities 테이블을 흉내 내는 run_query. 진행 중인 활동의 해시 목록과 id 목록 조회만 지원한다."""
+
+    def __init__(self):
+        self.rows: dict[bytes, dict] = {}
+
+    def put(self, i: int, content: str = None, activity_type: str = "공모전",
+            start_date: datetime = None, end_date: datetime = None):
+        activity_id = i.to_bytes(16, "big")
+        self.rows[activity_id] = {
+            "activity_id": activity_id,
+            "activity_name": f"활동 {i}",
+            "activity_type": activity_type,
+            "activity_content": content or f"활동 {i} 본문",
+            "start_date": start_date,
+            "end_date": end_date,
+        }
+        return activity_id.hex()
+
+    @staticmethod
+    def content_hash(row: dict) -> str:
+        return hashlib.md5(repr(sorted(row.items())).encode()).hexdigest()
+
+    def live_rows(self) -> list[dict]:
+        # MySQL DATETIME처럼 timezone 없는 UTC 시각으로 비교한다.
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return [row for row in self.rows.values() if row["end_date"] is None or row["end_date"] >= now]
+
+    def __call__(self, query: str, params=None):
+        if "IN (" in query:
+            return [{**self.rows[activity_id], "content_hash": self.content_hash(self.rows[activity_id])}
+                    for activity_id in params if activity_id in self.rows]
+        return [{"activity_id": row["activity_id"], "content_hash": self.content_hash(row)} for row in self.live_rows()]
+
+
+@pytest.fixture
+def local_index(monkeypatch):
+    module = pytest.importorskip("chat.local_index")
+    monkeypatch.setattr(module, "model", FakeModel())
+    return module
+
+
+@pytest.fixture
+def activities(local_index, monkeypatch):
+    fake = FakeActivities()
+    monkeypatch.setattr(local_index, "run_query", fake)
+    return fake
+
+
+def _brute_force(activities: FakeActivities, query: np.ndarray, limit: int) -> list[str]:
+    rows = activities.live_rows()
+    scores = [float(FakeModel.vector(row["activity_content"]) @ query) for row in rows]
+    return [rows[i]["activity_id"].hex() for i in np.argsort(scores)[::-1][:limit]]
+
+
+def _ids(results: list[dict]) -> list[str]:
+    return [properties["activity_id"] for properties in results]
+
+
+def test_brute_force_search_order(local_index, activities, tmp_path):
+    for i in range(40):
+        activities.put(i)
+    index = local_index.LocalVectorIndex(str(tmp_path))
+    assert index.update_from_mysql() == {"added": 40, "updated": 0, "restored": 0, "deleted": 0}
+    assert index.centroids is None
+
+    query = FakeModel.vector("질의")
+    assert _ids(index.search(query.tolist(), 10)) == _brute_force(activities, query, 10)
+    # 인덱스에 있는 활동의 벡터로 검색하면 그 활동이 가장 먼저 나온다.
+    assert _ids(index.search(FakeModel.vector("활동 7 본문").tolist(), 1)) == [(7).to_bytes(16, "big").hex()]
+
+
+def test_ivf_search(local_index, activities, tmp_path, monkeypatch):
+    monkeypatch.setattr(local_index, "IVF_MIN_ROWS", 50)
+    for i in range(200):
+        activities.put(i)
+    index = local_index.LocalVectorIndex(str(tmp_path))
+    index.update_from_mysql()
+    assert index.centroids is not None and len(index.centroids) == int(np.sqrt(200))
+
+    # 모든 클러스터를 검색하면 brute-force와 결과가 같다.
+    monkeypatch.setattr(local_index, "IVF_NPROBE", len(index.centroids))
+    query = FakeModel.vector("질의")
+    assert _ids(index.search(query.tolist(), 10)) == _brute_force(activities, query, 10)
+
+    # 클러스터 하나만 검색해도, 질의 벡터가 배정된 클러스터를 검색하므로 자기 자신은 찾는다.
+    monkeypatch.setattr(local_index, "IVF_NPROBE", 1)
+    for i in (0, 57, 199):
+        target = (i).to_bytes(16, "big").hex()
+        assert _ids(index.search(FakeModel.vector(f"활동 {i} 본문").tolist(), 1)) == [target]
+
+    # 다시 열어도 같은 클러스터와 결과를 읽는다.
+    reopened = local_index.LocalVectorIndex(str(tmp_path))
+    assert np.array_equal(reopened.list_ids, index.list_ids)
+    assert _ids(reopened.search(query.tolist(), 10)) == _ids(index.search(query.tolist(), 10))
+
+
+def test_search_filters(local_index, activities, tmp_path):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    later = now + timedelta(days=30)
+    ids = {
+        "contest": activities.put(0, activity_type="공모전", start_date=datetime(2025, 1, 1), end_date=later),
+        "volunteer": activities.put(1, activity_type="봉사", start_date=datetime(2025, 3, 1), end_date=later),
+        "no_dates": activities.put(2, activity_type="봉사"),
+        "ends_soon": activities.put(3, activity_type="공모전", start_date=datetime(2025, 5, 1),
+                                    end_date=now + timedelta(days=1)),
+    }
+    index = local_index.LocalVectorIndex(str(tmp_path))
+    index.update_from_mysql()
+    query = FakeModel.vector("질의").tolist()
+
+    def search(**filters) -> set[str]:
+        return set(_ids(index.search(query, 10, **filters)))
+
+    assert search() == set(ids.values())
+    assert search(excluded_ids={ids["contest"], "없는 id"}) == set(ids.values()) - {ids["contest"]}
+    assert search(activity_types=["봉사"]) == {ids["volunteer"], ids["no_dates"]}
+    # 종료일이 없는 활동은 ends_after에 걸리지 않는다.
+    assert search(ends_after=datetime.now(timezone.utc) + timedelta(days=7)) == \
+           {ids["contest"], ids["volunteer"], ids["no_dates"]}
+    # 시작일이 없는 활동은 시작일 필터에서 제외된다.
+    assert search(starts_before=datetime(2025, 2, 1, tzinfo=timezone.utc)) == {ids["contest"]}
+    assert search(starts_after=datetime(2025, 2, 1, tzinfo=timezone.utc)) == {ids["volunteer"], ids["ends_soon"]}
+    assert search(activity_types=["공모전"], starts_after=datetime(2025, 2, 1, tzinfo=timezone.utc)) == \
+           {ids["ends_soon"]}
+
+
+def test_update_from_mysql_add_update_remove_restore(local_index, activities, tmp_path):
+    for i in range(5):
+        activities.put(i)
+    index = local_index.LocalVectorIndex(str(tmp_path))
+    assert index.update_from_mysql() == {"added": 5, "updated": 0, "restored": 0, "deleted": 0}
+    # 바뀐 것이 없으면 아무것도 하지 않는다.
+    assert index.update_from_mysql() == {"added": 0, "updated": 0, "restored": 0, "deleted": 0}
+
+    # 수정: 같은 행에 다시 임베딩해서 새 내용으로 검색된다.
+    target = activities.put(2, content="완전히 새로운 본문")
+    activities.put(5)
+    assert index.update_from_mysql() == {"added": 1, "updated": 1, "restored": 0, "deleted": 0}
+    assert len(index) == 6 and index.row_of[target] == 2
+    assert _ids(index.search(FakeModel.vector("완전히 새로운 본문").tolist(), 1)) == [target]
+    assert index.search(FakeModel.vector("활동 2 본문").tolist(), 1)[0]["activity_id"] != target
+
+    # 삭제: MySQL에서 사라진 활동은 삭제 표시만 하고 검색에서 제외한다.
+    removed = activities.rows.pop((3).to_bytes(16, "big"))
+    assert index.update_from_mysql() == {"added": 0, "updated": 0, "restored": 0, "deleted": 1}
+    assert removed["activity_id"].hex() not in _ids(index.search(FakeModel.vector("활동 3 본문").tolist(), 10))
+    assert len(index) == 6
+
+    # 복원: 같은 내용으로 다시 나타나면 다시 임베딩하지 않고 삭제 표시만 해제한다.
+    activities.rows[removed["activity_id"]] = removed
+    assert index.update_from_mysql() == {"added": 0, "updated": 0, "restored": 1, "deleted": 0}
+    assert _ids(index.search(FakeModel.vector("활동 3 본문").tolist(), 1)) == [removed["activity_id"].hex()]
+
+    # 다시 열어도 같은 상태를 읽는다.
+    reopened = local_index.LocalVectorIndex(str(tmp_path))
+    assert reopened.activity_ids == index.activity_ids
+    assert not reopened.deleted.any()
+    assert _ids(reopened.search(FakeModel.vector("완전히 새로운 본문").tolist(), 1)) == [target]
@@ -0,0 +1,45 @@
+"""검색 결과 속성 투영(RETRIEVAL_PROPERTIES, include_vector=False) 벤치마크.
+
+전체 속성과 벡터를 가져오는 질의와 비교해서, 응답 크기가 줄어들고 지연 시간이 늘어나지 않는지 확인한다.
+"""
+import json
+import time
+
+import pytest
+
+from conftest import median_ms
+
+LIMIT = 10
+
+
+def payload_bytes(objects) -> int:
+    """응답 객체들의 속성과 벡터를 직렬화한 크기(바이트)를 반환합니다. 벡터는 float32로 계산합니다."""
+    size = 0
+    for obj in objects:
+        size += len(json.dumps(obj.properties, ensure_ascii=False, default=str).encode("utf-8"))
+        vectors = obj.vector.values() if isinstance(obj.vector, dict) else [obj.vector or []]
+        size += sum(len(vector) * 4 for vector in vectors)
+    return size
+
+
+def test_projection_reduces_payload(weaviate_collection, sample_vectors):
+    vectorstore = pytest.importorskip("chat.vectorstore")
+
+    def run(**kwargs) -> tuple[float, float]:
+        timings, sizes = [], []
+        for vector in sample_vectors:
+            started = time.perf_counter()
+            objects = weaviate_collection.query.near_vector(near_vector=vector, limit=LIMIT, **kwargs).objects
+            timings.append(time.perf_counter() - started)
+            sizes.append(payload_bytes(objects))
+        return median_ms(timings), sum(sizes) / len(sizes)
+
+    full_ms, full_bytes = run(include_vector=True)
+    projected_ms, projected_bytes = run(return_properties=vectorstore.RETRIEVAL_PROPERTIES, include_vector=False)
+    print(f"\n전체 속성+벡터: {full_bytes / 1024:.1f}KB, {full_ms:.1f}ms / "
+          f"RETRIEVAL_PROPERTIES: {projected_bytes / 1024:.1f}KB, {projected_ms:.1f}ms")
+
+    assert projected_bytes < full_bytes
+    # 네트워크 변동을 감안해서, 투영한 질의가 크게 느려지지만 않았는지 확인한다.
+    assert projected_ms <= full_ms * 1.5
+
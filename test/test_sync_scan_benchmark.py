@@ -0,0 +1,68 @@
+"""동기화 전체 스캔(iterate_activity_ids) 벤치마크.
+
+10000개(fetch_objects의 최대 limit)를 넘는 컬렉션도 빠짐없이 한 번씩 순회하는지,
+페이지 크기별 처리량(objects/s)이 어느 정도인지 확인한다.
+"""
+import bisect
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+QUERY_MAXIMUM_RESULTS = 10000
+
+
+class FakeQuery:
+    """uuid 순서로 정렬된 객체에 대해 after= 커서 페이지네이션을 흉내 내는 fetch_objects."""
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.uuids = [obj.uuid for obj in objects]
+        self.max_page = 0
+
+    def fetch_objects(self, after=None, limit=None, return_properties=None, include_vector=False):
+        assert limit <= QUERY_MAXIMUM_RESULTS and not include_vector
+        start = 0 if after is None else bisect.bisect_right(self.uuids, after)
+        page = [SimpleNamespace(uuid=obj.uuid, properties={k: obj.properties.get(k) for k in return_properties})
+                for obj in self.objects[start:start + limit]]
+        self.max_page = max(self.max_page, len(page))
+        return SimpleNamespace(objects=page)
+
+
+def fake_collection(size: int):
+    objects = sorted(
+        (SimpleNamespace(uuid=uuid.uuid4(), properties={"activity_id": f"{i:032x}", "content_hash": f"h{i}",
+                                                        "activity_content": "x" * 1000})
+         for i in range(size)),
+        key=lambda obj: obj.uuid,
+    )
+    return SimpleNamespace(query=FakeQuery(objects))
+
+
+@pytest.mark.parametrize("page_size", [100, 1000, 5000])
+def test_scan_visits_every_object_past_query_limit(page_size):
+    vectorstore = pytest.importorskip("chat.vectorstore")
+    collection = fake_collection(25000)
+
+    started = time.perf_counter()
+    scanned = list(vectorstore.iterate_activity_ids(collection, page_size=page_size))
+    elapsed = time.perf_counter() - started
+
+    assert len(scanned) == 25000
+    assert len({activity_id for _, activity_id, _ in scanned}) == 25000
+    assert collection.query.max_page <= page_size
+    print(f"\npage_size={page_size}: {len(scanned) / elapsed:.0f} objects/s (가짜 컬렉션)")
+
+
+@pytest.mark.parametrize("page_size", [100, 1000, 5000])
+def test_scan_throughput(weaviate_collection, page_size):
+    vectorstore = pytest.importorskip("chat.vectorstore")
+    total = weaviate_collection.aggregate.over_all(total_count=True).total_count
+
+    started = time.perf_counter()
+    scanned = sum(1 for _ in vectorstore.iterate_activity_ids(weaviate_collection, page_size=page_size))
+    elapsed = time.perf_counter() - started
+
+    assert scanned == total
+    print(f"\npage_size={page_size}: {scanned}개, {elapsed:.2f}s ({scanned / elapsed:.0f} objects/s)")